@@ -28,6 +28,14 @@ class AkamaiAppSecClient(AkamaiApiClient):
         )
         return self._get_api_from_relative_path(export_config_path)
 
+    def list_exported_security_policies(self, config_id: int, config_version: int):
+        export_config_path = (
+            f"/appsec/v1/export/configs/{config_id}/versions/{config_version}"
+        )
+        return self._get_items_from_relative_path(
+            export_config_path, "securityPolicies"
+        )
+
     def list_discovered_apis(self):
         request_path = "/appsec/v1/api-discovery"
         return self._get_api_from_relative_path(request_path)["apis"]
@@ -0,0 +1,224 @@
+import asyncio
+import functools
+import inspect
+import logging
+from urllib.parse import urljoin, urlparse
+
+import httpx
+from akamai.edgegrid.edgegrid import EdgeGridAuthHeaders, eg_timestamp, new_nonce
+from requests import HTTPError
+
+from .cassette import REPLAY, CassetteConfig, Recording, get_cassette
+from .client import SUCCESS_STATUSES, RequestAttempts
+from .decoding import get_json_decoder
+from .metrics import RequestMetrics, metrics_sinks_from_config
+from .pagination import apaginate
+from .rate_limiter import api_family, get_rate_limiter
+from .retry import RetryPolicy
+from .session_pool import EDGEGRID_MAX_BODY
+
+logger = logging.getLogger(__name__)
+
+
+class EdgeGridHttpxAuth(httpx.Auth):
+    """Signs httpx requests with the Akamai EdgeGrid authentication scheme."""
+
+    requires_request_body = True
+
+    def __init__(
+        self, client_token, client_secret, access_token, max_body=EDGEGRID_MAX_BODY
+    ):
+        self.ah = EdgeGridAuthHeaders(
+            client_token=client_token,
+            client_secret=client_secret,
+            access_token=access_token,
+            max_body=max_body,
+        )
+
+    def auth_flow(self, request):
+        request.headers["Authorization"] = self.ah.make_auth_header(
+            str(request.url),
+            request.headers,
+            request.method,
+            request.content,
+            eg_timestamp(),
+            new_nonce(),
+        )
+        yield request
+
+
+class AsyncAkamaiApiClient:
+    """
+    Asyncio counterpart of AkamaiApiClient. Requests are awaited rather than
+    blocking the event loop, so many of them can be in flight at once.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        client_token,
+        client_secret,
+        access_token,
+        account_key=None,
+        retry_policy=None,
+        max_connections=100,
+        json_decoder="auto",
+        metrics=None,
+        cassette=None,
+    ):
+        self.base_url = base_url
+        self.error_count = 0
+        self.page_size = 100
+        self.session = self._resilient_session_factory(
+            auth=EdgeGridHttpxAuth(
+                client_token=client_token,
+                client_secret=client_secret,
+                access_token=access_token,
+            ),
+            max_connections=max_connections,
+        )
+        self.client_token = client_token
+        self.account_key = account_key
+        self.retry_policy = RetryPolicy.from_config(retry_policy)
+        self.json_decoder = get_json_decoder(json_decoder)
+        self.metrics = RequestMetrics()
+        self.metrics_sinks = metrics_sinks_from_config(metrics)
+        # Responses recorded to or replayed from a snapshot, see CassetteConfig
+        self.cassette = None
+        cassette_config = CassetteConfig.from_config(cassette)
+        if cassette_config is not None:
+            self.cassette = get_cassette(cassette_config)
+
+    @classmethod
+    def from_client_kwargs(cls, **akamai_client_kwargs):
+        """
+        A client built from the arguments of an AkamaiApiClient, leaving out
+        the options only the synchronous client has.
+        """
+        parameters = inspect.signature(cls.__init__).parameters
+        return cls(
+            **{
+                key: value
+                for key, value in akamai_client_kwargs.items()
+                if key in parameters
+            }
+        )
+
+    def _rate_limiter(self, path):
+        return get_rate_limiter(
+            urlparse(self.base_url).netloc,
+            self.client_token,
+            self.account_key,
+            api_family(path),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.session.aclose()
+
+    async def _get_api_from_relative_path(
+        self, path, params=None, headers=None, schema=None
+    ):
+        return await self._request_api_from_relative_path(
+            "GET", path, params=params, headers=headers, schema=schema
+        )
+
+    def _apaginate(self, path, paginator, params=None, headers=None, *, prefetch=True):
+        """Iterates every item of a paged GET endpoint."""
+        fetch = functools.partial(self._get_api_from_relative_path, headers=headers)
+        return apaginate(fetch, path, paginator, params, prefetch=prefetch)
+
+    async def _post_api_from_relative_path(self, path, body, params=None, headers=None):
+        request_headers = {
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
+        if isinstance(headers, dict):
+            request_headers.update(headers)
+
+        return await self._request_api_from_relative_path(
+            "POST", path, params=params, headers=request_headers, body=body
+        )
+
+    async def _request_api_from_relative_path(
+        self, method, path, params=None, headers=None, body=None, schema=None
+    ):
+        full_url = urljoin(self.base_url, path)
+        # Insert account switch key
+        if self.account_key is not None:
+            if params is None:
+                params = {}
+            params["accountSwitchKey"] = self.account_key
+
+        if self.cassette is not None and self.cassette.mode == REPLAY:
+            return self._replay(method, path, full_url, params, headers, body, schema)
+
+        attempts = RequestAttempts(self, method, path, full_url)
+        while True:
+            await attempts.rate_limiter.acquire_async()
+            attempts.begin()
+            try:
+                response = await self.session.request(
+                    method, full_url, params=params, headers=headers, json=body
+                )
+            except httpx.TransportError as err:
+                delay = attempts.connection_failed(err)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+
+            if attempts.succeeded(response, len(response.content)):
+                self._record(method, full_url, params, headers, body, response)
+                return self.json_decoder.decode(response.content, schema)
+            delay = attempts.retry_delay(response)
+            if delay is None:
+                break
+            if delay:
+                await asyncio.sleep(delay)
+
+        self._record(method, full_url, params, headers, body, response)
+        msg = f"Unexpected status {response.status_code} for url: {response.url}"
+        raise HTTPError(msg, response=response)
+
+    def _record(self, method, url, params, headers, body, response):
+        if self.cassette is None:
+            return
+        recording = Recording(
+            status=response.status_code,
+            headers=dict(response.headers),
+            content=response.content,
+        )
+        self.cassette.record(method, url, params, headers, body, recording)
+
+    def _replay(self, method, path, url, params, headers, body, schema):
+        """The decoded recorded response, raising for it as for the live one."""
+        recording = self.cassette.replay(method, url, params, headers, body)
+        self.metrics.record_response(
+            method, path, recording.status, 0.0, len(recording.content)
+        )
+        if recording.status in SUCCESS_STATUSES:
+            return self.json_decoder.decode(recording.content, schema)
+        response = httpx.Response(
+            recording.status,
+            headers=recording.headers,
+            content=recording.content,
+            request=httpx.Request(method, url),
+        )
+        msg = f"Unexpected status {response.status_code} for url: {url}"
+        raise HTTPError(msg, response=response)
+
+    @staticmethod
+    def _resilient_session_factory(
+        auth=None, timeout=300, max_connections=100
+    ) -> httpx.AsyncClient:
+        # Retries are handled by the client's RetryPolicy, not by the transport
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=max_connections),
+        )
+        return httpx.AsyncClient(auth=auth, timeout=timeout, transport=transport)
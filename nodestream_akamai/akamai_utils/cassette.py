@@ -0,0 +1,196 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+CASSETTE_MODES = (RECORD, REPLAY)
+INDEX_FILE = "index.jsonl"
+BODIES_DIR = "bodies"
+# Describe the transfer rather than the body, which is stored decoded
+TRANSFER_HEADERS = frozenset(
+    {
+        "connection",
+        "content-encoding",
+        "content-length",
+        "date",
+        "keep-alive",
+        "transfer-encoding",
+    }
+)
+
+
+class CassetteMissError(LookupError):
+    """Raised when replaying a request the snapshot holds no response for."""
+
+
+@dataclass(kw_only=True)
+class CassetteConfig:
+    """
+    Where a client records responses to, or replays them from: a snapshot
+    directory and a mode, "record" or "replay".
+    """
+
+    path: str
+    mode: str = REPLAY
+
+    def __post_init__(self):
+        if self.mode not in CASSETTE_MODES:
+            msg = f"Cassette mode must be one of {CASSETTE_MODES}, got {self.mode!r}"
+            raise ValueError(msg)
+
+    @classmethod
+    def from_config(cls, config) -> "CassetteConfig | None":
+        if config is None:
+            return None
+        if isinstance(config, CassetteConfig):
+            return config
+        return cls(**config)
+
+
+@dataclass(kw_only=True)
+class Recording:
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    content: bytes = b""
+
+
+def recording_key(method, url, params=None, headers=None, body=None) -> str:
+    """
+    Identifies a request by its method, path, query, the headers the caller
+    set and its body. The host is left out so a snapshot replays whatever
+    base_url the pipeline is given.
+    """
+    url = urlsplit(url)
+    query = parse_qsl(url.query, keep_blank_values=True)
+    for name, value in (params or {}).items():
+        values = value if isinstance(value, list | tuple) else [value]
+        query.extend((name, str(item)) for item in values)
+    request = {
+        "method": method.upper(),
+        "path": url.path,
+        "query": sorted(query),
+        "headers": {
+            name.lower(): str(value) for name, value in (headers or {}).items()
+        },
+        "body": body,
+    }
+    encoded = json.dumps(request, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class Cassette:
+    """
+    A snapshot directory of responses. Bodies are stored gzipped under
+    bodies/, named after their digest so identical responses are kept once,
+    and index.jsonl lists the response to each request in the order they
+    were recorded. A request made several times, like a polled bulk search,
+    is replayed in that order, the last response repeating.
+    """
+
+    def __init__(self, path, mode=REPLAY):
+        self.path = Path(path)
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.entries: dict[str, list[dict]] = {}
+        self.replayed: dict[str, int] = {}
+        if mode == RECORD:
+            (self.path / BODIES_DIR).mkdir(parents=True, exist_ok=True)
+            # A recording replaces the previous one, unchanged bodies are reused
+            (self.path / INDEX_FILE).write_text("")
+        else:
+            self._load_index()
+
+    def _load_index(self):
+        index = self.path / INDEX_FILE
+        if not index.exists():
+            msg = f"No cassette index at {index}, record one first"
+            raise FileNotFoundError(msg)
+        with index.open() as file:
+            for line in file:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.setdefault(entry["key"], []).append(entry)
+        logger.info(
+            "Replaying %s responses from %s",
+            sum(len(entries) for entries in self.entries.values()),
+            self.path,
+        )
+
+    def _body_path(self, digest) -> Path:
+        return self.path / BODIES_DIR / digest[:2] / f"{digest}.json.gz"
+
+    def record(self, method, url, params, headers, body, recording: Recording):
+        digest = hashlib.sha256(recording.content).hexdigest()
+        body_path = self._body_path(digest)
+        if not body_path.exists():
+            body_path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = body_path.with_name(
+                f".{body_path.name}.{threading.get_ident()}"
+            )
+            temporary.write_bytes(gzip.compress(recording.content))
+            os.replace(temporary, body_path)
+        entry = {
+            "key": recording_key(method, url, params, headers, body),
+            "method": method.upper(),
+            "url": urlsplit(url).path,
+            "params": params,
+            "status": recording.status,
+            "headers": {
+                name: value
+                for name, value in recording.headers.items()
+                if name.lower() not in TRANSFER_HEADERS
+            },
+            "body": digest,
+        }
+        line = json.dumps(entry, default=str) + "\n"
+        with self.lock, (self.path / INDEX_FILE).open("a") as index:
+            index.write(line)
+
+    def replay(self, method, url, params=None, headers=None, body=None) -> Recording:
+        key = recording_key(method, url, params, headers, body)
+        with self.lock:
+            entries = self.entries.get(key)
+            if not entries:
+                msg = f"No recorded response for {method} {url} (params {params})"
+                raise CassetteMissError(msg)
+            position = self.replayed.get(key, 0)
+            self.replayed[key] = position + 1
+            entry = entries[min(position, len(entries) - 1)]
+        content = gzip.decompress(self._body_path(entry["body"]).read_bytes())
+        return Recording(
+            status=entry["status"], headers=entry["headers"], content=content
+        )
+
+
+_cassettes: dict[Path, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(config: CassetteConfig) -> Cassette:
+    """
+    Process wide cassette for the snapshot directory, shared by every client
+    recording to or replaying from it.
+    """
+    path = Path(config.path).resolve()
+    with _cassettes_lock:
+        cassette = _cassettes.get(path)
+        if cassette is None:
+            cassette = _cassettes[path] = Cassette(path, config.mode)
+        elif cassette.mode != config.mode:
+            msg = f"Cassette {path} is already open in {cassette.mode} mode"
+            raise ValueError(msg)
+        return cassette
+
+
+def reset_cassettes():
+    with _cassettes_lock:
+        _cassettes.clear()
@@ -1,18 +1,48 @@
 import functools
 import logging
 import time
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
 
-from akamai.edgegrid import EdgeGridAuth
-from requests import HTTPError, Session
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from requests import ConnectionError as RequestsConnectionError
+from requests import HTTPError, Response, Timeout
+from requests.structures import CaseInsensitiveDict
+
+from .cassette import REPLAY, CassetteConfig, Recording, get_cassette
+from .decoding import get_json_decoder, schema_at
+from .json_stream import iter_json_array_items
+from .metrics import RequestMetrics, endpoint_template, metrics_sinks_from_config
+from .pagination import apaginate, paginate
+from .rate_limiter import api_family, get_rate_limiter, retry_after_from_headers
+from .response_cache import MISSING, ResponseCacheConfig, get_response_cache
+from .retry import RetryPolicy
+from .session_pool import DEFAULT_POOL_SIZE, get_session
+from .single_flight import get_single_flight, request_key
+from .tracing import configure_tracing, span
 
 logger = logging.getLogger(__name__)
 
-PROTOCOL_HTTP = "http://"
-PROTOCOL_HTTPS = "https://"
 CREDENTIAL_TIMEOUT_SECONDS = 300
+# Asynchronous jobs, like PAPI bulk searches, answer 201 or 202 on submission
+SUCCESS_STATUSES = frozenset({200, 201, 202})
+
+
+def _bytes_received(response, *, stream=False) -> int:
+    """Size of the body, without reading a streamed one."""
+    if not stream:
+        return len(response.content)
+    length = response.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else 0
+
+
+def _response_from_recording(recording: Recording, url) -> Response:
+    response = Response()
+    response.status_code = recording.status
+    response.headers = CaseInsensitiveDict(recording.headers)
+    response.url = url
+    # As if the body had been read, so iter_content serves it from memory
+    response._content = recording.content
+    response._content_consumed = True
+    return response
 
 
 class AkamaiAuthenticationError(HTTPError):
@@ -23,110 +53,215 @@ class AkamaiAuthenticationError(HTTPError):
         self.response = response
 
 
+class RequestAttempts:
+    """
+    The attempts at one request, shared by AkamaiApiClient and
+    AsyncAkamaiApiClient so both classify responses, back off and record
+    metrics alike. The clients only send the request and wait.
+    """
+
+    def __init__(self, client, method, path, full_url):
+        self.client = client
+        self.method = method
+        self.path = path
+        self.full_url = full_url
+        self.rate_limiter = client._rate_limiter(full_url)
+        self.retry = client.retry_policy.begin()
+        self.started = None
+
+    def begin(self):
+        """Call right before sending, once the rate limiter lets the attempt through."""
+        self.started = time.monotonic()
+
+    def connection_failed(self, err) -> float | None:
+        """Seconds to wait before retrying after err, or None to give up."""
+        self.client.metrics.record_connection_error(
+            self.method, self.path, time.monotonic() - self.started
+        )
+        delay = self.retry.next_delay(None)
+        if delay is None:
+            return None
+        self.client.metrics.record_retry(self.method, self.path, delay)
+        logger.warning(
+            "Request '%s %s' failed: %s. Retrying in %.1f seconds",
+            self.method,
+            self.full_url,
+            err,
+            delay,
+        )
+        return delay
+
+    def succeeded(self, response, bytes_received) -> bool:
+        """
+        Records the response and whether it succeeded. A 401 raises
+        AkamaiAuthenticationError at once, as retrying cannot fix it.
+        """
+        self.client.metrics.record_response(
+            self.method,
+            self.path,
+            response.status_code,
+            time.monotonic() - self.started,
+            bytes_received,
+        )
+
+        # Immediately fail on 401 authentication errors
+        if response.status_code == 401:
+            error_msg = f"Authentication failed for '{self.method} {self.full_url}'"
+            if response.text:
+                error_msg += f". Response body: {response.text}"
+            logger.error(error_msg)
+            raise AkamaiAuthenticationError(error_msg, response=response)
+
+        if response.status_code in SUCCESS_STATUSES:
+            self.rate_limiter.on_success(response.headers)
+            return True
+        self.client.error_count += 1
+        logger.error(
+            "response.status_code: %s, response.text: %s",
+            response.status_code,
+            response.text,
+        )
+        return False
+
+    def retry_delay(self, response) -> float | None:
+        """
+        Seconds to wait before retrying after the failed response, or None to
+        give up. Throttled requests wait in the rate limiter before the next
+        attempt instead, pausing every client sharing the credential, so
+        none is left for the caller.
+        """
+        retry_after = retry_after_from_headers(response.headers)
+        delay = self.retry.next_delay(response.status_code, retry_after)
+        if delay is None:
+            return None
+        self.client.metrics.record_retry(self.method, self.path, delay)
+        logger.warning(
+            "Received %s response for '%s %s'. Waiting for %.1f seconds before retrying",
+            response.status_code,
+            self.method,
+            self.full_url,
+            delay,
+        )
+        if response.status_code in self.retry.policy.throttle_statuses:
+            self.rate_limiter.on_throttle(delay)
+            return 0.0
+        return delay
+
+
 class AkamaiApiClient:
     def __init__(
-        self, base_url, client_token, client_secret, access_token, account_key=None
+        self,
+        base_url,
+        client_token,
+        client_secret,
+        access_token,
+        account_key=None,
+        retry_policy=None,
+        *,
+        stream_json=False,
+        json_decoder="auto",
+        pool_size=DEFAULT_POOL_SIZE,
+        coalesce_requests=True,
+        response_cache=None,
+        metrics=None,
+        tracing=None,
+        cassette=None,
     ):
         self.base_url = base_url
         self.error_count = 0
         self.page_size = 100
-        self.session = self._resilient_session_factory()
-        self.session.auth = EdgeGridAuth(
-            client_token=client_token,
-            client_secret=client_secret,
-            access_token=access_token,
-            max_body=128 * 1024,  # TODO: Completely Arbitrary Currently
+        # Shared with every client using the same host and credentials
+        self.session = get_session(
+            base_url, client_token, client_secret, access_token, pool_size=pool_size
         )
+        self.client_token = client_token
         self.account_key = account_key
-        self.backoff_delays = [5, 10, 20, 60, 180]
+        self.retry_policy = RetryPolicy.from_config(retry_policy)
+        self.metrics = RequestMetrics()
+        # Where the metrics go once the extractor finishes, see metrics_sinks_from_config
+        self.metrics_sinks = metrics_sinks_from_config(metrics)
+        # Process wide, see tracing.configure_tracing
+        configure_tracing(tracing)
+        # Decode the largest list responses item by item as they arrive
+        self.stream_json = stream_json
+        # msgspec, orjson or json; "auto" picks the fastest one installed
+        self.json_decoder = get_json_decoder(json_decoder)
+        # Identical GETs in flight at once, from any client, share one request
+        self.coalesce_requests = coalesce_requests
+        # GET responses cached in memory for the rest of the run, see ResponseCacheConfig
+        self.response_cache_config = ResponseCacheConfig.from_config(response_cache)
+        self.response_cache = None
+        if self.response_cache_config is not None:
+            self.response_cache = get_response_cache(
+                self.response_cache_config.max_entries,
+                self.response_cache_config.max_bytes,
+            )
+        # Responses recorded to or replayed from a snapshot, see CassetteConfig
+        self.cassette = None
+        cassette_config = CassetteConfig.from_config(cassette)
+        if cassette_config is not None:
+            self.cassette = get_cassette(cassette_config)
+
+    def _rate_limiter(self, path):
+        return get_rate_limiter(
+            urlparse(self.base_url).netloc,
+            self.client_token,
+            self.account_key,
+            api_family(path),
+        )
 
     def _get_api_from_relative_path(
-        self,
-        path,
-        params=None,
-        headers=None,
-        backoff_index=None,
+        self, path, params=None, headers=None, schema=None, *, cache=True
     ):
-        full_url = urljoin(self.base_url, path)
+        """
+        The decoded response to GET path. Pass cache=False for resources that
+        change from one call to the next, such as the status of a job being
+        polled, to skip the response cache and request coalescing.
+        """
+        if not cache or (not self.coalesce_requests and self.response_cache is None):
+            return self._request_api_from_relative_path(
+                "GET", path, params=params, headers=headers, schema=schema
+            )
+        key = request_key(
+            "GET",
+            urljoin(self.base_url, path),
+            params,
+            headers,
+            schema,
+            self.client_token,
+            self.account_key,
+        )
+        if self.response_cache is not None:
+            cached = self.response_cache.get(key)
+            if cached is not MISSING:
+                return cached
 
-        if backoff_index is None:
-            backoff_index = 0
-        response = None
-        # Insert account switch key
-        if self.account_key is not None:
-            if params is None:
-                params = {}
-            params["accountSwitchKey"] = self.account_key
+        def request():
+            response = self._send_with_retries("GET", path, params, headers, None)
+            value = self.json_decoder.decode(response.content, schema)
+            if self.response_cache is not None:
+                ttl = self.response_cache_config.ttl_for(path)
+                self.response_cache.put(key, value, ttl, size=len(response.content))
+            return value
 
-        for sleepy_seconds in range(5):
-            if sleepy_seconds:
-                time.sleep(sleepy_seconds)
-            response = self.session.get(full_url, params=params, headers=headers)
-            # Immediately fail on 401 authentication errors
-            if response.status_code == 401:
-                error_msg = f"Authentication failed for 'GET {full_url}'"
-                if response.text:
-                    error_msg += f". Response body: {response.text}"
-                logger.error(error_msg)
-                raise AkamaiAuthenticationError(error_msg, response=response)
-
-            # Retry once for temporary 500 errors
-            if response.status_code == 500:
-                logger.warning(
-                    "Received 500 response for 'GET %s'. Retrying...", full_url
-                )
-                response = self.session.get(full_url, params=params, headers=headers)
-
-            # Back off for rate limit 429
-            if response.status_code == 429:
-                # Increase bacoff for next attempt
-                next_backoff_index = backoff_index + 1
-                if next_backoff_index > len(self.backoff_delays):
-                    logger.warning(
-                        "Received 429 response for 'GET %s' and backoff limit exceeded.",
-                        full_url,
-                    )
-                else:
-                    backoff = self.backoff_delays[backoff_index]
-                    logger.warning(
-                        "Received 429 response for 'GET %s'. Waiting for %s seconds before retrying",
-                        full_url,
-                        backoff,
-                    )
-                    time.sleep(backoff)
-                    return self._get_api_from_relative_path(
-                        path,
-                        params=params,
-                        headers=headers,
-                        backoff_index=next_backoff_index,
-                    )
-
-            # Return body if 200
-            if response.status_code == 200:
-                return response.json()
-            self.error_count += 1
-            logger.error(
-                "response.status_code: %s, response.text: %s",
-                response.status_code,
-                response.text,
-            )
-        if response:
-            response.raise_for_status()
-            # raise for status only handles: 400 <= status_code < 600
-            msg = f"Unexpected status {response.status_code} for url: {response.url}"
-            raise HTTPError(msg, response=response)
-        msg = "Missing response object in _get_api_from_relative_path"
-        raise SystemError(msg)
+        if not self.coalesce_requests:
+            return request()
+        return get_single_flight().do(key, request)
 
-    def _post_api_from_relative_path(self, path, body, params=None, headers=None):
-        full_url = urljoin(self.base_url, path)
+    def _paginate(self, path, paginator, params=None, headers=None):
+        """Iterates every item of a paged GET endpoint."""
+        fetch = functools.partial(self._get_api_from_relative_path, headers=headers)
+        return paginate(fetch, path, paginator, params)
 
-        # Insert account switch key
-        if self.account_key is not None:
-            if params is None:
-                params = {}
-            params["accountSwitchKey"] = self.account_key
+    def _apaginate(self, path, paginator, params=None, headers=None, *, prefetch=True):
+        """
+        Asynchronously iterates every item of a paged GET endpoint, fetching
+        the next page in a thread while the current one is consumed.
+        """
+        fetch = functools.partial(self._get_api_from_relative_path, headers=headers)
+        return apaginate(fetch, path, paginator, params, prefetch=prefetch)
 
+    def _post_api_from_relative_path(self, path, body, params=None, headers=None):
         request_headers = {
             "Accept": "application/json",
             "Content-Type": "application/json",
@@ -136,46 +271,158 @@ class AkamaiApiClient:
             for header in headers:
                 request_headers[header] = headers[header]
 
-        response = None
-        for sleepy_seconds in range(5):
-            if sleepy_seconds:
-                time.sleep(sleepy_seconds)
-            response = self.session.post(
-                full_url, params=params, headers=request_headers, json=body
+        return self._request_api_from_relative_path(
+            "POST", path, params=params, headers=request_headers, body=body
+        )
+
+    def _request_api_from_relative_path(
+        self, method, path, params=None, headers=None, body=None, schema=None
+    ):
+        """
+        The decoded response body. With a schema, a TypedDict from schemas,
+        only the fields it declares are kept.
+        """
+        response = self._send_with_retries(method, path, params, headers, body)
+        return self.json_decoder.decode(response.content, schema)
+
+    def _get_items_from_relative_path(
+        self, path, items_path, params=None, headers=None, schema=None
+    ):
+        """
+        The array at items_path in the response to GET path, streamed item
+        by item when stream_json is set and loaded in one go otherwise.
+        schema describes the whole response.
+        """
+        if self.stream_json:
+            return self._stream_api_from_relative_path(
+                path,
+                items_path,
+                params=params,
+                headers=headers,
+                item_schema=schema_at(schema, items_path),
             )
+        response = self._get_api_from_relative_path(
+            path, params=params, headers=headers, schema=schema
+        )
+        for key in items_path.split("."):
+            response = response[key]
+        return response
 
-            # Immediately fail on 401 authentication errors
-            if response.status_code == 401:
-                error_msg = f"Authentication failed for 'POST {full_url}'"
-                if response.text:
-                    error_msg += f". Response body: {response.text}"
-                logger.error(error_msg)
-                raise AkamaiAuthenticationError(error_msg, response=response)
-
-            if response.status_code == 200:
-                return response.json()
-            self.error_count += 1
-            logger.error(
-                "response.status_code: %s, response.text: %s",
-                response.status_code,
-                response.text,
+    def _stream_api_from_relative_path(
+        self,
+        path,
+        items_path=None,
+        params=None,
+        headers=None,
+        chunk_size=1 << 16,
+        item_schema=None,
+    ):
+        """
+        GETs path and yields the items of the array at items_path, a dotted
+        path such as "hostnames.items", decoding them one at a time as the
+        body arrives instead of loading the whole document.
+        """
+        response = self._send_with_retries("GET", path, params, headers, stream=True)
+        try:
+            yield from iter_json_array_items(
+                response.iter_content(chunk_size=chunk_size),
+                items_path,
+                loads=functools.partial(self.json_decoder.decode, schema=item_schema),
             )
-        if response:
-            response.raise_for_status()
-            # raise for status only handles: 400 <= status_code < 600
-            msg = f"Unexpected status {response.status_code} for url: {response.url}"
-            raise HTTPError(msg, response=response)
-        msg = "Missing response object in _post_api_from_relative_path"
-        raise SystemError(msg)
+        finally:
+            response.close()
+
+    def _send_with_retries(
+        self, method, path, params=None, headers=None, body=None, *, stream=False
+    ):
+        """Sends a request, retrying per the retry policy, and returns the successful response."""
+        with span(
+            "akamai.request", method=method, endpoint=endpoint_template(path)
+        ) as request_span:
+            response = self._send_with_retries_untraced(
+                method, path, params, headers, body, stream=stream
+            )
+            request_span.set_attribute("status", response.status_code)
+            return response
+
+    def _send_with_retries_untraced(
+        self, method, path, params=None, headers=None, body=None, *, stream=False
+    ):
+        full_url = urljoin(self.base_url, path)
+        # Insert account switch key
+        if self.account_key is not None:
+            if params is None:
+                params = {}
+            params["accountSwitchKey"] = self.account_key
+
+        if self.cassette is not None and self.cassette.mode == REPLAY:
+            return self._replay(method, path, full_url, params, headers, body)
+
+        attempts = RequestAttempts(self, method, path, full_url)
+        response = None
+        while True:
+            attempts.rate_limiter.acquire()
+            attempts.begin()
+            try:
+                response = self.session.request(
+                    method,
+                    full_url,
+                    params=params,
+                    headers=headers,
+                    json=body,
+                    stream=stream,
+                )
+            except (RequestsConnectionError, Timeout) as err:
+                delay = attempts.connection_failed(err)
+                if delay is None:
+                    raise
+                with span("akamai.backoff", delay=delay):
+                    time.sleep(delay)
+                continue
+
+            if attempts.succeeded(response, _bytes_received(response, stream=stream)):
+                self._record(method, full_url, params, headers, body, response)
+                return response
+            delay = attempts.retry_delay(response)
+            if delay is None:
+                break
+            if delay:
+                with span("akamai.backoff", delay=delay, status=response.status_code):
+                    time.sleep(delay)
+
+        if response is not None:
+            self._record(method, full_url, params, headers, body, response)
+        raise self._failure(response)
 
     @staticmethod
-    def _resilient_session_factory(timeout=300, retry_count=5) -> Session:
-        session = Session()
-        retries = Retry(
-            total=retry_count, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504]
+    def _failure(response) -> Exception:
+        """The error to raise for the last response of a failed request."""
+        # A Response is falsy for error statuses, so compare with None
+        if response is None:
+            msg = "Missing response object in _send_with_retries"
+            return SystemError(msg)
+        # The same error as AsyncAkamaiApiClient raises
+        msg = f"Unexpected status {response.status_code} for url: {response.url}"
+        return HTTPError(msg, response=response)
+
+    def _record(self, method, url, params, headers, body, response):
+        if self.cassette is None:
+            return
+        # Reading a streamed body here leaves iter_content serving it from memory
+        recording = Recording(
+            status=response.status_code,
+            headers=dict(response.headers),
+            content=response.content,
+        )
+        self.cassette.record(method, url, params, headers, body, recording)
+
+    def _replay(self, method, path, url, params, headers, body):
+        """The recorded response, failing as the live request did."""
+        recording = self.cassette.replay(method, url, params, headers, body)
+        response = _response_from_recording(recording, url)
+        self.metrics.record_response(
+            method, path, response.status_code, 0.0, len(recording.content)
         )
-        session.mount(PROTOCOL_HTTP, HTTPAdapter(max_retries=retries))
-        session.mount(PROTOCOL_HTTPS, HTTPAdapter(max_retries=retries))
-        session.request = functools.partial(session.request, timeout=timeout)  # Seconds
-        session.send = functools.partial(session.send, timeout=timeout)  # Seconds
-        return session
+        if response.status_code in SUCCESS_STATUSES:
+            return response
+        raise self._failure(response)
@@ -2,34 +2,30 @@ import logging
 from typing import List
 
 from .client import AkamaiApiClient
+from .pagination import OffsetPaginator, PagePaginator
 
 logger = logging.getLogger(__name__)
 
+LIST_V2_POLICIES_PATH = "/cloudlets/api/v2/policies"
+LIST_V3_POLICIES_PATH = "/cloudlets/v3/policies"
+
+# The v2 API answers with a bare list of up to pageSize policies
+V2_POLICIES_PAGINATOR = OffsetPaginator(page_size=1000, limit_param="pageSize")
+# The v3 API caps size at 1000 and reports the page count
+V3_POLICIES_PAGINATOR = PagePaginator(
+    page_size=1000, items_key="content", total_pages_key="page.totalPages"
+)
+
 
 class AkamaiCloudletClient(AkamaiApiClient):
     def list_v2_policies(self) -> List[dict]:
-        list_v2_policies_path = "/cloudlets/api/v2/policies"
-        offset = 0
-        policies = []
-        page_size = 1000
-        continue_query = True
-        while continue_query:
-            query_params = {"offset": offset}
-            paged_response = self._get_api_from_relative_path(
-                list_v2_policies_path, params=query_params
-            )
-            policies = policies + paged_response
-            offset += page_size
-            continue_query = len(paged_response) == page_size
-
-        return policies
+        return list(self._paginate(LIST_V2_POLICIES_PATH, V2_POLICIES_PAGINATOR))
 
     def list_v3_policies(self) -> List[dict]:
-        list_v3_policies_path = "/cloudlets/v3/policies"
-        page_size = 9999
-        query_params = {"size": page_size}
-        response = self._get_api_from_relative_path(
-            list_v3_policies_path, params=query_params
-        )
-
-        return response["content"]
+        return list(self._paginate(LIST_V3_POLICIES_PATH, V3_POLICIES_PAGINATOR))
+
+    def iter_v2_policies(self):
+        return self._apaginate(LIST_V2_POLICIES_PATH, V2_POLICIES_PAGINATOR)
+
+    def iter_v3_policies(self):
+        return self._apaginate(LIST_V3_POLICIES_PATH, V3_POLICIES_PAGINATOR)
@@ -4,61 +4,26 @@ from typing import List
 from urllib.parse import urlparse
 
 from .client import AkamaiApiClient
+from .cloudlet_client import V2_POLICIES_PAGINATOR
 
 logger = logging.getLogger(__name__)
 
+CLOUDLET_LIST_API_PATH = "/cloudlets/api/v2/policies"
+
 
 class AkamaiCloudletsV2Client(AkamaiApiClient):
     def cloudlet_policy_ids(self) -> set[int]:
-        cloudlet_list_api_path = "/cloudlets/api/v2/policies"
-        offset = 0
-        returned_policies = []
-        page_size = 1000
-        continue_query = True
-        while continue_query:
-            query_params = {"offset": offset}
-            response_json = self._get_api_from_relative_path(
-                cloudlet_list_api_path, params=query_params
-            )
-            returned_policies = returned_policies + response_json
-            offset += page_size
-            continue_query = len(response_json) == page_size
-
-        return {policy["policyId"] for policy in returned_policies}
+        return {policy["policyId"] for policy in self.list_cloudlets_v2()}
 
     def cloudlet_policy_ids_er(self) -> set[int]:
-        cloudlet_list_api_path = "/cloudlets/api/v2/policies?cloudletId=0"
-        offset = 0
-        returned_policies = []
-        page_size = 1000
-        continue_query = True
-        while continue_query:
-            query_params = {"offset": offset}
-            response_json = self._get_api_from_relative_path(
-                cloudlet_list_api_path, params=query_params
-            )
-            returned_policies = returned_policies + response_json
-            offset += page_size
-            continue_query = len(response_json) == page_size
-
-        return {policy["policyId"] for policy in returned_policies}
+        # Cloudlet 0 is Edge Redirector
+        policies = self._paginate(
+            CLOUDLET_LIST_API_PATH, V2_POLICIES_PAGINATOR, params={"cloudletId": 0}
+        )
+        return {policy["policyId"] for policy in policies}
 
     def list_cloudlets_v2(self) -> List[int]:
-        cloudlet_list_api_path = "/cloudlets/api/v2/policies"
-        offset = 0
-        returned_policies = []
-        page_size = 1000
-        continue_query = True
-        while continue_query:
-            query_params = {"offset": offset}
-            response_json = self._get_api_from_relative_path(
-                cloudlet_list_api_path, params=query_params
-            )
-            returned_policies = returned_policies + response_json
-            offset += page_size
-            continue_query = len(response_json) == page_size
-
-        return returned_policies
+        return list(self._paginate(CLOUDLET_LIST_API_PATH, V2_POLICIES_PAGINATOR))
 
     def extract_akamai_ruleset_version(self, policy_id: str, version: str):
         policy_tree_api_path = (
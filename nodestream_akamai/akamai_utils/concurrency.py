@@ -0,0 +1,52 @@
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def bounded_map(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    *,
+    max_concurrency: int = 1,
+    preserve_order: bool = False,
+) -> AsyncIterator[R]:
+    """
+    Awaits func(item) for each item with at most max_concurrency calls in
+    flight, yielding results as they complete or, with preserve_order, in
+    the order of items. Items are pulled lazily as slots free up, in a worker
+    thread as pulling one may block on an API call. Exceptions raised by func
+    propagate, so callers wanting isolation should catch them inside func.
+    """
+    items = iter(items)
+    max_concurrency = max(1, int(max_concurrency))
+    in_flight = deque()
+    exhausted = object()
+
+    async def start_next() -> bool:
+        item = await asyncio.to_thread(next, items, exhausted)
+        if item is exhausted:
+            return False
+        in_flight.append(asyncio.ensure_future(func(item)))
+        return True
+
+    try:
+        while len(in_flight) < max_concurrency and await start_next():
+            pass
+        while in_flight:
+            if preserve_order:
+                task = in_flight.popleft()
+                await asyncio.wait([task])
+            else:
+                done, _ = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                task = next(task for task in in_flight if task in done)
+                in_flight.remove(task)
+            await start_next()
+            yield task.result()
+    finally:
+        for task in in_flight:
+            task.cancel()
@@ -1,6 +1,7 @@
 import logging
 
 from .client import AkamaiApiClient
+from .schemas import EnrollmentList
 
 logger = logging.getLogger(__name__)
 
@@ -9,9 +10,12 @@ class AkamaiCpsClient(AkamaiApiClient):
     def list_cps_enrollments(self):
         list_enrollments_path = "/cps/v2/enrollments"
         headers = {"accept": "application/vnd.akamai.cps.enrollments.v11+json"}
-        return self._get_api_from_relative_path(list_enrollments_path, headers=headers)[
-            "enrollments"
-        ]
+        return self._get_items_from_relative_path(
+            list_enrollments_path,
+            "enrollments",
+            headers=headers,
+            schema=EnrollmentList,
+        )
 
     def get_cps_production_deployment(self, enrollment_id):
         cps_deployment_path = f"/cps/v2/enrollments/{enrollment_id}/deployments"
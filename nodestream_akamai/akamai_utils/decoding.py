@@ -0,0 +1,142 @@
+import functools
+import json
+import types
+import typing
+from typing import Any, get_args, get_origin, get_type_hints, is_typeddict
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - depends on the environment
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+@functools.lru_cache(maxsize=None)
+def _fields(schema) -> dict[str, Any]:
+    return get_type_hints(schema)
+
+
+def _is_union(schema) -> bool:
+    origin = get_origin(schema)
+    return origin is typing.Union or origin is types.UnionType
+
+
+def _without_none(schema):
+    """The X of an X | None schema, any other schema as it is."""
+    if _is_union(schema):
+        options = [option for option in get_args(schema) if option is not type(None)]
+        if len(options) == 1:
+            return options[0]
+    return schema
+
+
+def project(value, schema):
+    """
+    Keep only the parts of a decoded value that schema declares. Schemas are
+    TypedDicts, lists and optionals of them; any other type keeps the value
+    as it is.
+    """
+    if schema is None or value is None:
+        return value
+    if is_typeddict(schema):
+        if not isinstance(value, dict):
+            return value
+        return {
+            key: project(value[key], hint)
+            for key, hint in _fields(schema).items()
+            if key in value
+        }
+    origin = get_origin(schema)
+    if origin is list and isinstance(value, list):
+        (item_schema,) = get_args(schema) or (None,)
+        return [project(item, item_schema) for item in value]
+    if _is_union(schema):
+        for option in get_args(schema):
+            if is_typeddict(option) and isinstance(value, dict):
+                return project(value, option)
+            if get_origin(option) is list and isinstance(value, list):
+                return project(value, option)
+    return value
+
+
+def schema_at(schema, path):
+    """The schema of the items of the array at a dotted path within schema."""
+    if schema is None:
+        return None
+    for key in path.split(".") if path else ():
+        if not is_typeddict(schema):
+            return None
+        schema = _without_none(_fields(schema).get(key))
+    if get_origin(schema) is list:
+        (item_schema,) = get_args(schema) or (None,)
+        return item_schema
+    return None
+
+
+class JsonDecoder:
+    name = "json"
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def decode(self, data, schema=None):
+        """Decode a JSON document, keeping only the fields schema declares."""
+        return project(self.loads(data), schema)
+
+
+class OrjsonDecoder(JsonDecoder):
+    name = "orjson"
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class MsgspecDecoder(JsonDecoder):
+    """Skips undeclared fields while decoding instead of projecting afterwards."""
+
+    name = "msgspec"
+
+    def loads(self, data):
+        return msgspec.json.decode(data)
+
+    @functools.lru_cache(maxsize=None)  # noqa: B019 - one decoder per process
+    def _decoder(self, schema):
+        return msgspec.json.Decoder(schema)
+
+    def decode(self, data, schema=None):
+        if schema is None:
+            return self.loads(data)
+        return self._decoder(schema).decode(data)
+
+
+DECODERS = {
+    "msgspec": (MsgspecDecoder, lambda: msgspec is not None),
+    "orjson": (OrjsonDecoder, lambda: orjson is not None),
+    "json": (JsonDecoder, lambda: True),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_json_decoder(name="auto") -> JsonDecoder:
+    """
+    The decoder called name, or with "auto" the fastest one installed:
+    msgspec, then orjson, then the standard library.
+    """
+    if name == "auto":
+        for decoder_class, available in DECODERS.values():
+            if available():
+                return decoder_class()
+    if name not in DECODERS:
+        msg = (
+            f"Unknown JSON decoder {name!r}, expected one of {list(DECODERS)} or 'auto'"
+        )
+        raise ValueError(msg)
+    decoder_class, available = DECODERS[name]
+    if not available():
+        msg = f"JSON decoder {name!r} is not installed"
+        raise ImportError(msg)
+    return decoder_class()
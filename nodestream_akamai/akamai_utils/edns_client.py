@@ -1,5 +1,6 @@
 import logging
 
+from .async_client import AsyncAkamaiApiClient
 from .client import AkamaiApiClient
 
 logger = logging.getLogger(__name__)
@@ -12,4 +13,10 @@ class AkamaiEdnsClient(AkamaiApiClient):
 
     def list_recordsets(self, zone):
         path = f"/config-dns/v2/zones/{zone}/recordsets?showAll=true"
-        return self._get_api_from_relative_path(path)["recordsets"]
+        return self._get_items_from_relative_path(path, "recordsets")
+
+
+class AsyncAkamaiEdnsClient(AsyncAkamaiApiClient):
+    async def list_recordsets(self, zone):
+        path = f"/config-dns/v2/zones/{zone}/recordsets?showAll=true"
+        return (await self._get_api_from_relative_path(path))["recordsets"]
@@ -0,0 +1,94 @@
+import logging
+
+from nodestream.pipeline.extractors import Extractor
+
+from .async_client import AsyncAkamaiApiClient
+from .cassette import CassetteMissError
+from .client import AkamaiApiClient, AkamaiAuthenticationError
+from .metrics import RequestMetrics
+from .tracing import traced_records
+
+logger = logging.getLogger(__name__)
+
+# Errors every later unit of the run would hit too, which stop the run
+# rather than being logged and skipped like a unit's own failures
+FATAL_ERRORS = (AkamaiAuthenticationError, CassetteMissError)
+
+
+class AkamaiExtractor(Extractor):
+    """
+    Reports the request metrics of the extractor's clients once the run
+    finishes, and traces extract_records when tracing is on. Extractors
+    that split their work into units, such as properties or zones, record
+    the units they complete in the pipeline's checkpoints, so a resumed run
+    skips them.
+    """
+
+    # Each record is a whole property, zone or config, costly to extract again
+    CHECKPOINT_INTERVAL = 50
+    completed_units = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "extract_records" in cls.__dict__:
+            # Named when called, so subclasses inheriting it get their own name
+            cls.extract_records = traced_records(
+                lambda self: f"{type(self).__name__}.extract_records"
+            )(cls.extract_records)
+
+    def clients(self) -> list:
+        return [
+            value
+            for value in vars(self).values()
+            if isinstance(value, AkamaiApiClient | AsyncAkamaiApiClient)
+        ]
+
+    def skip_completed(self, units, key):
+        """The units not completed before the run was last checkpointed."""
+        if not self.completed_units:
+            yield from units
+            return
+        skipped = 0
+        for unit in units:
+            if str(key(unit)) in self.completed_units:
+                skipped += 1
+                continue
+            yield unit
+        if skipped:
+            logger.info("Skipped %s units completed earlier in the run", skipped)
+
+    def mark_completed(self, unit_key):
+        """Call once the records of a unit have been handed to the pipeline."""
+        if self.completed_units is None:
+            self.completed_units = set()
+        self.completed_units.add(str(unit_key))
+
+    async def make_checkpoint(self):
+        if self.completed_units:
+            return set(self.completed_units)
+        return None
+
+    async def resume_from_checkpoint(self, checkpoint_object):
+        if isinstance(checkpoint_object, set):
+            self.completed_units = set(checkpoint_object)
+            logger.info(
+                "Resuming %s with %s units already completed",
+                self.__class__.__name__,
+                len(self.completed_units),
+            )
+
+    async def finish(self, context):
+        await super().finish(context)
+        self.report_metrics()
+
+    def report_metrics(self):
+        clients = self.clients()
+        if not clients:
+            return
+        metrics = RequestMetrics.merged(client.metrics for client in clients)
+        name = self.__class__.__name__
+        for sink in clients[0].metrics_sinks:
+            try:
+                sink.emit(name, metrics)
+            except Exception:
+                logger.exception("Failed to report request metrics to %r", sink)
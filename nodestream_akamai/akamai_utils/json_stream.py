@@ -0,0 +1,169 @@
+import codecs
+import json
+import re
+from typing import Iterable, Iterator
+
+WHITESPACE = " \t\n\r"
+STRING_SPECIAL = re.compile(r'["\\]')
+STRUCTURAL = re.compile(r'["\[\]{}]')
+SCALAR_END = re.compile(r"[,:\]}\s]")
+# Discard consumed text once this much has built up in front of the cursor
+COMPACT_AFTER = 1 << 16
+
+
+class JsonStreamError(ValueError):
+    """Raised when a streamed document does not have the expected shape."""
+
+
+class _TextStream:
+    """
+    Text decoded incrementally from byte chunks, with a cursor. Only the
+    part of the document from the cursor onwards is held in memory.
+    """
+
+    def __init__(self, chunks: Iterable[bytes | str], loads=json.loads):
+        self.chunks = iter(chunks)
+        self.loads = loads
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def read_more(self) -> bool:
+        if self.exhausted:
+            return False
+        if self.pos > COMPACT_AFTER:
+            self.buffer = self.buffer[self.pos :]
+            self.pos = 0
+        for chunk in self.chunks:
+            text = chunk if isinstance(chunk, str) else self.decoder.decode(chunk)
+            if text:
+                self.buffer += text
+                return True
+        self.buffer += self.decoder.decode(b"", final=True)
+        self.exhausted = True
+        return False
+
+    def peek(self) -> str:
+        """The next non whitespace character, without consuming it."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read_more():
+                msg = "Unexpected end of JSON document"
+                raise JsonStreamError(msg)
+
+    def expect(self, *characters) -> str:
+        character = self.peek()
+        if character not in characters:
+            msg = f"Expected one of {characters!r} at offset {self.pos}, got {character!r}"
+            raise JsonStreamError(msg)
+        self.pos += 1
+        return character
+
+    def value_end(self) -> int:
+        """
+        The index just past the JSON value starting at the cursor, reading
+        more of the document as needed.
+        """
+        first = self.peek()
+        scan = self.pos + 1
+        depth = 1 if first in "[{" else 0
+        in_string = first == '"'
+        while True:
+            pattern = (
+                STRING_SPECIAL if in_string else STRUCTURAL if depth else SCALAR_END
+            )
+            match = pattern.search(self.buffer, scan)
+            if match is None:
+                scan = len(self.buffer)
+                # read_more may compact the buffer, so keep scan relative to pos
+                offset = scan - self.pos
+                if not self.read_more():
+                    if depth == 0 and not in_string:
+                        return len(self.buffer)
+                    msg = "Unexpected end of JSON document"
+                    raise JsonStreamError(msg)
+                scan = self.pos + offset
+                continue
+
+            character = match.group()
+            scan = match.end()
+            if in_string:
+                if character == "\\":
+                    if scan >= len(self.buffer):
+                        # The escaped character has not arrived yet
+                        offset = scan - 1 - self.pos
+                        if not self.read_more():
+                            msg = "Unexpected end of JSON document"
+                            raise JsonStreamError(msg)
+                        scan = self.pos + offset
+                        continue
+                    scan += 1
+                    continue
+                in_string = False
+                if depth == 0:
+                    return scan
+            elif depth == 0:
+                # The end of a number, true, false or null
+                return scan - 1
+            elif character == '"':
+                in_string = True
+            elif character in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return scan
+
+    def read_value(self, loads=None):
+        end = self.value_end()
+        value = (loads or self.loads)(self.buffer[self.pos : end])
+        self.pos = end
+        return value
+
+    def skip_value(self):
+        self.pos = self.value_end()
+
+
+def _enter_key(stream: _TextStream, key: str) -> bool:
+    """Move the cursor to the value of key in the object at the cursor."""
+    stream.expect("{")
+    if stream.peek() == "}":
+        stream.pos += 1
+        return False
+    while True:
+        name = stream.read_value(json.loads)
+        stream.expect(":")
+        if name == key:
+            return True
+        stream.skip_value()
+        if stream.expect(",", "}") == "}":
+            return False
+
+
+def iter_json_array_items(
+    chunks: Iterable[bytes | str], items_path: str | None = None, loads=json.loads
+) -> Iterator:
+    """
+    Yields the items of the array at items_path, a dotted path of object
+    keys such as "hostnames.items" (None for a document that is itself an
+    array), decoding one item at a time as chunks of the document arrive.
+    Nothing is yielded when the path is missing. Items are decoded with loads.
+    """
+    stream = _TextStream(chunks, loads)
+    for key in items_path.split(".") if items_path else ():
+        if not _enter_key(stream, key):
+            return
+    if stream.peek() == "n":
+        # A null array
+        return
+    stream.expect("[")
+    if stream.peek() == "]":
+        return
+    while True:
+        yield stream.read_value()
+        if stream.expect(",", "]") == "]":
+            return
@@ -0,0 +1,290 @@
+import importlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+VERSION_SEGMENTS = frozenset({"versions", "version"})
+API_VERSION_SEGMENT = re.compile(r"v\d+")
+
+
+def _is_identifier(segment) -> bool:
+    """Ids, numbers and names such as zones or hostnames, but not API versions."""
+    if API_VERSION_SEGMENT.fullmatch(segment):
+        return False
+    return "." in segment or any(character.isdigit() for character in segment)
+
+
+def endpoint_template(path) -> str:
+    """
+    The path with its identifiers replaced, so requests to the same endpoint
+    are counted together: /papi/v1/properties/prp_1/versions/3/rules becomes
+    /papi/v1/properties/{id}/versions/{v}/rules.
+    """
+    segments = urlparse(path).path.split("/")
+    template = []
+    for index, segment in enumerate(segments):
+        if index and segments[index - 1] in VERSION_SEGMENTS and segment.isdigit():
+            segment = "{v}"
+        elif _is_identifier(segment):
+            segment = "{id}"
+        template.append(segment)
+    return "/".join(template)
+
+
+@dataclass(kw_only=True)
+class EndpointStats:
+    requests: int = 0
+    bytes_received: int = 0
+    retries: int = 0
+    throttled: int = 0
+    server_errors: int = 0
+    auth_failures: int = 0
+    connection_errors: int = 0
+    backoff_seconds: float = 0.0
+    latency_seconds: float = 0.0
+    # Requests per LATENCY_BUCKETS bucket, not cumulative
+    latency_buckets: list[int] = field(
+        default_factory=lambda: [0] * len(LATENCY_BUCKETS)
+    )
+
+    def observe_latency(self, seconds):
+        self.latency_seconds += seconds
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.latency_buckets[index] += 1
+                return
+
+    def merge(self, other: "EndpointStats"):
+        for name, value in asdict(other).items():
+            if name == "latency_buckets":
+                self.latency_buckets = [
+                    a + b for a, b in zip(self.latency_buckets, value, strict=True)
+                ]
+            else:
+                setattr(self, name, getattr(self, name) + value)
+
+
+class RequestMetrics:
+    """Request counters and latencies of one client, per method and endpoint template."""
+
+    def __init__(self):
+        self.endpoints: dict[tuple[str, str], EndpointStats] = {}
+        self.lock = threading.Lock()
+
+    def _stats(self, method, path) -> EndpointStats:
+        key = (method, endpoint_template(path))
+        if key not in self.endpoints:
+            self.endpoints[key] = EndpointStats()
+        return self.endpoints[key]
+
+    def record_response(self, method, path, status_code, seconds, bytes_received=0):
+        with self.lock:
+            stats = self._stats(method, path)
+            stats.requests += 1
+            stats.bytes_received += bytes_received
+            stats.observe_latency(seconds)
+            if status_code == 429:
+                stats.throttled += 1
+            elif status_code == 401:
+                stats.auth_failures += 1
+            elif status_code >= 500:
+                stats.server_errors += 1
+
+    def record_connection_error(self, method, path, seconds):
+        with self.lock:
+            stats = self._stats(method, path)
+            stats.requests += 1
+            stats.connection_errors += 1
+            stats.observe_latency(seconds)
+
+    def record_retry(self, method, path, delay):
+        with self.lock:
+            stats = self._stats(method, path)
+            stats.retries += 1
+            stats.backoff_seconds += delay
+
+    def merge(self, other: "RequestMetrics"):
+        with other.lock:
+            endpoints = {
+                key: EndpointStats(**asdict(s)) for key, s in other.endpoints.items()
+            }
+        with self.lock:
+            for key, stats in endpoints.items():
+                if key in self.endpoints:
+                    self.endpoints[key].merge(stats)
+                else:
+                    self.endpoints[key] = stats
+
+    @classmethod
+    def merged(cls, metrics) -> "RequestMetrics":
+        result = cls()
+        for other in metrics:
+            result.merge(other)
+        return result
+
+    def snapshot(self) -> dict[str, dict]:
+        """Stats keyed by "METHOD template", slowest endpoints first."""
+        with self.lock:
+            items = sorted(
+                self.endpoints.items(), key=lambda item: -item[1].latency_seconds
+            )
+            return {
+                f"{method} {template}": asdict(s) for (method, template), s in items
+            }
+
+
+class MetricsSink:
+    """Receives the request metrics of an extractor once it has finished."""
+
+    def emit(self, name, metrics: RequestMetrics):
+        raise NotImplementedError
+
+
+class LoggingSink(MetricsSink):
+    def emit(self, name, metrics):
+        for endpoint, stats in metrics.snapshot().items():
+            logger.info(
+                "%s %s: %s requests in %.1fs, %s bytes, %s retries (%.1fs backoff),"
+                " %s throttled, %s server errors, %s auth failures",
+                name,
+                endpoint,
+                stats["requests"],
+                stats["latency_seconds"],
+                stats["bytes_received"],
+                stats["retries"],
+                stats["backoff_seconds"],
+                stats["throttled"],
+                stats["server_errors"],
+                stats["auth_failures"],
+            )
+
+
+class CallbackSink(MetricsSink):
+    """Calls callback(name, snapshot) for each finished extractor."""
+
+    def __init__(self, callback):
+        if isinstance(callback, str):
+            module, _, attribute = callback.partition(":")
+            callback = getattr(importlib.import_module(module), attribute)
+        self.callback = callback
+
+    def emit(self, name, metrics):
+        self.callback(name, metrics.snapshot())
+
+
+def _write_atomically(path: Path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_text(text)
+    os.replace(temporary, path)
+
+
+_json_report_lock = threading.Lock()
+# Reports written by this process, any older content is from a previous run
+_json_reports_started: set[Path] = set()
+
+
+class JsonReportSink(MetricsSink):
+    """Adds each finished extractor's metrics to a JSON report of the run."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def emit(self, name, metrics):
+        with _json_report_lock:
+            report = {}
+            if self.path in _json_reports_started:
+                report = json.loads(self.path.read_text())
+            _json_reports_started.add(self.path)
+            report[name] = metrics.snapshot()
+            _write_atomically(self.path, json.dumps(report, indent=2))
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class PrometheusTextfileSink(MetricsSink):
+    """
+    Writes akamai_<name>.prom into directory, for the node exporter's
+    textfile collector.
+    """
+
+    PREFIX = "akamai_api"
+    COUNTERS = (
+        ("requests", "requests_total", "Requests sent"),
+        ("bytes_received", "received_bytes_total", "Response bytes received"),
+        ("retries", "retries_total", "Requests retried"),
+        ("throttled", "throttled_total", "429 responses"),
+        ("server_errors", "server_errors_total", "5xx responses"),
+        ("auth_failures", "auth_failures_total", "401 responses"),
+        ("connection_errors", "connection_errors_total", "Failed connections"),
+        ("backoff_seconds", "backoff_seconds_total", "Time spent backing off"),
+    )
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    @staticmethod
+    def _labels(name, endpoint, **extra):
+        method, _, template = endpoint.partition(" ")
+        labels = {"extractor": name, "method": method, "endpoint": template, **extra}
+        return ",".join(
+            f'{key}="{_escape_label(value)}"' for key, value in labels.items()
+        )
+
+    def emit(self, name, metrics):
+        snapshot = metrics.snapshot()
+        lines = []
+        for field_name, metric, description in self.COUNTERS:
+            lines.append(f"# HELP {self.PREFIX}_{metric} {description}")
+            lines.append(f"# TYPE {self.PREFIX}_{metric} counter")
+            for endpoint, stats in snapshot.items():
+                labels = self._labels(name, endpoint)
+                lines.append(f"{self.PREFIX}_{metric}{{{labels}}} {stats[field_name]}")
+
+        metric = f"{self.PREFIX}_request_duration_seconds"
+        lines.append(f"# HELP {metric} Request latency")
+        lines.append(f"# TYPE {metric} histogram")
+        for endpoint, stats in snapshot.items():
+            cumulative = 0
+            for bound, count in zip(
+                LATENCY_BUCKETS, stats["latency_buckets"], strict=True
+            ):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else str(bound)
+                labels = self._labels(name, endpoint, le=le)
+                lines.append(f"{metric}_bucket{{{labels}}} {cumulative}")
+            labels = self._labels(name, endpoint)
+            lines.append(f"{metric}_sum{{{labels}}} {stats['latency_seconds']}")
+            lines.append(f"{metric}_count{{{labels}}} {cumulative}")
+
+        path = self.directory / f"akamai_{name.lower()}.prom"
+        _write_atomically(path, "\n".join(lines) + "\n")
+
+
+def metrics_sinks_from_config(config) -> list[MetricsSink]:
+    """
+    Sinks for the metrics argument of a client: a dict with any of
+    prometheus_textfile_dir, json_report and callback ("module:function").
+    Metrics are always logged.
+    """
+    sinks = [LoggingSink()]
+    config = config or {}
+    if config.get("prometheus_textfile_dir"):
+        sinks.append(PrometheusTextfileSink(config["prometheus_textfile_dir"]))
+    if config.get("json_report"):
+        sinks.append(JsonReportSink(config["json_report"]))
+    if config.get("callback"):
+        sinks.append(CallbackSink(config["callback"]))
+    return sinks
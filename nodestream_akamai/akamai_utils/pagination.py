@@ -0,0 +1,198 @@
+import asyncio
+import inspect
+import itertools
+import logging
+from typing import Any, AsyncIterator, Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+def _dig(response, key):
+    """Look up a dotted key such as "hostnames.items", None means the response itself."""
+    if key is None:
+        return response
+    value = response
+    for part in key.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class Paginator:
+    """
+    Describes how a list endpoint pages its results. A request is a
+    (path, params) pair; next_request turns the request that was just made
+    and its response into the next one, or None once the listing is done.
+    """
+
+    items_key: str | None = None
+
+    def first_request(self, path, params) -> tuple[str, dict]:
+        return path, dict(params or {})
+
+    def items(self, response) -> list:
+        return _dig(response, self.items_key) or []
+
+    def next_request(self, request, response, items) -> tuple[str, dict] | None:
+        raise NotImplementedError
+
+
+class OffsetPaginator(Paginator):
+    """offset (and optionally limit) parameters, done after a short page."""
+
+    def __init__(
+        self, page_size, items_key=None, offset_param="offset", limit_param=None
+    ):
+        self.page_size = page_size
+        self.items_key = items_key
+        self.offset_param = offset_param
+        self.limit_param = limit_param
+
+    def first_request(self, path, params):
+        params = dict(params or {})
+        params.setdefault(self.offset_param, 0)
+        if self.limit_param is not None:
+            params.setdefault(self.limit_param, self.page_size)
+        return path, params
+
+    def next_request(self, request, response, items):  # noqa: ARG002
+        if len(items) < self.page_size:
+            return None
+        path, params = request
+        return path, {
+            **params,
+            self.offset_param: params[self.offset_param] + len(items),
+        }
+
+
+class PagePaginator(Paginator):
+    """
+    page and size parameters, done on the last page reported by
+    total_pages_key or, without one, after a short page.
+    """
+
+    def __init__(
+        self,
+        page_size,
+        items_key=None,
+        page_param="page",
+        size_param="size",
+        first_page=0,
+        total_pages_key=None,
+    ):
+        self.page_size = page_size
+        self.items_key = items_key
+        self.page_param = page_param
+        self.size_param = size_param
+        self.first_page = first_page
+        self.total_pages_key = total_pages_key
+
+    def first_request(self, path, params):
+        params = dict(params or {})
+        params.setdefault(self.page_param, self.first_page)
+        params.setdefault(self.size_param, self.page_size)
+        return path, params
+
+    def next_request(self, request, response, items):
+        path, params = request
+        page = params[self.page_param]
+        total_pages = _dig(response, self.total_pages_key)
+        if total_pages is not None:
+            if page + 1 - self.first_page >= total_pages:
+                return None
+        elif len(items) < self.page_size:
+            return None
+        return path, {**params, self.page_param: page + 1}
+
+
+class NextLinkPaginator(Paginator):
+    """Follows a link to the next page until the response stops giving one."""
+
+    def __init__(self, items_key=None, next_link_key="nextLink"):
+        self.items_key = items_key
+        self.next_link_key = next_link_key
+
+    def next_request(self, request, response, items):  # noqa: ARG002
+        next_link = _dig(response, self.next_link_key)
+        if not next_link:
+            return None
+        # The link carries its own query string
+        return next_link, {}
+
+
+class CursorPaginator(Paginator):
+    """Passes the cursor from each response as a parameter of the next request."""
+
+    def __init__(self, cursor_param, cursor_key, items_key=None):
+        self.cursor_param = cursor_param
+        self.cursor_key = cursor_key
+        self.items_key = items_key
+
+    def next_request(self, request, response, items):
+        cursor = _dig(response, self.cursor_key)
+        if not cursor or not items:
+            return None
+        path, params = request
+        return path, {**params, self.cursor_param: cursor}
+
+
+Fetch = Callable[..., Any]
+
+
+def iter_pages(
+    fetch: Fetch, path, paginator: Paginator, params=None, response=None
+) -> Iterator[list]:
+    """
+    Yields each page of items. fetch(path, params=...) makes a request and
+    returns its decoded body; response is the body of the first request when
+    the caller has already made it.
+    """
+    request = paginator.first_request(path, params)
+    while request is not None:
+        if response is None:
+            response = fetch(request[0], params=request[1])
+        items = paginator.items(response)
+        yield items
+        request = paginator.next_request(request, response, items)
+        response = None
+
+
+def paginate(fetch: Fetch, path, paginator: Paginator, params=None) -> Iterator:
+    """Yields every item across all pages."""
+    return itertools.chain.from_iterable(iter_pages(fetch, path, paginator, params))
+
+
+async def apaginate(
+    fetch: Fetch, path, paginator: Paginator, params=None, *, prefetch=True
+) -> AsyncIterator:
+    """
+    Yields every item across all pages. fetch may be a coroutine function or
+    a blocking one, which then runs in a thread. With prefetch the next page
+    is requested as soon as the current one arrives, while its items are
+    being consumed.
+    """
+
+    async def fetch_page(request):
+        if inspect.iscoroutinefunction(fetch):
+            return await fetch(request[0], params=request[1])
+        return await asyncio.to_thread(fetch, request[0], params=request[1])
+
+    request = paginator.first_request(path, params)
+    pending = asyncio.ensure_future(fetch_page(request))
+    try:
+        while pending is not None:
+            response = await pending
+            pending = None
+            items = paginator.items(response)
+            next_request = paginator.next_request(request, response, items)
+            if next_request is not None and prefetch:
+                pending = asyncio.ensure_future(fetch_page(next_request))
+            for item in items:
+                yield item
+            if next_request is not None and not prefetch:
+                pending = asyncio.ensure_future(fetch_page(next_request))
+            request = next_request
+    finally:
+        if pending is not None:
+            pending.cancel()
@@ -1,47 +1,35 @@
+import functools
 import itertools
 import logging
-import re
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, List, Tuple
 
 from jsonpath_ng.ext import parse
 
 from .client import AkamaiApiClient
 from .model import EdgeHost, Origin, PropertyDescription
-
-PATH_AND = " AND "
+from .pagination import NextLinkPaginator, iter_pages
+from .rule_tree_cache import DEFAULT_MAX_BYTES, RuleTreeCache
+from .rule_tree_visitor import (
+    CLOUDLET_TYPES,
+    CloudletCollector,
+    CpCodeCollector,
+    EdgeWorkerCollector,
+    ImageManagerCollector,
+    LegacyEdgeRedirectorCollector,
+    OriginCollector,
+    RuleTreeVisitor,
+    SiteShieldCollector,
+    _get_policy_set_prefix,
+)
+from .schemas import AccountHostnamesPage
+from .tracing import span, traced
 
 logger = logging.getLogger(__name__)
 
 
-CLOUDLET_TYPES = [
-    "applicationLoadBalancer",
-    "apiPrioritization",
-    "audienceSegmentation",
-    "phasedRelease",
-    "edgeRedirector",
-    "forwardRewrite",
-    "requestControl",
-    "visitorPrioritization",
-    "virtualWaitingRoom",
-]
-
-# Define criteria to look at
-MATCH_TYPES = ["path", "hostname", "cloudletsOrigin"]
-
-# Define negative criterion matches
-NEGATIVE_OPERATORS = ["DOES_NOT_MATCH_ONE_OF", "IS_NOT_ONE_OF"]
-
-
-def _get_policy_set_prefix(options):
-    if "policyTokenDefault" in options:
-        policy_set_prefix = options["policyTokenDefault"] + "-"
-    elif "policyToken" in options:
-        policy_set_prefix = options["policyToken"] + "-"
-    else:
-        policy_set_prefix = ""
-    return policy_set_prefix
-
-
 def _extract_origin(behavior):
     if behavior.get("name") == "origin":
         origin_options = behavior["options"]
@@ -59,27 +47,63 @@ def _extract_origin(behavior):
     return None
 
 
-def _flatten_origins(origin):
-    flattened = list(
-        itertools.chain(
-            (
-                Origin(name=origin["name"], path=path)
-                for path in origin.get("paths", [])
-            ),
-            (
-                Origin(name=origin["name"], hostname=hostname)
-                for hostname in origin.get("hostnames", [])
-            ),
-            (
-                Origin(name=origin["name"], conditional_origin=conditional_origin)
-                for conditional_origin in origin.get("conditional_origins", [])
-            ),
+# Property fields describe_property_by_dict needs besides versions and hostnames
+BULK_PROPERTY_FIELDS = (
+    "propertyId",
+    "propertyName",
+    "contractId",
+    "groupId",
+    "assetId",
+)
+
+HOSTNAMES_PAGE_SIZE = 999
+
+HOSTNAMES_PAGINATOR = NextLinkPaginator(
+    items_key="hostnames.items", next_link_key="hostnames.nextLink"
+)
+
+BULK_SEARCH_PATH = "/papi/v1/bulk/rules-search-requests"
+BULK_SEARCH_COMPLETE = "COMPLETE"
+
+
+def _property_key(property_id) -> str:
+    return str(property_id).removeprefix("prp_")
+
+
+def _active_versions_from_bulk_search(results) -> dict[str, dict]:
+    """
+    Collapse bulk search results, one per matched property version, into a
+    property dict per property holding its active production and staging
+    versions.
+    """
+    properties = {}
+    for result in results:
+        prop = properties.setdefault(
+            _property_key(result["propertyId"]),
+            {"productionVersion": None, "stagingVersion": None},
+        )
+        prop.update(
+            (field, result[field]) for field in BULK_PROPERTY_FIELDS if field in result
         )
+        if result.get("productionStatus") == "ACTIVE":
+            prop["productionVersion"] = result["propertyVersion"]
+        if result.get("stagingStatus") == "ACTIVE":
+            prop["stagingVersion"] = result["propertyVersion"]
+    return properties
+
+
+def _hostnames_page_path(network, offset) -> str:
+    return (
+        f"/papi/v1/hostnames?network={network}"
+        f"&offset={offset}&limit={HOSTNAMES_PAGE_SIZE}"
     )
-    if flattened:
-        return flattened
 
-    return [Origin(name=origin["name"])]
+
+def _group_hostnames_by_property(hostnames) -> dict[str, list[dict]]:
+    hostnames_by_property = defaultdict(list)
+    for hostname in hostnames:
+        hostnames_by_property[hostname["propertyId"]].append(hostname)
+    return hostnames_by_property
 
 
 class AkamaiPropertyClient(AkamaiApiClient):
@@ -90,6 +114,10 @@ class AkamaiPropertyClient(AkamaiApiClient):
         client_secret,
         access_token,
         account_key=None,
+        rule_tree_cache_path=None,
+        rule_tree_cache_max_bytes=DEFAULT_MAX_BYTES,
+        hostname_prefetch=4,
+        **kwargs,
     ):
         super().__init__(
             base_url,
@@ -97,8 +125,16 @@ class AkamaiPropertyClient(AkamaiApiClient):
             client_secret,
             access_token,
             account_key,
+            **kwargs,
         )
         self.logger = logging.getLogger(self.__class__.__name__)
+        # Number of hostname listing pages fetched at once
+        self.hostname_prefetch = hostname_prefetch
+        self.rule_tree_cache = None
+        if rule_tree_cache_path is not None:
+            self.rule_tree_cache = RuleTreeCache(
+                rule_tree_cache_path, max_bytes=rule_tree_cache_max_bytes
+            )
 
     @property
     def headers(self):
@@ -136,18 +172,36 @@ class AkamaiPropertyClient(AkamaiApiClient):
         return [prop["propertyId"] for prop in response_json["properties"]["items"]]
 
     def get_rule_tree(
-        self, property_id: str, version: int, contract_id=None, group_id=None
+        self,
+        property_id: str,
+        version: int,
+        contract_id=None,
+        group_id=None,
+        rule_format=None,
     ):
+        # Property versions are immutable, so a cached tree is always current
+        if self.rule_tree_cache is not None:
+            rule_tree = self.rule_tree_cache.get(property_id, version, rule_format)
+            if rule_tree is not None:
+                return rule_tree
+
         rule_tree_api_path = (
             f"/papi/v1/properties/{property_id}/versions/{version}/rules"
         )
         params = {}
         if contract_id is not None and group_id is not None:
             params = {"contractId": contract_id, "groupId": group_id}
-        return self._get_api_from_relative_path(
-            rule_tree_api_path, params=params, headers=self.headers
+        headers = self.headers
+        if rule_format is not None:
+            headers["Accept"] = f"application/vnd.akamai.papirules.{rule_format}+json"
+        rule_tree = self._get_api_from_relative_path(
+            rule_tree_api_path, params=params, headers=headers
         )
 
+        if self.rule_tree_cache is not None:
+            self.rule_tree_cache.put(property_id, version, rule_tree, rule_format)
+        return rule_tree
+
     def get_property(self, property_id: str, contract_id=None, group_id=None):
         property_path = f"/papi/v1/properties/{property_id}"
         params = {}
@@ -219,40 +273,28 @@ class AkamaiPropertyClient(AkamaiApiClient):
             group_id=prop["groupId"],
         )
         rule_tree["assetId"] = prop["assetId"]
-
-        # Update origins
-        origins = self.collate_origins_with_criteria(rule_tree["rules"])
         hostnames = [EdgeHost(name=h["cnameFrom"]) for h in prop["hostnames"]]
 
-        # Cloudlets
-        cloudlet_policies = self.search_akamai_rule_tree_for_cloudlets(
-            rule_tree=rule_tree["rules"]
-        )
-
-        # Specific data for Edge Redirector, flter for legacy only
-        edge_redirector_policies = self.search_akamai_rule_tree_for_cloudlet(
-            rule_tree=rule_tree["rules"], behavior_name="edgeRedirector", shared=False
-        )
-
-        # IVM
-        image_manager_policysets = self.search_akamai_rule_tree_for_ivm(
-            rule_tree=rule_tree
-        )
-
-        # EdgeWorkers
-        edgeworker_ids = self.search_akamai_rule_tree_for_edge_workers(
-            rule_tree=rule_tree["rules"]
-        )
-
-        # Siteshield
-        siteshield_maps = self.search_akamai_rule_tree_for_siteshield(
-            rule_tree=rule_tree["rules"]
-        )
-
-        # Siteshield
-        cp_codes = self.search_akamai_rule_tree_for_cp_codes(
-            rule_tree=rule_tree["rules"]
-        )
+        # Walk the rule tree once, handing each behavior to the collectors
+        # that need it rather than searching the tree again for each one
+        origins = OriginCollector()
+        cloudlets = CloudletCollector()
+        # Specific data for Edge Redirector, filter for legacy only
+        edge_redirectors = LegacyEdgeRedirectorCollector()
+        image_managers = ImageManagerCollector(asset_id=prop["assetId"])
+        edgeworkers = EdgeWorkerCollector()
+        siteshields = SiteShieldCollector()
+        cp_codes = CpCodeCollector()
+        with span("property.walk_rule_tree", property_id=prop["propertyId"]):
+            RuleTreeVisitor(
+                origins,
+                cloudlets,
+                edge_redirectors,
+                image_managers,
+                edgeworkers,
+                siteshields,
+                cp_codes,
+            ).visit(rule_tree["rules"])
 
         # Deeplink
         deeplink_prefix = (
@@ -270,15 +312,15 @@ class AkamaiPropertyClient(AkamaiApiClient):
             name=prop["propertyName"],
             version=version,
             rule_format=rule_tree["ruleFormat"],
-            origins=origins,
-            cloudlet_policies=cloudlet_policies,
-            edge_redirector_policies=edge_redirector_policies,
-            image_manager_policysets=image_manager_policysets,
-            edgeworker_ids=edgeworker_ids,
-            siteshield_maps=siteshield_maps,
+            origins=origins.result(),
+            cloudlet_policies=cloudlets.result(),
+            edge_redirector_policies=edge_redirectors.result(),
+            image_manager_policysets=image_managers.result(),
+            edgeworker_ids=edgeworkers.result(),
+            siteshield_maps=siteshields.result(),
             hostnames=hostnames,
             deeplink=deeplink,
-            cp_codes=cp_codes,
+            cp_codes=cp_codes.result(),
         )
 
     def search_all_properties(self):
@@ -287,30 +329,127 @@ class AkamaiPropertyClient(AkamaiApiClient):
         request_body = {"bulkSearchQuery": {"syntax": "JSONPATH", "match": query}}
         return self._post_api_from_relative_path(path=search_path, body=request_body)
 
+    def submit_bulk_search(self, match, qualifiers=None) -> str:
+        """Submits an asynchronous bulk rule search and returns its status link."""
+        query = {"syntax": "JSONPATH", "match": match}
+        if qualifiers:
+            query["bulkSearchQualifiers"] = qualifiers
+        response = self._post_api_from_relative_path(
+            path=BULK_SEARCH_PATH,
+            body={"bulkSearchQuery": query},
+            headers=self.headers,
+        )
+        return response["bulkSearchLink"]
+
+    def bulk_search(self, match, qualifiers=None, poll_interval=5, timeout=1800):
+        """
+        Runs a bulk rule search over the latest and active version of every
+        property and waits for it to complete, returning its results.
+        """
+        bulk_search_link = self.submit_bulk_search(match, qualifiers)
+        deadline = time.monotonic() + timeout
+        while True:
+            # The status changes between polls, so it must not be cached
+            response = self._get_api_from_relative_path(
+                bulk_search_link, headers=self.headers, cache=False
+            )
+            status = response.get("searchSubmitStatus")
+            if status == BULK_SEARCH_COMPLETE:
+                return response.get("results", [])
+            if time.monotonic() + poll_interval > deadline:
+                msg = f"Bulk search {bulk_search_link} still {status} after {timeout}s"
+                raise TimeoutError(msg)
+            self.logger.debug("Bulk search %s is %s", bulk_search_link, status)
+            time.sleep(poll_interval)
+
+    def iter_account_hostname_pages(self, network="PRODUCTION"):
+        """
+        Yields the account's hostnames a page at a time. Once the first page
+        reports totalItems, the remaining pages are fetched concurrently by up
+        to hostname_prefetch threads and yielded in order as they arrive.
+        """
+        first_page_path = _hostnames_page_path(network, 0)
+        fetch = functools.partial(
+            self._get_api_from_relative_path, schema=AccountHostnamesPage
+        )
+        result = fetch(first_page_path)
+        total_items = result["hostnames"].get("totalItems")
+        if total_items is None or self.hostname_prefetch <= 1:
+            yield from iter_pages(
+                fetch,
+                first_page_path,
+                HOSTNAMES_PAGINATOR,
+                response=result,
+            )
+            return
+        yield result["hostnames"]["items"]
+
+        def fetch_page(offset):
+            return list(
+                self._get_items_from_relative_path(
+                    _hostnames_page_path(network, offset),
+                    "hostnames.items",
+                    schema=AccountHostnamesPage,
+                )
+            )
+
+        offsets = range(HOSTNAMES_PAGE_SIZE, total_items, HOSTNAMES_PAGE_SIZE)
+        pool = ThreadPoolExecutor(max_workers=self.hostname_prefetch)
+        try:
+            yield from pool.map(fetch_page, offsets)
+        finally:
+            pool.shutdown(cancel_futures=True)
+
     def list_account_hostnames(self, network="PRODUCTION"):
-        list_hostnames_path = f"/papi/v1/hostnames?network={network}&offset=0&limit=999"
-        result = self._get_api_from_relative_path(path=list_hostnames_path)
-        hostnames = result["hostnames"]["items"]
-        while "nextLink" in result["hostnames"]:
-            next_link = result["hostnames"]["nextLink"]
-            result = self._get_api_from_relative_path(path=next_link)
-            hostnames.extend(result["hostnames"]["items"])
+        return list(
+            itertools.chain.from_iterable(self.iter_account_hostname_pages(network))
+        )
 
-        return hostnames
+    def list_all_properties(self, *, bulk_search=False):
+        """
+        Lists the account's hostnames and returns a lazy iterator over the
+        properties they belong to, each with its hostnames attached. Properties
+        that fail to load are logged and skipped.
 
-    def list_all_properties(self):
+        With bulk_search, a single bulk rule search supplies the active
+        versions of every property, and get_property is only called for
+        properties the search did not fully describe.
+        """
         try:
             hostnames = self.list_account_hostnames()
         except Exception as err:
             logger.exception("Failed to list property hostnames: %s", err)
-            return None
+            raise err
+
+        bulk_properties = {}
+        if bulk_search:
+            try:
+                # The root rule's name matches exactly once in every rule tree
+                bulk_properties = _active_versions_from_bulk_search(
+                    self.bulk_search("$.name")
+                )
+            except Exception as err:
+                logger.exception("Failed to bulk search properties: %s", err)
+                raise err
 
-        property_ids = {h["propertyId"] for h in hostnames}
-        # DeDupe list
-        return [
-            self._get_property_response(property_id, hostnames)
-            for property_id in property_ids
-        ]
+        return self._iter_property_responses(
+            _group_hostnames_by_property(hostnames), bulk_properties
+        )
+
+    def _iter_property_responses(self, hostnames_by_property, bulk_properties=None):
+        bulk_properties = bulk_properties or {}
+        for property_id, property_hostnames in hostnames_by_property.items():
+            prop = bulk_properties.get(_property_key(property_id))
+            if prop is not None and all(
+                field in prop for field in BULK_PROPERTY_FIELDS
+            ):
+                yield {**prop, "hostnames": property_hostnames}
+                continue
+            property_response = self._get_property_response(
+                property_id, property_hostnames
+            )
+            if property_response is not None:
+                yield property_response
 
     def search_akamai_rule_tree_for_origins(self, rule_tree) -> set[Origin]:
         behaviors = rule_tree.get("behaviors", [])
@@ -330,155 +469,17 @@ class AkamaiPropertyClient(AkamaiApiClient):
 
         return set(origins)
 
+    @traced("property.collate_origins_with_criteria")
     def collate_origins_with_criteria(self, rules) -> list[Origin]:
         """
         This function will find all Origin behaviours in a property and collate any relevant criteria
         into accompanying Lists.
         """
-        jsonpath_expression = parse('$..behaviors[?(@.name=="origin")]')
-        jsonpath_result = jsonpath_expression.find(rules)
-        # Parse matched jsonpath behaviours
-        origins = [
-            self._jsonpath_fetch_origins(jsonpath_path, rules)
-            for jsonpath_path in jsonpath_result
-        ]
-
-        # Expand to one origin hostname/path combo per object to simplify the pipeline config and avoid
-        # nested looping
-        return list(
-            itertools.chain.from_iterable(
-                _flatten_origins(origin) for origin in origins
-            )
-        )
-
-    def _jsonpath_fetch_origins(self, jsonpath_path, rules):
-        origin_host, location_elements = self.parse_origin_search(jsonpath_path, rules)
-        parent_location = ""
-        combined_rule_paths = []
-        combined_rule_hosts = []
-        combined_rule_cdids = []
-        for location in location_elements:
-            location_results = self.parse_origin_location(
-                location, parent_location, rules
-            )
-            if len(location_results.get("path", [])) > 0:
-                combined_rule_paths.append(location_results["path"])
-            if len(location_results.get("hostname", [])) > 0:
-                combined_rule_hosts.append(location_results["hostname"])
-            if len(location_results.get("cloudletsOrigin", [])) > 0:
-                combined_rule_cdids.append(location_results["cloudletsOrigin"])
-            parent_location = location
-        # Combine results into single list with boolean AND between parent and child
-        output = {"name": origin_host}
-
-        if combined_rule_paths:
-            output["paths"] = [
-                PATH_AND.join(path_product)
-                for path_product in itertools.product(*combined_rule_paths)
-            ]
-        if combined_rule_hosts:
-            output["hostnames"] = [
-                PATH_AND.join(host_product)
-                for host_product in itertools.product(*combined_rule_hosts)
-            ]
-
-        if combined_rule_cdids:
-            output["conditional_origins"] = [
-                PATH_AND.join(cdid_product)
-                for cdid_product in itertools.product(*combined_rule_cdids)
-            ]
-
-        return output
-
-    def parse_origin_search(self, path, rules):
-        """
-        This function parses jsonpath origin search results into a hostname
-        and location elements List
-        """
-        self.logger.debug("parse_origin_search")
-        origin_location = str(path.full_path)
-        rule_base = re.sub(r"behaviors.\[\d+]", "", origin_location)
-        origin_host = "ERROR"  # Host should be renamed
-
-        # Extract origin behaviour itself and append hostname to list based on origin type
-        origin_behavior_match = parse(origin_location)
-        origin_search = origin_behavior_match.find(rules)
-        origin_behavior = origin_search[0].value
-        if "hostname" in origin_behavior["options"]:
-            origin_host = origin_behavior["options"]["hostname"]
-        elif "netStorage" in origin_behavior["options"]:
-            origin_host = origin_behavior["options"]["netStorage"]["downloadDomainName"]
-        elif "mslorigin" in origin_behavior["options"]:
-            origin_host = origin_behavior["options"]["mslorigin"]
-
-        # Split JSONPATH into children[X] elements so we can iterate down the path
-        location_elements = re.findall(r"children\.\[\d+]", rule_base)
-        return origin_host, location_elements
-
-    def parse_origin_location(self, rule_location_input, parent_location, rules):
-        """
-        This function parses origin locations to extract path matches, hostname matches
-        and Conditional Origin IDs
-        """
-        self.logger.debug(
-            "parse_origin_location(rule_location=%s, parent_location=%s)",
-            rule_location_input,
-            parent_location,
-        )
-        # Construct rule location from element and optionally parent path
-        if parent_location != "":
-            rule_location = parent_location + "." + rule_location_input
-        else:
-            rule_location = rule_location_input
-
-        rule_match = parse(rule_location)
-        rule_search = rule_match.find(rules)
-
-        if rule_search is None or len(rule_search) == 0:
-            self.logger.warning("No rule found at position '%s'", rule_location)
-            return {}
-
-        # Extract rule by JSONPATH
-        rule = rule_search[0].value
-
-        # Instantiate results
-        criteria_results = {}
-        rule_results = {k: [] for k in MATCH_TYPES}
-
-        for match_type in MATCH_TYPES:
-            criteria_results[match_type] = []
-            criterion_results = {k: [] for k in MATCH_TYPES}
-
-            # Parse criteria and create list of lists of path matches
-            for rule_criterion in rule["criteria"]:
-                criterion_results[match_type] = []
-
-                if rule_criterion["name"] == match_type:
-                    rc_options = rule_criterion["options"]
-                    for value in rc_options.get("values", []):
-                        if rc_options.get("matchOperator") in NEGATIVE_OPERATORS:
-                            value = "!" + value
-                        criterion_results[match_type].append(value)
-                    if "originId" in rc_options:
-                        criterion_results[match_type].append(rc_options["originId"])
-
-                if len(criterion_results[match_type]) > 0:
-                    criteria_results[match_type].append(criterion_results[match_type])
-
-            if len(criteria_results[match_type]) > 0:
-                # Collate path matches into a list of combinations, based on criteria setting
-                if len(criteria_results[match_type]) == 1:
-                    rule_results[match_type] = criteria_results[match_type][0]
-                else:
-                    if rule["criteriaMustSatisfy"] == "all":
-                        # If using ALL option we must create boolean combos
-                        rule_product = itertools.product(*criteria_results[match_type])
-                        for product in rule_product:
-                            rule_results[match_type].append(" AND ".join(product))
-                    else:
-                        for result in criteria_results[match_type]:
-                            rule_results[match_type].extend(result)
-        return rule_results
+        # Accept the whole rule tree response as well as its rules
+        rules = rules.get("rules", rules)
+        origins = OriginCollector()
+        RuleTreeVisitor(origins).visit(rules)
+        return origins.result()
 
     def search_akamai_rule_tree_for_behavior(self, rule_tree, behavior_name):
         self.logger.debug(
@@ -583,9 +584,7 @@ class AkamaiPropertyClient(AkamaiApiClient):
 
         return list(set(cpcode_ids))
 
-    def _get_property_response(self, property_id, hostnames):
-        property_hostnames = [h for h in hostnames if h["propertyId"] == property_id]
-
+    def _get_property_response(self, property_id, property_hostnames):
         contract_id = property_hostnames[0]["contractId"]
         group_id = property_hostnames[0]["groupId"]
 
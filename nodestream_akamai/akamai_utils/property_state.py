@@ -0,0 +1,135 @@
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+
+from .sqlite_store import SqliteStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_FILE_NAME = "property_state.sqlite3"
+
+PRODUCTION = "PRODUCTION"
+STAGING = "STAGING"
+
+# What to do with a property whose versions have not changed since the last run
+INCREMENTAL_MODES = ("emit", "skip")
+
+# Bump whenever the records described from a property change, so the records
+# stored by an older release are described again rather than reused
+STATE_VERSION = 2
+# The fields of a listed property, besides its versions, a record is built from
+LISTING_FIELDS = ("propertyName", "contractId", "groupId", "assetId")
+
+
+def listing_hash(prop) -> str:
+    listing = {field: prop.get(field) for field in LISTING_FIELDS}
+    listing["hostnames"] = sorted(
+        hostname["cnameFrom"] for hostname in prop.get("hostnames", [])
+    )
+    body = json.dumps(listing, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+@dataclass(kw_only=True)
+class PropertyState:
+    property_id: str
+    network: str
+    production_version: int | None
+    staging_version: int | None
+    listing_hash: str
+    record: dict
+
+    @property
+    def version(self):
+        if self.network == STAGING:
+            return self.staging_version
+        return self.production_version
+
+
+class PropertyStateStore(SqliteStore):
+    """
+    Remembers, per property and network, the versions, hostnames, group and
+    asset a record was last built from, so a run can skip properties that
+    have not changed. State written under another STATE_VERSION is dropped
+    when the store is opened.
+    """
+
+    DEFAULT_FILE_NAME = DEFAULT_STATE_FILE_NAME
+    TABLE = "property_state"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS property_state (
+            property_id TEXT NOT NULL,
+            network TEXT NOT NULL,
+            production_version INTEGER,
+            staging_version INTEGER,
+            listing_hash TEXT NOT NULL,
+            record TEXT NOT NULL,
+            updated REAL NOT NULL,
+            PRIMARY KEY (property_id, network)
+        )
+    """
+    SCHEMA_VERSION = STATE_VERSION
+
+    def get(self, property_id, network) -> PropertyState | None:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT production_version, staging_version, listing_hash,"
+                " record FROM property_state"
+                " WHERE property_id = ? AND network = ?",
+                (property_id, network),
+            ).fetchone()
+        if row is None:
+            return None
+        production_version, staging_version, prop_hash, record = row
+        return PropertyState(
+            property_id=property_id,
+            network=network,
+            production_version=production_version,
+            staging_version=staging_version,
+            listing_hash=prop_hash,
+            record=json.loads(record),
+        )
+
+    def unchanged(self, prop, network) -> PropertyState | None:
+        """
+        The stored state for prop if its version on network and its listing
+        match what the stored record was built from, otherwise None.
+        """
+        state = self.get(prop["propertyId"], network)
+        if state is None:
+            return None
+        version_key = "stagingVersion" if network == STAGING else "productionVersion"
+        if state.version != prop.get(version_key):
+            return None
+        if state.listing_hash != listing_hash(prop):
+            return None
+        return state
+
+    def save(self, prop, network, record) -> PropertyState:
+        state = PropertyState(
+            property_id=prop["propertyId"],
+            network=network,
+            production_version=prop.get("productionVersion"),
+            staging_version=prop.get("stagingVersion"),
+            listing_hash=listing_hash(prop),
+            record=record,
+        )
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO property_state"
+                " (property_id, network, production_version, staging_version,"
+                " listing_hash, record, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    state.property_id,
+                    state.network,
+                    state.production_version,
+                    state.staging_version,
+                    state.listing_hash,
+                    json.dumps(record, default=str),
+                    time.time(),
+                ),
+            )
+        return state
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_REMAINING_HEADERS = ("Akamai-RateLimit-Remaining", "X-RateLimit-Remaining")
+RATE_LIMIT_NEXT_HEADERS = ("Akamai-RateLimit-Next", "X-RateLimit-Next")
+
+
+def api_family(path: str) -> str:
+    """Name of the Akamai API a request path belongs to, e.g. 'papi'."""
+    return urlparse(path).path.lstrip("/").split("/", 1)[0]
+
+
+def _seconds_until(value: str) -> float | None:
+    """Parse a delay header holding either seconds or an HTTP/ISO date."""
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            moment = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    return max(0.0, moment.timestamp() - time.time())
+
+
+def retry_after_from_headers(headers) -> float | None:
+    """
+    Work out how long the server asked us to wait, from Retry-After or the
+    Akamai rate limit headers. Returns None when the server gave no hint.
+    """
+    if headers is None:
+        return None
+    if headers.get("Retry-After"):
+        return _seconds_until(headers["Retry-After"])
+    for remaining_header, next_header in zip(
+        RATE_LIMIT_REMAINING_HEADERS, RATE_LIMIT_NEXT_HEADERS, strict=True
+    ):
+        remaining = headers.get(remaining_header)
+        if remaining is not None and remaining.strip() == "0":
+            next_token = headers.get(next_header)
+            return _seconds_until(next_token) if next_token else None
+    return None
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket shared by every client talking to the same API with the
+    same credentials. The refill rate is lowered multiplicatively on 429
+    responses and raised additively on successes, so callers settle around
+    the highest rate the API accepts.
+    """
+
+    def __init__(
+        self,
+        rate=10.0,
+        burst=10,
+        min_rate=0.5,
+        max_rate=50.0,
+        decrease_factor=0.5,
+        increase_step=0.1,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self, headers=None):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+        # A successful response can still tell us the bucket is empty
+        self._block_for(retry_after_from_headers(headers))
+
+    def on_throttle(self, retry_after=None):
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.tokens = min(self.tokens, 0.0)
+            logger.debug("Throttled, lowering request rate to %.2f/s", self.rate)
+        self._block_for(retry_after)
+
+    def _block_for(self, seconds):
+        if not seconds:
+            return
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+_rate_limiters: dict[tuple, AdaptiveRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(host, client_token, account_key, family) -> AdaptiveRateLimiter:
+    """Process wide limiter for the given credential and API family."""
+    key = (host, client_token, account_key, family)
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            _rate_limiters[key] = AdaptiveRateLimiter()
+        return _rate_limiters[key]
+
+
+def reset_rate_limiters():
+    with _rate_limiters_lock:
+        _rate_limiters.clear()
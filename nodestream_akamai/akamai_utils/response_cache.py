@@ -0,0 +1,136 @@
+import copy
+import fnmatch
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 300.0
+MISSING = object()
+
+
+@dataclass(kw_only=True)
+class ResponseCacheConfig:
+    """
+    How long GET responses are cached. ttls maps path patterns, such as
+    "/appsec/v1/configs" or "/papi/v1/hostnames*", to a TTL in seconds; the
+    first matching pattern wins and a TTL of 0 disables caching for it.
+    max_bytes bounds the total size of the cached response bodies.
+    """
+
+    max_entries: int = DEFAULT_MAX_ENTRIES
+    max_bytes: int = DEFAULT_MAX_BYTES
+    default_ttl: float = DEFAULT_TTL_SECONDS
+    ttls: dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_config(cls, config) -> "ResponseCacheConfig | None":
+        if config is None or config is False:
+            return None
+        if config is True:
+            return cls()
+        if isinstance(config, ResponseCacheConfig):
+            return config
+        return cls(**config)
+
+    def ttl_for(self, path) -> float:
+        path = urlparse(path).path
+        for pattern, ttl in self.ttls.items():
+            if fnmatch.fnmatchcase(path, pattern):
+                return ttl
+        return self.default_ttl
+
+
+class ResponseCache:
+    """
+    Bounded in-memory cache of decoded responses, evicting the least
+    recently used entries once more than max_entries are held or their
+    response bodies add up to more than max_bytes. Values are copied in
+    and out so callers are free to mutate what they get back.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (expiry, value, size of the response body)
+        self.entries: OrderedDict[str, tuple[float, object, int]] = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """The cached value for key, or MISSING."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return MISSING
+            self.entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def put(self, key, value, ttl, size=0):
+        """Caches value for ttl seconds, size being its response body's length."""
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        value = copy.deepcopy(value)
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.monotonic() + ttl, value, size)
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, _, size = self.entries.pop(key)
+        self.bytes -= size
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache(
+    max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES
+) -> ResponseCache:
+    """
+    Process wide cache shared by every client, so pipelines in one run reuse
+    each other's listings. It grows to the largest bounds asked for.
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(max_entries, max_bytes)
+        else:
+            _response_cache.max_entries = max(_response_cache.max_entries, max_entries)
+            _response_cache.max_bytes = max(_response_cache.max_bytes, max_bytes)
+        return _response_cache
+
+
+def reset_response_cache():
+    global _response_cache
+    with _response_cache_lock:
+        _response_cache = None
@@ -0,0 +1,134 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying because the server may answer differently next time
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+# Statuses meaning we are sending too fast
+THROTTLE_STATUSES = frozenset({429})
+
+
+class RetryBudget:
+    """
+    Caps the number of retries across every request sharing it, so a run
+    against a failing API gives up instead of retrying each call in turn.
+    Throttled requests are not failures and never spend it.
+    """
+
+    def __init__(self, max_retries=1000):
+        self.max_retries = max_retries
+        self.spent = 0
+        self.lock = threading.Lock()
+
+    def try_spend(self) -> bool:
+        with self.lock:
+            if self.spent >= self.max_retries:
+                return False
+            self.spent += 1
+            return True
+
+    def reset(self):
+        with self.lock:
+            self.spent = 0
+
+
+@dataclass(kw_only=True)
+class RetryPolicy:
+    """
+    Exponential backoff with jitter, bounded by attempts, by the time spent
+    on a single call and optionally by a retry budget shared by every call
+    made with the policy.
+    """
+
+    max_attempts: int = 6
+    base_delay: float = 1.0
+    throttle_base_delay: float = 5.0
+    multiplier: float = 2.0
+    max_delay: float = 60.0
+    jitter: float = 0.5
+    max_elapsed: float = 300.0
+    retry_statuses: frozenset[int] = RETRY_STATUSES
+    throttle_statuses: frozenset[int] = THROTTLE_STATUSES
+    budget: RetryBudget | None = None
+
+    @classmethod
+    def from_config(cls, config) -> "RetryPolicy":
+        if config is None:
+            return cls()
+        if isinstance(config, RetryPolicy):
+            return config
+        config = dict(config)
+        for key in ("retry_statuses", "throttle_statuses"):
+            if key in config:
+                config[key] = frozenset(config[key])
+        if isinstance(config.get("budget"), int):
+            config["budget"] = RetryBudget(max_retries=config["budget"])
+        return cls(**config)
+
+    def is_retryable(self, status_code) -> bool:
+        """Connection failures are passed in as a status of None."""
+        return (
+            status_code is None
+            or status_code in self.retry_statuses
+            or status_code in self.throttle_statuses
+        )
+
+    def backoff(self, attempt, status_code=None) -> float:
+        base = (
+            self.throttle_base_delay
+            if status_code in self.throttle_statuses
+            else self.base_delay
+        )
+        delay = min(self.max_delay, base * self.multiplier ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())  # noqa: S311
+
+    def begin(self) -> "RetryState":
+        return RetryState(self)
+
+
+class RetryState:
+    """Tracks the attempts of a single call against its RetryPolicy."""
+
+    def __init__(self, policy: RetryPolicy):
+        self.policy = policy
+        self.attempt = 0
+        self.started = time.monotonic()
+
+    def next_delay(self, status_code, retry_after=None) -> float | None:
+        """
+        Seconds to wait before retrying after a failed attempt, or None when
+        the call should give up.
+        """
+        policy = self.policy
+        self.attempt += 1
+        if not policy.is_retryable(status_code):
+            return None
+        if self.attempt >= policy.max_attempts:
+            logger.warning("Giving up after %s attempts", self.attempt)
+            return None
+
+        delay = (
+            retry_after
+            if retry_after is not None
+            else policy.backoff(self.attempt, status_code)
+        )
+        elapsed = time.monotonic() - self.started
+        if elapsed + delay > policy.max_elapsed:
+            logger.warning(
+                "Giving up, retrying in %.1fs would exceed %ss for this call",
+                delay,
+                policy.max_elapsed,
+            )
+            return None
+        if (
+            policy.budget is not None
+            and status_code not in policy.throttle_statuses
+            and not policy.budget.try_spend()
+        ):
+            logger.warning("Giving up, the retry budget for this run is spent")
+            return None
+        return delay
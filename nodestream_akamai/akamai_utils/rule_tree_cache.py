@@ -0,0 +1,95 @@
+import json
+import logging
+import time
+import zlib
+
+from .sqlite_store import SqliteStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE_NAME = "rule_trees.sqlite3"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class RuleTreeCache(SqliteStore):
+    """
+    Persistent store of PAPI rule trees. A property version cannot change
+    once it is activated, so a (propertyId, version, ruleFormat) key never
+    goes stale and trees are only evicted to stay under max_bytes, least
+    recently used first. Trees are stored as zlib compressed JSON in SQLite.
+    """
+
+    DEFAULT_FILE_NAME = DEFAULT_CACHE_FILE_NAME
+    TABLE = "rule_trees"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rule_trees (
+            property_id TEXT NOT NULL,
+            version TEXT NOT NULL,
+            rule_format TEXT NOT NULL,
+            body BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (property_id, version, rule_format)
+        )
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def _key(property_id, version, rule_format):
+        return str(property_id), str(version), rule_format or ""
+
+    def get(self, property_id, version, rule_format=None) -> dict | None:
+        key = self._key(property_id, version, rule_format)
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT body FROM rule_trees"
+                " WHERE property_id = ? AND version = ? AND rule_format = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE rule_trees SET last_used = ?"
+                " WHERE property_id = ? AND version = ? AND rule_format = ?",
+                (time.time(), *key),
+            )
+        logger.debug("Rule tree cache hit for %s v%s", property_id, version)
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, property_id, version, rule_tree, rule_format=None):
+        body = zlib.compress(json.dumps(rule_tree).encode("utf-8"))
+        key = self._key(property_id, version, rule_format)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO rule_trees"
+                " (property_id, version, rule_format, body, size, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, body, len(body), time.time()),
+            )
+            self._evict()
+
+    def _evict(self):
+        (total,) = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM rule_trees"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self.connection.execute(
+            "SELECT property_id, version, rule_format, size FROM rule_trees"
+            " ORDER BY last_used"
+        )
+        evicted = []
+        for property_id, version, rule_format, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((property_id, version, rule_format))
+            total -= size
+        self.connection.executemany(
+            "DELETE FROM rule_trees"
+            " WHERE property_id = ? AND version = ? AND rule_format = ?",
+            evicted,
+        )
+        logger.debug("Evicted %s rule trees from cache", len(evicted))
@@ -0,0 +1,328 @@
+import itertools
+import logging
+from collections import defaultdict
+
+from .model import Origin
+
+logger = logging.getLogger(__name__)
+
+PATH_AND = " AND "
+
+CLOUDLET_TYPES = [
+    "applicationLoadBalancer",
+    "apiPrioritization",
+    "audienceSegmentation",
+    "phasedRelease",
+    "edgeRedirector",
+    "forwardRewrite",
+    "requestControl",
+    "visitorPrioritization",
+    "virtualWaitingRoom",
+]
+
+# Define criteria to look at
+MATCH_TYPES = ["path", "hostname", "cloudletsOrigin"]
+
+# Define negative criterion matches
+NEGATIVE_OPERATORS = ["DOES_NOT_MATCH_ONE_OF", "IS_NOT_ONE_OF"]
+
+
+def _get_policy_set_prefix(options):
+    if "policyTokenDefault" in options:
+        policy_set_prefix = options["policyTokenDefault"] + "-"
+    elif "policyToken" in options:
+        policy_set_prefix = options["policyToken"] + "-"
+    else:
+        policy_set_prefix = ""
+    return policy_set_prefix
+
+
+def _flatten_origins(origin):
+    flattened = list(
+        itertools.chain(
+            (
+                Origin(name=origin["name"], path=path)
+                for path in origin.get("paths", [])
+            ),
+            (
+                Origin(name=origin["name"], hostname=hostname)
+                for hostname in origin.get("hostnames", [])
+            ),
+            (
+                Origin(name=origin["name"], conditional_origin=conditional_origin)
+                for conditional_origin in origin.get("conditional_origins", [])
+            ),
+        )
+    )
+    if flattened:
+        return flattened
+
+    return [Origin(name=origin["name"])]
+
+
+def _origin_host(origin_behavior):
+    options = origin_behavior["options"]
+    if "hostname" in options:
+        return options["hostname"]
+    if "netStorage" in options:
+        return options["netStorage"]["downloadDomainName"]
+    if "mslorigin" in options:
+        return options["mslorigin"]
+    return "ERROR"  # Host should be renamed
+
+
+def _collate_rule_criteria(rule):
+    """
+    Extract path matches, hostname matches and Conditional Origin IDs from
+    the criteria of a single rule.
+    """
+    # Instantiate results
+    criteria_results = {}
+    rule_results = {k: [] for k in MATCH_TYPES}
+
+    for match_type in MATCH_TYPES:
+        criteria_results[match_type] = []
+        criterion_results = {k: [] for k in MATCH_TYPES}
+
+        # Parse criteria and create list of lists of path matches
+        for rule_criterion in rule.get("criteria", []):
+            criterion_results[match_type] = []
+
+            if rule_criterion["name"] == match_type:
+                rc_options = rule_criterion["options"]
+                for value in rc_options.get("values", []):
+                    if rc_options.get("matchOperator") in NEGATIVE_OPERATORS:
+                        value = "!" + value
+                    criterion_results[match_type].append(value)
+                if "originId" in rc_options:
+                    criterion_results[match_type].append(rc_options["originId"])
+
+            if len(criterion_results[match_type]) > 0:
+                criteria_results[match_type].append(criterion_results[match_type])
+
+        if len(criteria_results[match_type]) > 0:
+            # Collate path matches into a list of combinations, based on criteria setting
+            if len(criteria_results[match_type]) == 1:
+                rule_results[match_type] = criteria_results[match_type][0]
+            else:
+                if rule["criteriaMustSatisfy"] == "all":
+                    # If using ALL option we must create boolean combos
+                    rule_product = itertools.product(*criteria_results[match_type])
+                    for product in rule_product:
+                        rule_results[match_type].append(" AND ".join(product))
+                else:
+                    for result in criteria_results[match_type]:
+                        rule_results[match_type].extend(result)
+    return rule_results
+
+
+def _combine_origin_criteria(origin_host, location_results):
+    """
+    Combine the criteria of every rule above an origin into a single list
+    with boolean AND between parent and child.
+    """
+    combined_rule_paths = []
+    combined_rule_hosts = []
+    combined_rule_cdids = []
+    for results in location_results:
+        if len(results.get("path", [])) > 0:
+            combined_rule_paths.append(results["path"])
+        if len(results.get("hostname", [])) > 0:
+            combined_rule_hosts.append(results["hostname"])
+        if len(results.get("cloudletsOrigin", [])) > 0:
+            combined_rule_cdids.append(results["cloudletsOrigin"])
+
+    output = {"name": origin_host}
+
+    if combined_rule_paths:
+        output["paths"] = [
+            PATH_AND.join(path_product)
+            for path_product in itertools.product(*combined_rule_paths)
+        ]
+    if combined_rule_hosts:
+        output["hostnames"] = [
+            PATH_AND.join(host_product)
+            for host_product in itertools.product(*combined_rule_hosts)
+        ]
+
+    if combined_rule_cdids:
+        output["conditional_origins"] = [
+            PATH_AND.join(cdid_product)
+            for cdid_product in itertools.product(*combined_rule_cdids)
+        ]
+
+    return output
+
+
+class BehaviorCollector:
+    """
+    Receives every behavior named in behavior_names during a rule tree walk,
+    in document order, and turns them into a result once the walk is done.
+    """
+
+    behavior_names: tuple[str, ...] = ()
+
+    def __init__(self):
+        self.instances = defaultdict(list)
+
+    def collect(self, behavior, ancestors):  # noqa: ARG002
+        self.instances[behavior["name"]].append(behavior)
+
+    def behaviors(self, *names):
+        return [behavior for name in names for behavior in self.instances.get(name, [])]
+
+    def result(self):
+        raise NotImplementedError
+
+
+class CloudletCollector(BehaviorCollector):
+    behavior_names = tuple(CLOUDLET_TYPES)
+
+    def result(self):
+        policy_ids = []
+        for behavior in self.behaviors(*CLOUDLET_TYPES):
+            if behavior["options"]["enabled"]:
+                if behavior["options"].get("isSharedPolicy"):
+                    policy_id = behavior["options"]["cloudletSharedPolicy"]
+                else:
+                    policy_id = behavior["options"]["cloudletPolicy"]["id"]
+                policy_ids.append(policy_id)
+
+        return list(set(policy_ids))
+
+
+class LegacyEdgeRedirectorCollector(BehaviorCollector):
+    behavior_names = ("edgeRedirector",)
+
+    def result(self):
+        return list(
+            {
+                behavior["options"]["cloudletPolicy"]["id"]
+                for behavior in self.behaviors("edgeRedirector")
+                if behavior["options"]["enabled"]
+                and not behavior["options"].get("isSharedPolicy")
+            }
+        )
+
+
+class ImageManagerCollector(BehaviorCollector):
+    behavior_names = ("imageManager", "imageManagerVideo")
+
+    def __init__(self, asset_id):
+        super().__init__()
+        self.asset_id = asset_id
+
+    def result(self):
+        policy_sets = []
+        for behavior in self.behaviors(*self.behavior_names):
+            # Need to work out policySet if using default or custom options
+            options = behavior["options"]
+            policy_set = options.get("policySet")
+            if policy_set is None:
+                policy_set = f"{_get_policy_set_prefix(options)}{self.asset_id}"
+                if behavior["name"] == "imageManagerVideo":
+                    policy_set += "-v"
+            policy_sets.append(policy_set)
+
+        return list(set(policy_sets))
+
+
+class EdgeWorkerCollector(BehaviorCollector):
+    behavior_names = ("edgeWorker",)
+
+    def result(self):
+        ew_ids = []
+        for behavior in self.behaviors("edgeWorker"):
+            if (
+                "edgeWorkerId" in behavior["options"]
+                and behavior["options"]["edgeWorkerId"]
+            ):
+                ew_ids.append(int(behavior["options"]["edgeWorkerId"]))
+
+        return list(set(ew_ids))
+
+
+class SiteShieldCollector(BehaviorCollector):
+    behavior_names = ("siteShield",)
+
+    def result(self):
+        return [
+            siteshield["options"]["ssmap"]["value"]
+            for siteshield in self.behaviors("siteShield")
+        ]
+
+
+class CpCodeCollector(BehaviorCollector):
+    behavior_names = ("cpCode",)
+
+    def result(self):
+        cpcode_ids = []
+        for behavior in self.behaviors("cpCode"):
+            if "value" in behavior["options"] and "id" in behavior["options"]["value"]:
+                cpcode_ids.append(int(behavior["options"]["value"]["id"]))
+
+        return list(set(cpcode_ids))
+
+
+class OriginCollector(BehaviorCollector):
+    """
+    Collates each origin behavior with the criteria of the rules above it.
+    Each rule's criteria are collated once, however many origins sit below it.
+    """
+
+    behavior_names = ("origin",)
+
+    def __init__(self):
+        super().__init__()
+        self.origins = []
+        self.rule_criteria = {}
+
+    def criteria_for(self, rule):
+        key = id(rule)
+        if key not in self.rule_criteria:
+            self.rule_criteria[key] = _collate_rule_criteria(rule)
+        return self.rule_criteria[key]
+
+    def collect(self, behavior, ancestors):
+        # The root rule carries no criteria, so only its descendants count
+        location_results = [self.criteria_for(rule) for rule in ancestors[1:]]
+        self.origins.append(
+            _combine_origin_criteria(_origin_host(behavior), location_results)
+        )
+
+    def result(self):
+        # Expand to one origin hostname/path combo per object to simplify the pipeline config and avoid
+        # nested looping
+        return list(
+            itertools.chain.from_iterable(
+                _flatten_origins(origin) for origin in self.origins
+            )
+        )
+
+
+class RuleTreeVisitor:
+    """
+    Walks a rule tree once, in the same order as a `$..behaviors` jsonpath
+    search, and hands every behavior to the collectors registered for its
+    name along with the chain of rules leading to it.
+    """
+
+    def __init__(self, *collectors):
+        self.collectors = defaultdict(list)
+        for collector in collectors:
+            self.register(collector)
+
+    def register(self, collector):
+        for behavior_name in collector.behavior_names:
+            self.collectors[behavior_name].append(collector)
+        return collector
+
+    def visit(self, rules):
+        stack = [(rules, (rules,))]
+        while stack:
+            rule, ancestors = stack.pop()
+            for behavior in rule.get("behaviors", []):
+                for collector in self.collectors.get(behavior.get("name"), []):
+                    collector.collect(behavior, ancestors)
+            children = rule.get("children", [])
+            stack.extend((child, (*ancestors, child)) for child in reversed(children))
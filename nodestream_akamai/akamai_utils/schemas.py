@@ -0,0 +1,48 @@
+"""
+The fields clients read from the heavier Akamai responses. Decoding against
+these skips everything else; see decoding.get_json_decoder. Akamai returns
+null for missing values, which msgspec only accepts for fields declared
+X | None, so every field is.
+"""
+
+from typing import Any, List, TypedDict
+
+
+class Enrollment(TypedDict, total=False):
+    id: int | None
+    productionSlots: List[Any] | None
+    ra: str | None
+    networkConfiguration: dict[str, Any] | None
+    csr: dict[str, Any] | None
+
+
+class EnrollmentList(TypedDict, total=False):
+    enrollments: List[Enrollment] | None
+
+
+class StorageGroup(TypedDict, total=False):
+    storageGroupId: int | None
+    storageGroupName: str | None
+    domainPrefix: str | None
+    estimatedUsageGB: float | None
+
+
+class StorageGroupList(TypedDict, total=False):
+    items: List[StorageGroup] | None
+
+
+class AccountHostname(TypedDict, total=False):
+    cnameFrom: str | None
+    propertyId: str | None
+    contractId: str | None
+    groupId: str | None
+
+
+class AccountHostnames(TypedDict, total=False):
+    items: List[AccountHostname] | None
+    totalItems: int | None
+    nextLink: str | None
+
+
+class AccountHostnamesPage(TypedDict, total=False):
+    hostnames: AccountHostnames | None
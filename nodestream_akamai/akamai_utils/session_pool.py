@@ -0,0 +1,169 @@
+import functools
+import logging
+import threading
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+from akamai.edgegrid import EdgeGridAuth
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_HTTP = "http://"
+PROTOCOL_HTTPS = "https://"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT_SECONDS = 300
+# Bytes of a request body covered by the EdgeGrid signature, the default of
+# Akamai's EdgeGrid libraries; larger POST bodies are signed by their prefix
+EDGEGRID_MAX_BODY = 128 * 1024
+
+
+@dataclass(kw_only=True)
+class PoolStats:
+    """Connection reuse of one shared session, over the pools it currently holds."""
+
+    host: str
+    client_token: str
+    pool_size: int
+    clients: int
+    requests: int
+    connections: int
+
+    @property
+    def reused(self) -> int:
+        """Requests sent over a connection that was already open."""
+        return max(0, self.requests - self.connections)
+
+
+class _SharedSession:
+    def __init__(self, host, client_token, session, pool_size):
+        self.host = host
+        self.client_token = client_token
+        self.session = session
+        self.pool_size = pool_size
+        self.clients = 0
+        # Counts from adapters replaced when the pool was resized
+        self.retired_requests = 0
+        self.retired_connections = 0
+
+    def adapters(self):
+        return [self.session.get_adapter(p) for p in (PROTOCOL_HTTP, PROTOCOL_HTTPS)]
+
+    def mount(self, pool_size):
+        for adapter in self.adapters():
+            requests, connections = _adapter_counts(adapter)
+            self.retired_requests += requests
+            self.retired_connections += connections
+        _mount_adapters(self.session, pool_size)
+        self.pool_size = pool_size
+
+    def stats(self) -> PoolStats:
+        requests, connections = self.retired_requests, self.retired_connections
+        for adapter in self.adapters():
+            adapter_requests, adapter_connections = _adapter_counts(adapter)
+            requests += adapter_requests
+            connections += adapter_connections
+        return PoolStats(
+            host=self.host,
+            client_token=self.client_token,
+            pool_size=self.pool_size,
+            clients=self.clients,
+            requests=requests,
+            connections=connections,
+        )
+
+
+def _adapter_counts(adapter) -> tuple[int, int]:
+    pools = adapter.poolmanager.pools
+    requests = connections = 0
+    # The container refuses plain iteration
+    for key in pools.keys():  # noqa: SIM118
+        pool = pools.get(key)
+        if pool is not None:
+            requests += pool.num_requests
+            connections += pool.num_connections
+    return requests, connections
+
+
+def _mount_adapters(session, pool_size):
+    # Retries are handled by the client's RetryPolicy, not by urllib3
+    for prefix in (PROTOCOL_HTTP, PROTOCOL_HTTPS):
+        session.mount(
+            prefix,
+            HTTPAdapter(
+                pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0
+            ),
+        )
+
+
+def new_session(pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT_SECONDS):
+    session = Session()
+    _mount_adapters(session, pool_size)
+    session.request = functools.partial(session.request, timeout=timeout)  # Seconds
+    session.send = functools.partial(session.send, timeout=timeout)  # Seconds
+    return session
+
+
+_sessions: dict[tuple, _SharedSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(
+    base_url, client_token, client_secret, access_token, pool_size=DEFAULT_POOL_SIZE
+) -> Session:
+    """
+    Process wide session for the given host and credentials, so every client
+    using them shares one keep-alive connection pool. The pool grows to the
+    largest pool_size asked for.
+    """
+    host = urlparse(base_url).netloc or base_url
+    key = (host, client_token, client_secret, access_token)
+    with _sessions_lock:
+        shared = _sessions.get(key)
+        if shared is None:
+            session = new_session(pool_size)
+            session.auth = EdgeGridAuth(
+                client_token=client_token,
+                client_secret=client_secret,
+                access_token=access_token,
+                max_body=EDGEGRID_MAX_BODY,
+            )
+            shared = _SharedSession(host, client_token, session, pool_size)
+            _sessions[key] = shared
+        elif pool_size > shared.pool_size:
+            logger.debug(
+                "Growing connection pool for %s from %s to %s",
+                host,
+                shared.pool_size,
+                pool_size,
+            )
+            shared.mount(pool_size)
+        shared.clients += 1
+        return shared.session
+
+
+def session_stats() -> list[PoolStats]:
+    """Connection reuse of every shared session."""
+    with _sessions_lock:
+        return [shared.stats() for shared in _sessions.values()]
+
+
+def log_session_stats():
+    for stats in session_stats():
+        logger.info(
+            "%s: %s requests over %s connections, %s reused, pool size %s, %s clients",
+            stats.host,
+            stats.requests,
+            stats.connections,
+            stats.reused,
+            stats.pool_size,
+            stats.clients,
+        )
+
+
+def reset_sessions():
+    with _sessions_lock:
+        for shared in _sessions.values():
+            shared.session.close()
+        _sessions.clear()
@@ -0,0 +1,68 @@
+import copy
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def request_key(*parts) -> str:
+    """A hashable key for a request, whatever its params and headers hold."""
+    return json.dumps(parts, sort_keys=True, default=repr)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs one call per key at a time: callers asking for a key that is
+    already in flight wait for it and get a copy of its result (or its
+    exception) instead of making the call again.
+    """
+
+    def __init__(self):
+        self.calls: dict[str, _Call] = {}
+        self.lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key, func):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = func()
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+                waiters = call.waiters
+            call.done.set()
+        # Followers copy the shared result, so the leader must not mutate it
+        return copy.deepcopy(call.result) if waiters else call.result
+
+
+_requests = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Process wide group shared by every client."""
+    return _requests
@@ -0,0 +1,45 @@
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteStore:
+    """
+    A single table SQLite file kept across runs and shared by the threads of
+    one. path is the file, or a directory to keep DEFAULT_FILE_NAME in. A
+    table written under another SCHEMA_VERSION is dropped when it is opened.
+    """
+
+    DEFAULT_FILE_NAME: str
+    TABLE: str
+    # The CREATE TABLE IF NOT EXISTS statement for TABLE
+    SCHEMA: str
+    SCHEMA_VERSION = 0
+
+    def __init__(self, path):
+        path = Path(path)
+        if path.is_dir():
+            path = path / self.DEFAULT_FILE_NAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+            if version != self.SCHEMA_VERSION:
+                self.connection.execute(f"DROP TABLE IF EXISTS {self.TABLE}")
+                self.connection.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+                if version:
+                    logger.info(
+                        "Discarded %s written by schema version %s",
+                        self.TABLE,
+                        version,
+                    )
+            self.connection.execute(self.SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
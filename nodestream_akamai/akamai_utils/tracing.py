@@ -0,0 +1,262 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(kw_only=True)
+class Span:
+    """A timed operation, shaped after OpenTelemetry spans."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start_time: float = 0.0
+    end_time: float | None = None
+    attributes: dict = field(default_factory=dict)
+    status: str = "OK"
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def duration(self) -> float:
+        return (self.end_time or time.time()) - self.start_time
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "duration_ms": round(self.duration * 1000, 3)}
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is off."""
+
+    def set_attribute(self, key, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter:
+    def export(self, span: Span):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """Writes one line per finished span."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+        self.lock = threading.Lock()
+
+    def export(self, span):
+        attributes = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+        line = (
+            f"[trace {span.trace_id[:8]}] {span.name} "
+            f"{span.duration * 1000:.1f}ms {span.status} {attributes}".rstrip()
+        )
+        with self.lock:
+            print(line, file=self.stream)
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends finished spans to a JSON lines file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "a")  # noqa: SIM115 - kept open until close
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+_exporter: SpanExporter | None = None
+_config = None
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "akamai_current_span", default=None
+)
+
+
+def configure_tracing(config):
+    """
+    Turns tracing on for the process. config is an exporter, or a dict with
+    exporter set to "console" or "file" (with a path); None leaves tracing
+    as it is.
+    """
+    global _exporter, _config
+    if config is None or config == _config:
+        # Every client of a pipeline is usually given the same config
+        return
+    if isinstance(config, SpanExporter):
+        exporter = config
+    elif config.get("exporter", "console") == "console":
+        exporter = ConsoleSpanExporter()
+    elif config["exporter"] == "file":
+        exporter = FileSpanExporter(config["path"])
+    else:
+        msg = f"Unknown span exporter {config['exporter']!r}, expected console or file"
+        raise ValueError(msg)
+    if _exporter is not None:
+        _exporter.close()
+    _exporter = exporter
+    _config = config
+
+
+def disable_tracing():
+    global _exporter, _config
+    if _exporter is not None:
+        _exporter.close()
+    _exporter = _config = None
+
+
+def tracing_enabled() -> bool:
+    return _exporter is not None
+
+
+def start_span(name, parent=None, **attributes) -> Span:
+    """A span that is not made current, for work spread over several steps."""
+    parent = parent or _current_span.get()
+    return Span(
+        name=name,
+        trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+        span_id=os.urandom(8).hex(),
+        parent_id=parent.span_id if parent else None,
+        start_time=time.time(),
+        attributes=attributes,
+    )
+
+
+def end_span(span: Span, error=None):
+    span.end_time = time.time()
+    if error is not None:
+        span.status = "ERROR"
+        span.set_attribute("error", repr(error))
+    exporter = _exporter
+    if exporter is None:
+        return
+    try:
+        exporter.export(span)
+    except Exception:
+        logger.exception("Failed to export span %s", span.name)
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Traces the enclosed block as a child of the current span. Yields a
+    no-op span while tracing is off.
+    """
+    if _exporter is None:
+        yield NOOP_SPAN
+        return
+    current = start_span(name, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as err:
+        end_span(current, err)
+        raise
+    else:
+        end_span(current)
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def activate(current: Span | None):
+    """Makes current the parent of spans started in the enclosed block."""
+    token = _current_span.set(current)
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name):
+    """Decorates a function so each call is traced as a span."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced_records(name):
+    """
+    Decorates an extract_records async generator. The span covers the whole
+    extraction and splits its time between producing records (fetching and
+    parsing, during which child spans nest under it) and waiting for the
+    pipeline to take each record. name is the span's name, or a function of
+    the generator's arguments returning it.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            records = func(*args, **kwargs)
+            if _exporter is None:
+                async for record in records:
+                    yield record
+                return
+
+            extraction = start_span(name(*args, **kwargs) if callable(name) else name)
+            produce_seconds = consume_seconds = 0.0
+            count = 0
+            error = None
+            try:
+                while True:
+                    started = time.monotonic()
+                    with activate(extraction):
+                        try:
+                            record = await records.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            produce_seconds += time.monotonic() - started
+                    count += 1
+                    started = time.monotonic()
+                    yield record
+                    consume_seconds += time.monotonic() - started
+            except GeneratorExit:
+                # The pipeline stopped early, which is not an error
+                raise
+            except BaseException as err:
+                error = err
+                raise
+            finally:
+                await records.aclose()
+                extraction.set_attribute("records", count)
+                extraction.set_attribute("produce_seconds", round(produce_seconds, 3))
+                extraction.set_attribute("consume_seconds", round(consume_seconds, 3))
+                end_span(extraction, error)
+
+        return wrapper
+
+    return decorator
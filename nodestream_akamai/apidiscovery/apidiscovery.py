@@ -1,11 +1,10 @@
 import logging
 
-from nodestream.pipeline.extractors import Extractor
-
 from ..akamai_utils.appsec_client import AkamaiAppSecClient
+from ..akamai_utils.extractor import AkamaiExtractor
 
 
-class AkamaiAPIDiscoveryExtractor(Extractor):
+class AkamaiAPIDiscoveryExtractor(AkamaiExtractor):
     def __init__(self, **akamai_client_kwargs) -> None:
         self.client = AkamaiAppSecClient(**akamai_client_kwargs)
         self.logger = logging.getLogger(self.__class__.__name__)
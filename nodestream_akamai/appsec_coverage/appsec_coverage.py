@@ -1,8 +1,7 @@
 import logging
 
-from nodestream.pipeline.extractors import Extractor
-
 from ..akamai_utils.appsec_client import AkamaiAppSecClient
+from ..akamai_utils.extractor import AkamaiExtractor
 
 
 def _extract_policy(covering_config, hostname, policy_name) -> dict[str, str]:
@@ -18,7 +17,7 @@ def _extract_policy(covering_config, hostname, policy_name) -> dict[str, str]:
     }
 
 
-class AkamaiAppSecCoverageExtractor(Extractor):
+class AkamaiAppSecCoverageExtractor(AkamaiExtractor):
     def __init__(self, **akamai_client_kwargs) -> None:
         self.client = AkamaiAppSecClient(**akamai_client_kwargs)
         self.logger = logging.getLogger(self.__class__.__name__)
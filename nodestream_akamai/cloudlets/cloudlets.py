@@ -1,11 +1,10 @@
 import logging
 
-from nodestream.pipeline.extractors import Extractor
-
 from ..akamai_utils.cloudlet_client import AkamaiCloudletClient
+from ..akamai_utils.extractor import AkamaiExtractor
 
 
-class AkamaiCloudletExtractor(Extractor):
+class AkamaiCloudletExtractor(AkamaiExtractor):
     def __init__(self, **akamai_client_kwargs) -> None:
         self.client = AkamaiCloudletClient(**akamai_client_kwargs)
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -23,13 +22,13 @@ class AkamaiCloudletExtractor(Extractor):
 
     async def extract_records(self):
         try:
-            for v2_policy in self.client.list_v2_policies():
+            async for v2_policy in self.client.iter_v2_policies():
                 yield self.parse_policy(v2_policy, 2)
         except Exception as err:
             self.logger.exception("Failed to list v2 cloudlet policies: %s", err)
 
         try:
-            for v3_policy in self.client.list_v3_policies():
+            async for v3_policy in self.client.iter_v3_policies():
                 yield self.parse_policy(v3_policy, 3)
         except Exception as err:
             self.logger.exception("Failed to list v3 cloudlet policies: %s", err)
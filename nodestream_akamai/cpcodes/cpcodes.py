@@ -1,11 +1,10 @@
 import logging
 
-from nodestream.pipeline.extractors import Extractor
-
 from ..akamai_utils.cprg_client import AkamaiCprgClient
+from ..akamai_utils.extractor import AkamaiExtractor
 
 
-class AkamaiCpCodesExtractor(Extractor):
+class AkamaiCpCodesExtractor(AkamaiExtractor):
     def __init__(self, **akamai_client_kwargs) -> None:
         self.client = AkamaiCprgClient(**akamai_client_kwargs)
         self.logger = logging.getLogger(self.__class__.__name__)
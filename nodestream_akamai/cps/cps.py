@@ -1,11 +1,10 @@
 import logging
 
-from nodestream.pipeline.extractors import Extractor
-
 from ..akamai_utils.cps_client import AkamaiCpsClient
+from ..akamai_utils.extractor import AkamaiExtractor
 
 
-class AkamaiCpsExtractor(Extractor):
+class AkamaiCpsExtractor(AkamaiExtractor):
     def __init__(self, **akamai_client_kwargs) -> None:
         self.client = AkamaiCpsClient(**akamai_client_kwargs)
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -13,7 +12,9 @@ class AkamaiCpsExtractor(Extractor):
     async def extract_records(self):
         desired_fields = ["id", "productionSlots", "ra", "networkConfiguration", "csr"]
         try:
-            enrollments = self.client.list_cps_enrollments()
+            # Streamed enrollments are fetched while they are iterated, so
+            # read them all here where listing errors are caught
+            enrollments = list(self.client.list_cps_enrollments())
         except Exception as err:
             self.logger.exception("Failed to list certificates: %s", err)
             return
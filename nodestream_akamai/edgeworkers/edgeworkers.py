@@ -1,11 +1,10 @@
 import logging
 
-from nodestream.pipeline.extractors import Extractor
-
 from ..akamai_utils.edgeworkers_client import AkamaiEdgeworkersClient
+from ..akamai_utils.extractor import AkamaiExtractor
 
 
-class AkamaiEdgeworkersExtractor(Extractor):
+class AkamaiEdgeworkersExtractor(AkamaiExtractor):
     def __init__(self, **akamai_client_kwargs) -> None:
         self.client = AkamaiEdgeworkersClient(**akamai_client_kwargs)
         self.logger = logging.getLogger(self.__class__.__name__)
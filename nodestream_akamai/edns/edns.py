@@ -1,9 +1,10 @@
 import logging
 
-from nodestream.pipeline.extractors import Extractor
-
 from ..akamai_utils import addresses
-from ..akamai_utils.edns_client import AkamaiEdnsClient
+from ..akamai_utils.concurrency import bounded_map
+from ..akamai_utils.edns_client import AkamaiEdnsClient, AsyncAkamaiEdnsClient
+from ..akamai_utils.extractor import AkamaiExtractor
+from ..akamai_utils.tracing import span
 
 SUPPORTED_RECORD_TYPES = [
     "A",
@@ -14,10 +15,18 @@ SUPPORTED_RECORD_TYPES = [
 ]
 
 
-class AkamaiEdnsExtractor(Extractor):
-    def __init__(self, **akamai_client_kwargs) -> None:
+class AkamaiEdnsExtractor(AkamaiExtractor):
+    def __init__(self, *, max_concurrency=1, **akamai_client_kwargs) -> None:
         self.client = AkamaiEdnsClient(**akamai_client_kwargs)
         self.logger = logging.getLogger(self.__class__.__name__)
+        # Record sets of several zones are then requested at once, awaited on
+        # the event loop rather than blocking it
+        self.max_concurrency = max_concurrency
+        self.async_client = None
+        if max_concurrency > 1:
+            self.async_client = AsyncAkamaiEdnsClient.from_client_kwargs(
+                **akamai_client_kwargs
+            )
 
     def _extract_recordset(self, recordset, zone):
         self.logger.debug(
@@ -40,22 +49,41 @@ class AkamaiEdnsExtractor(Extractor):
                 recordset[node_type] = node_type_list
         return recordset
 
+    def _parse_zone(self, zone, record_sets, zone_span):
+        with span("edns.parse_recordsets"):
+            zone["recordsets"] = [
+                self._extract_recordset(rs, zone["zone"])
+                for rs in record_sets
+                if rs["type"] in SUPPORTED_RECORD_TYPES
+            ]
+        zone_span.set_attribute("recordsets", len(zone["recordsets"]))
+        return zone
+
     def _extract_zone(self, zone):
-        try:
-            record_sets = self.client.list_recordsets(zone["zone"])
-        except Exception as e:
-            self.logger.exception(
-                "Failed to list record sets for zone: %s",
-                zone["zone"],
-            )
-            raise e
+        with span("edns.extract_zone", zone=zone["zone"]) as zone_span:
+            try:
+                record_sets = self.client.list_recordsets(zone["zone"])
+                # Streamed record sets are still being fetched while they are
+                # parsed, so listing errors can surface here too
+                return self._parse_zone(zone, record_sets, zone_span)
+            except Exception as e:
+                self.logger.exception(
+                    "Failed to list record sets for zone: %s",
+                    zone["zone"],
+                )
+                raise e
 
-        zone["recordsets"] = [
-            self._extract_recordset(rs, zone["zone"])
-            for rs in record_sets
-            if rs["type"] in SUPPORTED_RECORD_TYPES
-        ]
-        return zone
+    async def _extract_zone_async(self, zone):
+        with span("edns.extract_zone", zone=zone["zone"]) as zone_span:
+            try:
+                record_sets = await self.async_client.list_recordsets(zone["zone"])
+            except Exception as e:
+                self.logger.exception(
+                    "Failed to list record sets for zone: %s",
+                    zone["zone"],
+                )
+                raise e
+            return self._parse_zone(zone, record_sets, zone_span)
 
     async def extract_records(self):
         try:
@@ -64,5 +92,20 @@ class AkamaiEdnsExtractor(Extractor):
             self.logger.exception("problem fetching zones: %s", e)
             raise e
 
-        for zone in zones:
-            yield self._extract_zone(zone)
+        zones = self.skip_completed(zones, key=lambda zone: zone["zone"])
+        if self.async_client is None:
+            for zone in zones:
+                yield self._extract_zone(zone)
+                self.mark_completed(zone["zone"])
+            return
+
+        async for zone in bounded_map(
+            self._extract_zone_async, zones, max_concurrency=self.max_concurrency
+        ):
+            yield zone
+            self.mark_completed(zone["zone"])
+
+    async def finish(self, context):
+        await super().finish(context)
+        if self.async_client is not None:
+            await self.async_client.aclose()
@@ -1,11 +1,10 @@
 import logging
 
-from nodestream.pipeline.extractors import Extractor
-
 from ..akamai_utils.edgehostnames_client import AkamaiEdgeHostnamesClient
+from ..akamai_utils.extractor import AkamaiExtractor
 
 
-class AkamaiEhnExtractor(Extractor):
+class AkamaiEhnExtractor(AkamaiExtractor):
     def __init__(self, **akamai_client_kwargs) -> None:
         self.client = AkamaiEdgeHostnamesClient(**akamai_client_kwargs)
         self.logger = logging.getLogger(self.__class__.__name__)
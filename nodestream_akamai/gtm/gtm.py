@@ -1,8 +1,7 @@
 import logging
 
-from nodestream.pipeline.extractors import Extractor
-
 from ..akamai_utils import addresses
+from ..akamai_utils.extractor import AkamaiExtractor
 from ..akamai_utils.gtm_client import AkamaiGtmClient
 
 PARSED_PROPERTY_TYPES = [
@@ -16,7 +15,7 @@ PARSED_PROPERTY_TYPES = [
 DEEPLINK_PREFIX = "https://control.akamai.com/apps/gtm/#/domains/"
 
 
-class AkamaiGtmExtractor(Extractor):
+class AkamaiGtmExtractor(AkamaiExtractor):
     def __init__(self, **akamai_client_kwargs) -> None:
         self.client = AkamaiGtmClient(**akamai_client_kwargs)
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -1,12 +1,11 @@
 import logging
 
-from nodestream.pipeline.extractors import Extractor
-
 from ..akamai_utils.contract_client import AkamaiContractClient
+from ..akamai_utils.extractor import AkamaiExtractor
 from ..akamai_utils.ivm_client import AkamaiIvmClient
 
 
-class AkamaiIvmExtractor(Extractor):
+class AkamaiIvmExtractor(AkamaiExtractor):
     def __init__(self, **akamai_client_kwargs) -> None:
         self.client = AkamaiIvmClient(**akamai_client_kwargs)
         self.contract_client = AkamaiContractClient(**akamai_client_kwargs)
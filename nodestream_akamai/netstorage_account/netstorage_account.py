@@ -1,12 +1,11 @@
 import logging
 from hashlib import sha256
 
-from nodestream.pipeline.extractors import Extractor
-
+from ..akamai_utils.extractor import AkamaiExtractor
 from ..akamai_utils.netstorage_client import AkamaiNetstorageClient
 
 
-class AkamaiNetstorageAccountExtractor(Extractor):
+class AkamaiNetstorageAccountExtractor(AkamaiExtractor):
     def __init__(self, **akamai_client_kwargs) -> None:
         self.client = AkamaiNetstorageClient(**akamai_client_kwargs)
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -1,40 +1,161 @@
+import asyncio
 import dataclasses
 import logging
 
-from nodestream.pipeline.extractors import Extractor
-
+from ..akamai_utils.concurrency import bounded_map
+from ..akamai_utils.extractor import FATAL_ERRORS, AkamaiExtractor
 from ..akamai_utils.property_client import AkamaiPropertyClient
+from ..akamai_utils.property_state import (
+    INCREMENTAL_MODES,
+    PRODUCTION,
+    STAGING,
+    PropertyStateStore,
+)
+from ..akamai_utils.tracing import span
+
+VERSION_FIELDS = {PRODUCTION: "productionVersion", STAGING: "stagingVersion"}
 
 
-class AkamaiPropertyExtractor(Extractor):
-    def __init__(self, **akamai_client_kwargs) -> None:
+class AkamaiPropertyExtractor(AkamaiExtractor):
+    def __init__(
+        self,
+        *,
+        max_concurrency=1,
+        preserve_order=False,
+        state_path=None,
+        incremental_mode="emit",
+        bulk_search=False,
+        include_staging=False,
+        **akamai_client_kwargs,
+    ) -> None:
+        if incremental_mode not in INCREMENTAL_MODES:
+            message = (
+                f"incremental_mode must be one of {INCREMENTAL_MODES}, "
+                f"got {incremental_mode!r}"
+            )
+            raise ValueError(message)
         self.client = AkamaiPropertyClient(**akamai_client_kwargs)
+        self.max_concurrency = max_concurrency
+        self.preserve_order = preserve_order
+        self.state = None
+        if state_path is not None:
+            self.state = PropertyStateStore(state_path)
+        self.incremental_mode = incremental_mode
+        self.bulk_search = bulk_search
+        # Emit staging records too, tagging every record with its network
+        self.include_staging = include_staging
+        self.networks = (PRODUCTION, STAGING) if include_staging else (PRODUCTION,)
         self.logger = logging.getLogger(self.__class__.__name__)
+        # Properties that failed to describe, which are not marked completed
+        self.failed_property_ids = set()
 
     async def extract_records(self):
         self.logger.debug("extracting records")
         try:
-            properties = self.client.list_all_properties()
+            properties = self.client.list_all_properties(bulk_search=self.bulk_search)
         except Exception as err:
             self.logger.exception("Failed to list properties: %s", err)
             raise err
 
-        for prop in properties:
-            if prop.get("productionVersion") is None:
+        properties = (
+            prop
+            for prop in properties
+            if any(
+                prop.get(VERSION_FIELDS[network]) is not None
+                for network in self.networks
+            )
+        )
+        properties = self.skip_completed(properties, key=lambda p: p["propertyId"])
+        async for prop, described in bounded_map(
+            self.describe_unit,
+            properties,
+            max_concurrency=self.max_concurrency,
+            preserve_order=self.preserve_order,
+        ):
+            for network, record, changed in described:
+                yield record
+                # Saved once handed off, so a crash before then describes it again
+                if changed and self.state is not None:
+                    self.state.save(prop, network, record)
+            if prop["propertyId"] not in self.failed_property_ids:
+                self.mark_completed(prop["propertyId"])
+
+    async def finish(self, context):
+        await super().finish(context)
+        if self.state is not None:
+            self.state.close()
+        if self.client.rule_tree_cache is not None:
+            self.client.rule_tree_cache.close()
+
+    async def describe_unit(self, prop):
+        return prop, await self.describe_property(prop)
+
+    async def describe_property(self, prop):
+        """
+        (network, record, changed) for each network the property is active
+        on, changed being False for records taken from the state store.
+        Production and staging usually share a version, which is then only
+        described once.
+        """
+        self.logger.info(
+            "extracting property %s (id=%s)",
+            prop.get("propertyName"),
+            prop.get("propertyId"),
+        )
+        records = []
+        described = {}
+        for network in self.networks:
+            version = prop.get(VERSION_FIELDS[network])
+            if version is None:
                 continue
-            self.logger.info(
-                "extracting property %s (id=%s)",
-                prop.get("propertyName"),
-                prop.get("propertyId"),
+            record, changed = await self.describe_network(
+                prop, network, version, described
             )
-            try:
-                described_property = self.client.describe_property_by_dict(
-                    prop=prop, version=prop["productionVersion"]
+            if record is not None:
+                records.append((network, record, changed))
+        return records
+
+    async def describe_network(self, prop, network, version, described):
+        if self.state is not None:
+            state = self.state.unchanged(prop, network)
+            if state is not None:
+                self.logger.debug(
+                    "property %s (id=%s) unchanged at %s version %s",
+                    prop.get("propertyName"),
+                    prop.get("propertyId"),
+                    network,
+                    version,
                 )
-                yield dataclasses.asdict(described_property)
-            except Exception:
-                self.logger.exception(
-                    "Failed to get property %s (id=%s)",
-                    prop["propertyName"],
-                    prop["propertyId"],
+                if self.incremental_mode == "emit":
+                    return state.record, False
+                return None, False
+
+        if version not in described:
+            described[version] = await self.describe_version(prop, version)
+        if described[version] is None:
+            return None, False
+
+        record = described[version]
+        if self.include_staging:
+            record = {**record, "network": network}
+        return record, True
+
+    async def describe_version(self, prop, version):
+        try:
+            with span(
+                "property.describe", property_id=prop["propertyId"], version=version
+            ):
+                described_property = await asyncio.to_thread(
+                    self.client.describe_property_by_dict, prop=prop, version=version
                 )
+            return dataclasses.asdict(described_property)
+        except FATAL_ERRORS:
+            raise
+        except Exception:
+            self.failed_property_ids.add(prop["propertyId"])
+            self.logger.exception(
+                "Failed to get property %s (id=%s)",
+                prop["propertyName"],
+                prop["propertyId"],
+            )
+            return None
@@ -1,17 +1,17 @@
 import logging
 
-from nodestream.pipeline.extractors import Extractor
-
 from ..akamai_utils.cloudlets_v2_client import AkamaiCloudletsV2Client
+from ..akamai_utils.extractor import AkamaiExtractor
 
 
-class AkamaiRedirectExtractor(Extractor):
+class AkamaiRedirectExtractor(AkamaiExtractor):
     def __init__(self, **akamai_client_kwargs) -> None:
         self.client = AkamaiCloudletsV2Client(**akamai_client_kwargs)
         self.logger = logging.getLogger(self.__class__.__name__)
 
     async def extract_records(self):
-        for policy_id in self.client.cloudlet_policy_ids_er():
+        policy_ids = self.client.cloudlet_policy_ids_er()
+        for policy_id in self.skip_completed(policy_ids, key=str):
             try:
                 policy_tree = self.client.describe_policy_id(str(policy_id))
                 for item in self.client.get_policy_rule_set(policy_tree):
@@ -19,3 +19,4 @@ class AkamaiRedirectExtractor(Extractor):
             except Exception as err:
                 self.logger.exception("Failed to get policy: %s", policy_id)
                 raise err
+            self.mark_completed(policy_id)
@@ -1,11 +1,10 @@
 import logging
 
-from nodestream.pipeline.extractors import Extractor
-
+from ..akamai_utils.extractor import AkamaiExtractor
 from ..akamai_utils.siteshield_client import AkamaiSiteshieldClient
 
 
-class AkamaiSiteshieldExtractor(Extractor):
+class AkamaiSiteshieldExtractor(AkamaiExtractor):
     def __init__(self, **akamai_client_kwargs) -> None:
         self.client = AkamaiSiteshieldClient(**akamai_client_kwargs)
         self.logger = logging.getLogger(self.__class__.__name__)
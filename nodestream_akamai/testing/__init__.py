@@ -0,0 +1,10 @@
+from .fake_server import FakeAkamaiApi, FakeAkamaiServer, FaultConfig
+from .synthetic import AccountShape, generate_account
+
+__all__ = (
+    "AccountShape",
+    "FakeAkamaiApi",
+    "FakeAkamaiServer",
+    "FaultConfig",
+    "generate_account",
+)
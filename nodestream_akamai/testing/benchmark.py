@@ -0,0 +1,303 @@
+"""
+Throughput benchmarks of the extractors, run end to end against a fake
+server holding a synthetic account, and micro-benchmarks of the rule tree
+searches in property_client.py:
+
+    python -m nodestream_akamai.testing.benchmark --baseline benchmarks/baseline.json
+
+Results are compared with the baseline, and the command fails when a hot
+path got slower (or made more API calls per record) by more than the
+tolerance. --update-baseline records the new results instead. Timings
+depend on the machine, so compare baselines recorded on the same one.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from ..akamai_utils.property_client import AkamaiPropertyClient
+from ..akamai_utils.rate_limiter import api_family, get_rate_limiter
+from ..edns import AkamaiEdnsExtractor
+from ..gtm import AkamaiGtmExtractor
+from ..property import AkamaiPropertyExtractor
+from ..redirect import AkamaiRedirectExtractor
+from ..waf import AkamaiWafExtractor
+from .fake_server import FakeAkamaiServer
+from .synthetic import AccountShape, generate_account
+
+logger = logging.getLogger(__name__)
+
+CREDENTIALS = {
+    "client_token": "benchmark",
+    "client_secret": "benchmark",
+    "access_token": "benchmark",
+}
+SCALES = {
+    "small": AccountShape(
+        properties=10,
+        zones=2,
+        recordsets_per_zone=200,
+        gtm_domains=2,
+        gtm_properties_per_domain=5,
+        appsec_configs=2,
+        policies_per_appsec_config=10,
+        cloudlet_policies=2,
+        match_rules_per_policy=100,
+    ),
+    "default": AccountShape(),
+    "large": AccountShape(
+        properties=2000,
+        rule_tree_depth=5,
+        zones=5,
+        recordsets_per_zone=100000,
+        gtm_domains=20,
+        appsec_configs=20,
+        policies_per_appsec_config=300,
+        cloudlet_policies=50,
+        match_rules_per_policy=10000,
+    ),
+}
+EXTRACTORS = {
+    "property": AkamaiPropertyExtractor,
+    "edns": AkamaiEdnsExtractor,
+    "gtm": AkamaiGtmExtractor,
+    "waf": AkamaiWafExtractor,
+    "redirect": AkamaiRedirectExtractor,
+}
+RULE_TREE_SEARCHES = (
+    "search_akamai_rule_tree_for_origins",
+    "collate_origins_with_criteria",
+    "search_akamai_rule_tree_for_cloudlets",
+    "search_akamai_rule_tree_for_cp_codes",
+    "search_akamai_rule_tree_for_edge_workers",
+    "search_akamai_rule_tree_for_siteshield",
+)
+# Result fields that regress when they grow, and the one that regresses when it shrinks
+LOWER_IS_BETTER = (
+    "seconds",
+    "cpu_seconds",
+    "peak_memory_bytes",
+    "api_calls_per_record",
+    "microseconds_per_call",
+)
+HIGHER_IS_BETTER = ("records_per_second",)
+DEFAULT_TOLERANCE = 0.25
+
+
+@dataclass(kw_only=True)
+class ExtractorResult:
+    records: int
+    api_calls: int
+    seconds: float
+    cpu_seconds: float
+    peak_memory_bytes: int
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+    @property
+    def api_calls_per_record(self) -> float:
+        return self.api_calls / self.records if self.records else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            **asdict(self),
+            "records_per_second": round(self.records_per_second, 2),
+            "api_calls_per_record": round(self.api_calls_per_record, 3),
+        }
+
+
+@dataclass(kw_only=True)
+class MicroResult:
+    calls: int
+    seconds: float
+
+    @property
+    def microseconds_per_call(self) -> float:
+        return self.seconds / self.calls * 1e6 if self.calls else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            **asdict(self),
+            "microseconds_per_call": round(self.microseconds_per_call, 2),
+        }
+
+
+def _lift_rate_limits(server: FakeAkamaiServer):
+    """
+    The local server never throttles, so its limiters would only measure
+    the default request rate.
+    """
+    host = server.url.split("://", 1)[1]
+    families = {api_family(pattern.pattern) for _, pattern, _ in server.api.routes}
+    for family in families:
+        limiter = get_rate_limiter(host, CREDENTIALS["client_token"], None, family)
+        limiter.rate = limiter.max_rate = limiter.burst = limiter.tokens = 1e9
+
+
+async def _drain(extractor) -> int:
+    records = 0
+    async for _ in extractor.extract_records():
+        records += 1
+    return records
+
+
+def run_extractor(extractor_class, server: FakeAkamaiServer) -> ExtractorResult:
+    """
+    Extracts every record twice: once timed, and once under tracemalloc for
+    the peak memory, which includes the fake server's own allocations.
+    """
+    _lift_rate_limits(server)
+    kwargs = {"base_url": server.url, **CREDENTIALS}
+
+    gc.collect()
+    calls_before = server.api.requests.total()
+    started, cpu_started = time.perf_counter(), time.process_time()
+    records = asyncio.run(_drain(extractor_class(**kwargs)))
+    seconds = time.perf_counter() - started
+    cpu_seconds = time.process_time() - cpu_started
+    api_calls = server.api.requests.total() - calls_before
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        asyncio.run(_drain(extractor_class(**kwargs)))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return ExtractorResult(
+        records=records,
+        api_calls=api_calls,
+        seconds=round(seconds, 4),
+        cpu_seconds=round(cpu_seconds, 4),
+        peak_memory_bytes=peak,
+    )
+
+
+def run_rule_tree_search(name, rule_trees, repeat=5) -> MicroResult:
+    """
+    Best of repeat measurements of one search over every rule tree, each
+    measurement making enough passes to last at least 0.2s.
+    """
+    client = AkamaiPropertyClient(base_url="https://benchmark.invalid", **CREDENTIALS)
+    search = getattr(client, name)
+
+    def search_all():
+        for rule_tree in rule_trees:
+            search(rule_tree["rules"])
+
+    timer = timeit.Timer(search_all)
+    passes, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=passes)) / passes
+    return MicroResult(calls=len(rule_trees), seconds=round(best, 6))
+
+
+def run_benchmarks(shape=None, seed=0, only=None) -> dict:
+    """Results keyed by benchmark name, e.g. "extractor.edns"."""
+    shape = AccountShape.from_config(shape)
+    account = generate_account(shape, seed=seed)
+    results = {}
+    with FakeAkamaiServer(account, {"require_auth": False}) as server:
+        for name, extractor_class in EXTRACTORS.items():
+            if only and name not in only:
+                continue
+            logger.info("Benchmarking the %s extractor", name)
+            results[f"extractor.{name}"] = run_extractor(
+                extractor_class, server
+            ).to_dict()
+
+    rule_trees = list(account["rule_trees"].values())
+    for name in RULE_TREE_SEARCHES:
+        if only and name not in only:
+            continue
+        results[f"rule_tree.{name}"] = run_rule_tree_search(name, rule_trees).to_dict()
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE) -> list[str]:
+    """Descriptions of the results that regressed against the baseline."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if previous.get("records", result.get("records")) != result.get("records"):
+            # The extractor's output changed, so its timings are not comparable
+            logger.warning(
+                "%s produced %s records, %s in the baseline",
+                name,
+                result.get("records"),
+                previous["records"],
+            )
+            continue
+        for field_name in LOWER_IS_BETTER:
+            old, new = previous.get(field_name), result.get(field_name)
+            if old and new is not None and new > old * (1 + tolerance):
+                regressions.append(f"{name} {field_name}: {old} -> {new}")
+        for field_name in HIGHER_IS_BETTER:
+            old, new = previous.get(field_name), result.get(field_name)
+            if old and new is not None and new < old / (1 + tolerance):
+                regressions.append(f"{name} {field_name}: {old} -> {new}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", choices=SCALES, default="default")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--only", action="append", help="extractor or rule tree search to run"
+    )
+    parser.add_argument("--baseline", type=Path, help="JSON baseline to compare with")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--out", type=Path, help="also write the results here")
+    args = parser.parse_args(argv)
+    # The extractors log every record they parse at INFO
+    logging.basicConfig(level=logging.WARNING)
+
+    results = run_benchmarks(SCALES[args.scale], seed=args.seed, only=args.only)
+    report = {
+        "scale": args.scale,
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    sys.stdout.write(json.dumps(results, indent=2) + "\n")
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.baseline is None:
+        return 0
+    if args.update_baseline or not args.baseline.exists():
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if (baseline["scale"], baseline["seed"]) != (args.scale, args.seed):
+        msg = (
+            f"The baseline was recorded at scale {baseline['scale']} with seed "
+            f"{baseline['seed']}, not {args.scale} with seed {args.seed}"
+        )
+        raise SystemExit(msg)
+    regressions = compare(results, baseline["results"], args.tolerance)
+    for regression in regressions:
+        sys.stderr.write(f"REGRESSION {regression}\n")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,706 @@
+"""
+A stand-in for the Akamai APIs the clients use, serving an account's data
+over HTTP so clients and extractors can be exercised at scale without a live
+account:
+
+    python -m nodestream_akamai.testing.fake_server --account account.json --port 8080
+
+The account is a dict (or JSON file) holding the API's view of each
+resource, under the keys listed in ACCOUNT_KEYS; missing keys are served as
+empty. Responses can be slowed down, throttled or failed per FaultConfig.
+"""
+
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from ..akamai_utils.metrics import endpoint_template
+from ..akamai_utils.rate_limiter import api_family
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_KEYS = (
+    # PAPI
+    "contracts",
+    "groups",
+    "properties",
+    "hostnames",
+    "rule_trees",  # keyed by "<propertyId>/<version>"
+    # Edge DNS and GTM
+    "edns_zones",
+    "recordsets",  # keyed by zone name
+    "gtm_domains",  # keyed by domain name
+    # AppSec
+    "appsec_configs",
+    "appsec_exports",  # keyed by "<configId>/<version>"
+    "hostname_coverage",
+    "discovered_apis",
+    "discovered_api_details",  # keyed by "<hostname>/<basePath>"
+    # Cloudlets
+    "cloudlet_v2_policies",
+    "cloudlet_v2_policy_versions",  # keyed by "<policyId>/<version>"
+    "cloudlet_v3_policies",
+    # CPS
+    "cps_enrollments",
+    "cps_deployments",  # keyed by enrollment id
+    # IAM
+    "iam_users",
+    "iam_api_clients",
+    "iam_api_credentials",  # keyed by client id
+    "iam_properties",
+    # Image and Video Manager
+    "ivm_policy_sets",
+    "ivm_policies",  # keyed by policy set id
+    # Contracts, CP codes, edge hostnames, EdgeWorkers, NetStorage, SiteShield
+    "contract_ids",
+    "contract_products",  # keyed by contract id
+    "cpcodes",
+    "edge_hostnames",
+    "edgeworkers",
+    "edgeworker_activations",  # keyed by EdgeWorker id
+    "netstorage_groups",
+    "netstorage_upload_accounts",
+    "siteshield_maps",
+)
+DEFAULT_HOSTNAMES_LIMIT = 999
+SERVER_ERROR_STATUSES = (500, 502, 503)
+
+
+def parse_latency(spec):
+    """
+    A latency distribution from a spec such as "fixed:0.05",
+    "uniform:0.01,0.2", "exponential:0.1", "normal:0.1,0.02" or
+    "lognormal:-2.5,0.6", as a function of a random.Random returning seconds.
+    """
+    kind, _, arguments = str(spec).partition(":")
+    values = [float(value) for value in arguments.split(",") if value]
+    match kind, values:
+        case "fixed", []:
+            return lambda _rng: 0.0
+        case "fixed", [seconds]:
+            return lambda _rng: seconds
+        case "uniform", [low, high]:
+            return lambda rng: rng.uniform(low, high)
+        case "exponential", [mean]:
+            return lambda rng: rng.expovariate(1 / mean) if mean else 0.0
+        case "normal", [mean, stddev]:
+            return lambda rng: max(0.0, rng.gauss(mean, stddev))
+        case "lognormal", [mu, sigma]:
+            return lambda rng: rng.lognormvariate(mu, sigma)
+    msg = f"Invalid latency distribution {spec!r}"
+    raise ValueError(msg)
+
+
+@dataclass(kw_only=True)
+class FaultConfig:
+    """
+    How the fake server misbehaves. latencies overrides latency per API
+    family, e.g. {"papi": "lognormal:-2.5,0.6"}; max_page_size caps every
+    paged listing to force pagination.
+    """
+
+    latency: str = "fixed:0"
+    latencies: dict[str, str] = field(default_factory=dict)
+    throttle_rate: float = 0.0
+    error_rate: float = 0.0
+    retry_after: float | None = 1.0
+    require_auth: bool = True
+    max_page_size: int | None = None
+    seed: int | None = None
+
+    @classmethod
+    def from_config(cls, config) -> "FaultConfig":
+        if config is None:
+            return cls()
+        if isinstance(config, FaultConfig):
+            return config
+        return cls(**config)
+
+
+class NotFoundError(Exception):
+    pass
+
+
+@dataclass(kw_only=True)
+class FakeRequest:
+    method: str
+    path: str
+    query: dict[str, str]
+    headers: Any
+    body: Any = None
+
+
+def _strip_prefix(identifier) -> str:
+    return re.sub(r"^[a-z]+_", "", str(identifier))
+
+
+def _first_int(query, name, default):
+    try:
+        return int(query.get(name, default))
+    except ValueError:
+        return default
+
+
+class FakeAkamaiApi:
+    """Answers requests from the account data, applying the configured faults."""
+
+    def __init__(self, account=None, faults=None):
+        self.account = account or {}
+        self.faults = FaultConfig.from_config(faults)
+        # Reproducible fault injection, not security sensitive
+        self.rng = random.Random(self.faults.seed)  # noqa: S311
+        self.rng_lock = threading.Lock()
+        self.default_latency = parse_latency(self.faults.latency)
+        self.family_latencies = {
+            family: parse_latency(spec)
+            for family, spec in self.faults.latencies.items()
+        }
+        self.requests = Counter()
+        self.injected = Counter()
+        self.bulk_searches = []
+        self.lock = threading.Lock()
+        self.routes = [
+            (method, re.compile(pattern + "$"), handler)
+            for method, pattern, handler in self._routes()
+        ]
+
+    def data(self, key, default=None):
+        value = self.account.get(key)
+        if value is None:
+            return [] if default is None else default
+        return value
+
+    def keyed(self, key, *parts):
+        value = self.data(key, {}).get("/".join(str(part) for part in parts))
+        if value is None:
+            raise NotFoundError
+        return value
+
+    def page_size(self, requested):
+        if self.faults.max_page_size is None:
+            return requested
+        return min(requested, self.faults.max_page_size)
+
+    def _routes(self):
+        return (
+            ("GET", r"/papi/v1/groups", self.papi_groups),
+            ("GET", r"/papi/v1/contracts", self.papi_contracts),
+            ("GET", r"/papi/v1/properties", self.papi_properties),
+            ("GET", r"/papi/v1/properties/([^/]+)", self.papi_property),
+            (
+                "GET",
+                r"/papi/v1/properties/([^/]+)/versions/(\d+)/rules",
+                self.papi_rule_tree,
+            ),
+            (
+                "GET",
+                r"/papi/v1/properties/([^/]+)/versions/(\d+)/hostnames",
+                self.papi_property_hostnames,
+            ),
+            ("GET", r"/papi/v1/hostnames", self.papi_hostnames),
+            ("POST", r"/papi/v1/bulk/rules-search-requests", self.papi_submit_search),
+            ("GET", r"/papi/v1/bulk/rules-search-requests/(\d+)", self.papi_search),
+            (
+                "POST",
+                r"/papi/v1/bulk/rules-search-requests-synch",
+                self.papi_search_synch,
+            ),
+            ("GET", r"/config-dns/v2/zones", self.listing("zones", "edns_zones")),
+            ("GET", r"/config-dns/v2/zones/([^/]+)/recordsets", self.edns_recordsets),
+            ("GET", r"/config-gtm/v1/domains", self.gtm_domains),
+            ("GET", r"/config-gtm/v1/domains/([^/]+)", self.lookup("gtm_domains")),
+            (
+                "GET",
+                r"/appsec/v1/hostname-coverage",
+                self.listing("hostnameCoverage", "hostname_coverage"),
+            ),
+            (
+                "GET",
+                r"/appsec/v1/configs",
+                self.listing("configurations", "appsec_configs"),
+            ),
+            (
+                "GET",
+                r"/appsec/v1/configs/(\d+)/versions/(\d+)/security-policies",
+                self.appsec_policies,
+            ),
+            (
+                "GET",
+                r"/appsec/v1/export/configs/(\d+)/versions/(\d+)",
+                self.lookup("appsec_exports"),
+            ),
+            (
+                "GET",
+                r"/appsec/v1/api-discovery",
+                self.listing("apis", "discovered_apis"),
+            ),
+            (
+                "GET",
+                r"/appsec/v1/api-discovery/host/([^/]+)/basepath/(.+)",
+                self.lookup("discovered_api_details"),
+            ),
+            ("GET", r"/cloudlets/api/v2/policies", self.cloudlets_v2_policies),
+            ("GET", r"/cloudlets/api/v2/policies/(\d+)", self.cloudlets_v2_policy),
+            (
+                "GET",
+                r"/cloudlets/api/v2/policies/(\d+)/versions/(\d+)",
+                self.lookup("cloudlet_v2_policy_versions"),
+            ),
+            ("GET", r"/cloudlets/v3/policies", self.cloudlets_v3_policies),
+            (
+                "GET",
+                r"/cps/v2/enrollments",
+                self.listing("enrollments", "cps_enrollments"),
+            ),
+            (
+                "GET",
+                r"/cps/v2/enrollments/(\d+)/deployments",
+                self.lookup("cps_deployments"),
+            ),
+            (
+                "GET",
+                r"/identity-management/v3/user-admin/ui-identities",
+                self.listing(None, "iam_users"),
+            ),
+            (
+                "GET",
+                r"/identity-management/v3/api-clients",
+                self.listing(None, "iam_api_clients"),
+            ),
+            (
+                "GET",
+                r"/identity-management/v3/api-clients/([^/]+)/credentials",
+                self.lookup("iam_api_credentials", default=[]),
+            ),
+            (
+                "GET",
+                r"/identity-management/v3/user-admin/properties",
+                self.listing(None, "iam_properties"),
+            ),
+            ("GET", r"/imaging/v2/policysets", self.listing(None, "ivm_policy_sets")),
+            ("GET", r"/imaging/v2/network/production/policies", self.ivm_policies),
+            (
+                "GET",
+                r"/contract-api/v1/contracts/identifiers",
+                self.listing(None, "contract_ids"),
+            ),
+            (
+                "GET",
+                r"/contract-api/v1/contracts/([^/]+)/products/summaries",
+                self.contract_products,
+            ),
+            ("GET", r"/cprg/v1/cpcodes", self.listing("cpcodes", "cpcodes")),
+            (
+                "GET",
+                r"/hapi/v1/edge-hostnames",
+                self.listing("edgeHostnames", "edge_hostnames"),
+            ),
+            (
+                "GET",
+                r"/edgeworkers/v1/ids",
+                self.listing("edgeWorkerIds", "edgeworkers"),
+            ),
+            (
+                "GET",
+                r"/edgeworkers/v1/ids/(\d+)/activations",
+                self.edgeworker_activations,
+            ),
+            (
+                "GET",
+                r"/storage/v1/storage-groups",
+                self.listing("items", "netstorage_groups"),
+            ),
+            (
+                "GET",
+                r"/storage/v1/upload-accounts",
+                self.listing("items", "netstorage_upload_accounts"),
+            ),
+            (
+                "GET",
+                r"/siteshield/v1/maps",
+                self.listing("siteShieldMaps", "siteshield_maps"),
+            ),
+        )
+
+    # Generic handlers
+
+    def listing(self, response_key, account_key):
+        def handler(_request):
+            items = self.data(account_key)
+            return items if response_key is None else {response_key: items}
+
+        return handler
+
+    def lookup(self, account_key, default=None):
+        def handler(_request, *parts):
+            try:
+                return self.keyed(account_key, *parts)
+            except NotFoundError:
+                if default is not None:
+                    return default
+                raise
+
+        return handler
+
+    # PAPI
+
+    def papi_groups(self, _request):
+        return {"groups": {"items": self.data("groups")}}
+
+    def papi_contracts(self, _request):
+        return {"contracts": {"items": self.data("contracts")}}
+
+    def _find_property(self, property_id):
+        for prop in self.data("properties"):
+            if _strip_prefix(prop["propertyId"]) == _strip_prefix(property_id):
+                return prop
+        raise NotFoundError
+
+    def papi_properties(self, request):
+        items = [
+            prop
+            for prop in self.data("properties")
+            if request.query.get("contractId") in (None, prop.get("contractId"))
+            and request.query.get("groupId") in (None, prop.get("groupId"))
+        ]
+        return {"properties": {"items": items}}
+
+    def papi_property(self, _request, property_id):
+        return {"properties": {"items": [self._find_property(property_id)]}}
+
+    def papi_rule_tree(self, _request, property_id, version):
+        prop = self._find_property(property_id)
+        return self.keyed("rule_trees", prop["propertyId"], version)
+
+    def papi_property_hostnames(self, _request, property_id, _version):
+        items = [
+            hostname
+            for hostname in self.data("hostnames")
+            if _strip_prefix(hostname["propertyId"]) == _strip_prefix(property_id)
+        ]
+        return {"hostnames": {"items": items}}
+
+    def papi_hostnames(self, request):
+        hostnames = self.data("hostnames")
+        offset = _first_int(request.query, "offset", 0)
+        limit = self.page_size(
+            _first_int(request.query, "limit", DEFAULT_HOSTNAMES_LIMIT)
+        )
+        page = {
+            "items": hostnames[offset : offset + limit],
+            "totalItems": len(hostnames),
+            "currentItemCount": len(hostnames[offset : offset + limit]),
+        }
+        if offset + limit < len(hostnames):
+            next_query = {**request.query, "offset": offset + limit, "limit": limit}
+            page["nextLink"] = f"/papi/v1/hostnames?{urlencode(next_query)}"
+        return {"hostnames": page}
+
+    def _bulk_search_results(self):
+        """One result per active property version, as a search of $.name finds."""
+        results = []
+        for prop in self.data("properties"):
+            active = {}
+            for network, field_name in (
+                ("productionStatus", "productionVersion"),
+                ("stagingStatus", "stagingVersion"),
+            ):
+                version = prop.get(field_name)
+                if version is not None:
+                    active.setdefault(version, {})[network] = "ACTIVE"
+            for version, statuses in active.items():
+                results.append(
+                    {
+                        "propertyId": prop["propertyId"],
+                        "propertyName": prop.get("propertyName"),
+                        "propertyVersion": version,
+                        "contractId": prop.get("contractId"),
+                        "groupId": prop.get("groupId"),
+                        "assetId": prop.get("assetId"),
+                        "isLatest": version == prop.get("latestVersion"),
+                        "matchLocations": ["/name"],
+                        **statuses,
+                    }
+                )
+        return results
+
+    def papi_submit_search(self, request):
+        with self.lock:
+            self.bulk_searches.append(request.body)
+            search_id = len(self.bulk_searches)
+        return 202, {
+            "bulkSearchId": search_id,
+            "bulkSearchLink": f"/papi/v1/bulk/rules-search-requests/{search_id}",
+        }
+
+    def papi_search(self, _request, search_id):
+        if not 0 < int(search_id) <= len(self.bulk_searches):
+            raise NotFoundError
+        return {
+            "bulkSearchId": int(search_id),
+            "searchSubmitStatus": "COMPLETE",
+            "results": self._bulk_search_results(),
+        }
+
+    def papi_search_synch(self, _request):
+        return {
+            "searchSubmitStatus": "COMPLETE",
+            "results": self._bulk_search_results(),
+        }
+
+    # Edge DNS, GTM and AppSec
+
+    def edns_recordsets(self, _request, zone):
+        recordsets = self.data("recordsets", {})
+        if zone not in recordsets:
+            raise NotFoundError
+        return {"recordsets": recordsets[zone]}
+
+    def gtm_domains(self, _request):
+        domains = self.data("gtm_domains", {})
+        return {"items": [{"name": name} for name in domains]}
+
+    def appsec_policies(self, _request, config_id, version):
+        export = self.keyed("appsec_exports", config_id, version)
+        policies = [
+            {"policyId": policy.get("id"), "policyName": policy.get("name")}
+            for policy in export.get("securityPolicies", [])
+        ]
+        return {"policies": policies}
+
+    # Cloudlets
+
+    def cloudlets_v2_policies(self, request):
+        policies = self.data("cloudlet_v2_policies")
+        if "cloudletId" in request.query:
+            policies = [
+                policy
+                for policy in policies
+                if str(policy.get("cloudletId")) == request.query["cloudletId"]
+            ]
+        offset = _first_int(request.query, "offset", 0)
+        size = self.page_size(_first_int(request.query, "pageSize", 1000))
+        return policies[offset : offset + size]
+
+    def cloudlets_v2_policy(self, _request, policy_id):
+        for policy in self.data("cloudlet_v2_policies"):
+            if str(policy.get("policyId")) == policy_id:
+                return policy
+        raise NotFoundError
+
+    def cloudlets_v3_policies(self, request):
+        policies = self.data("cloudlet_v3_policies")
+        page = _first_int(request.query, "page", 0)
+        size = max(1, self.page_size(_first_int(request.query, "size", 1000)))
+        total_pages = -(-len(policies) // size)
+        return {
+            "content": policies[page * size : (page + 1) * size],
+            "page": {
+                "number": page,
+                "size": size,
+                "totalElements": len(policies),
+                "totalPages": total_pages,
+            },
+        }
+
+    # IVM, contracts and EdgeWorkers
+
+    def ivm_policies(self, request):
+        policy_set = request.headers.get("Policy-Set")
+        default = {"items": [], "itemKind": "POLICY", "totalItems": 0}
+        return self.data("ivm_policies", {}).get(policy_set, default)
+
+    def contract_products(self, _request, contract_id):
+        products = self.data("contract_products", {}).get(contract_id, [])
+        return {"products": {"contractId": contract_id, "marketing-products": products}}
+
+    def edgeworker_activations(self, _request, edgeworker_id):
+        activations = self.data("edgeworker_activations", {}).get(edgeworker_id, [])
+        return {"activations": activations}
+
+    # Serving
+
+    def _random(self):
+        with self.rng_lock:
+            return self.rng.random()
+
+    def latency(self, family) -> float:
+        distribution = self.family_latencies.get(family, self.default_latency)
+        with self.rng_lock:
+            return distribution(self.rng)
+
+    def handle(self, method, target, headers, body=None):
+        """Returns the status, extra headers and JSON body of the response."""
+        url = urlparse(target)
+        path = url.path
+        request = FakeRequest(
+            method=method,
+            path=path,
+            query=dict(parse_qsl(url.query)),
+            headers=headers,
+            body=body,
+        )
+        with self.lock:
+            self.requests[f"{method} {endpoint_template(path)}"] += 1
+
+        delay = self.latency(api_family(path))
+        if delay > 0:
+            time.sleep(delay)
+
+        authorization = headers.get("Authorization") or ""
+        if self.faults.require_auth and not authorization.startswith("EG1-HMAC-SHA256"):
+            return 401, {}, {"title": "Not authorized", "status": 401}
+        if self._random() < self.faults.throttle_rate:
+            with self.lock:
+                self.injected[429] += 1
+            extra = {}
+            if self.faults.retry_after is not None:
+                extra["Retry-After"] = str(self.faults.retry_after)
+            return 429, extra, {"title": "Too many requests", "status": 429}
+        if self._random() < self.faults.error_rate:
+            with self.rng_lock:
+                status = self.rng.choice(SERVER_ERROR_STATUSES)
+            with self.lock:
+                self.injected[status] += 1
+            return status, {}, {"title": "Injected server error", "status": status}
+
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if route_method != method or match is None:
+                continue
+            try:
+                result = handler(request, *match.groups())
+            except NotFoundError:
+                break
+            if isinstance(result, tuple):
+                status, result = result
+                return status, {}, result
+            return 200, {}, result
+        return 404, {}, {"title": "Not found", "status": 404, "instance": path}
+
+
+def _handler_class(api: FakeAkamaiApi):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, which Nagle would delay
+        disable_nagle_algorithm = True
+
+        def respond(self, method):
+            body = None
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                body = json.loads(self.rfile.read(length))
+            status, headers, payload = api.handle(method, self.path, self.headers, body)
+            content = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(content)
+
+        def do_GET(self):
+            self.respond("GET")
+
+        def do_POST(self):
+            self.respond("POST")
+
+        def log_message(self, format, *args):  # noqa: A002
+            logger.debug("%s %s", self.address_string(), format % args)
+
+    return Handler
+
+
+class FakeAkamaiServer:
+    """
+    Serves a FakeAkamaiApi on a local port from a background thread. Use it
+    as a context manager and point clients at its url.
+    """
+
+    def __init__(self, account=None, faults=None, host="127.0.0.1", port=0):
+        self.api = FakeAkamaiApi(account, faults)
+        self.server = ThreadingHTTPServer((host, port), _handler_class(self.api))
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--account", help="JSON file holding the account's data")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", default="fixed:0")
+    parser.add_argument(
+        "--family-latency",
+        action="append",
+        default=[],
+        metavar="FAMILY=SPEC",
+        help="latency of one API family, e.g. papi=lognormal:-2.5,0.6",
+    )
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--max-page-size", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--no-auth", action="store_true")
+    args = parser.parse_args(argv)
+
+    account = {}
+    if args.account:
+        with open(args.account) as file:
+            account = json.load(file)
+    faults = FaultConfig(
+        latency=args.latency,
+        latencies=dict(spec.split("=", 1) for spec in args.family_latency),
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        require_auth=not args.no_auth,
+        max_page_size=args.max_page_size,
+        seed=args.seed,
+    )
+    server = FakeAkamaiServer(account, faults, host=args.host, port=args.port)
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Serving fake Akamai APIs on %s", server.url)
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
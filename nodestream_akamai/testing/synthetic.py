@@ -0,0 +1,453 @@
+"""
+Seeded generator of account-scale data in the fake server's account format,
+for benchmarks and for stress testing the parsers against more than the
+hand written fixtures cover:
+
+    python -m nodestream_akamai.testing.synthetic --properties 5000 --out account.json
+
+The same seed and AccountShape always produce the same account.
+"""
+
+import argparse
+import ipaddress
+import json
+import random
+from dataclasses import dataclass, fields
+
+RULE_FORMAT = "v2024-01-09"
+MATCH_OPERATORS = ("IS_ONE_OF", "MATCHES_ONE_OF")
+NEGATIVE_OPERATORS = ("IS_NOT_ONE_OF", "DOES_NOT_MATCH_ONE_OF")
+GTM_PROPERTY_TYPES = (
+    "weighted-round-robin",
+    "weighted-hashed",
+    "ranked-failover",
+    "failover",
+    "performance",
+    "static",
+)
+ATTACK_GROUPS = ("POLICY", "WAT", "PROTOCOL", "SQL", "XSS", "CMD", "LFI", "RFI")
+ATTACK_GROUP_ACTIONS = ("alert", "deny", "none")
+WORDS = (
+    "api",
+    "app",
+    "assets",
+    "cdn",
+    "checkout",
+    "edge",
+    "img",
+    "login",
+    "media",
+    "shop",
+    "static",
+    "store",
+    "video",
+    "web",
+    "www",
+)
+
+
+@dataclass(kw_only=True)
+class AccountShape:
+    """
+    How large a generated account is. Rule trees are rule_tree_depth levels
+    deep with up to rule_tree_width children per rule; origin_rate and
+    criteria_rate are the chance a rule has an origin behavior or criteria.
+    """
+
+    properties: int = 100
+    hostnames_per_property: int = 3
+    rule_tree_depth: int = 4
+    rule_tree_width: int = 4
+    origin_rate: float = 0.3
+    criteria_rate: float = 0.6
+    criteria_values: int = 3
+    zones: int = 10
+    recordsets_per_zone: int = 1000
+    gtm_domains: int = 5
+    gtm_properties_per_domain: int = 20
+    traffic_targets_per_property: int = 10
+    appsec_configs: int = 5
+    policies_per_appsec_config: int = 100
+    cloudlet_policies: int = 20
+    match_rules_per_policy: int = 500
+
+    @classmethod
+    def from_config(cls, config) -> "AccountShape":
+        if config is None:
+            return cls()
+        if isinstance(config, AccountShape):
+            return config
+        return cls(**config)
+
+
+def _label(rng) -> str:
+    return f"{rng.choice(WORDS)}{rng.randrange(100000)}"
+
+
+def _ipv4(rng) -> str:
+    return str(ipaddress.IPv4Address(rng.randrange(0x0B000000, 0xDF000000)))
+
+
+def _ipv6(rng) -> str:
+    return str(ipaddress.IPv6Address((0x2001_0DB8 << 96) | rng.getrandbits(96)))
+
+
+def _origin_behavior(rng) -> dict:
+    if rng.random() < 0.2:
+        return {
+            "name": "origin",
+            "options": {
+                "originType": "NET_STORAGE",
+                "netStorage": {
+                    "downloadDomainName": f"{_label(rng)}.download.akamai.com",
+                    "cpCode": rng.randrange(100000, 999999),
+                },
+            },
+        }
+    return {
+        "name": "origin",
+        "options": {
+            "originType": "CUSTOMER",
+            "hostname": f"origin-{_label(rng)}.example.com",
+            "forwardHostHeader": "REQUEST_HOST_HEADER",
+        },
+    }
+
+
+def _criterion(rng, shape: AccountShape) -> dict:
+    name = rng.choice(("path", "path", "hostname", "cloudletsOrigin"))
+    if name == "cloudletsOrigin":
+        return {
+            "name": name,
+            "options": {"originId": f"co_{rng.randrange(1000)}"},
+        }
+    operators = MATCH_OPERATORS if rng.random() < 0.8 else NEGATIVE_OPERATORS
+    count = rng.randint(1, shape.criteria_values)
+    if name == "path":
+        values = [f"/{_label(rng)}/*" for _ in range(count)]
+    else:
+        values = [f"{_label(rng)}.example.com" for _ in range(count)]
+    return {
+        "name": name,
+        "options": {"matchOperator": rng.choice(operators), "values": values},
+    }
+
+
+def _other_behavior(rng) -> dict:
+    match rng.randrange(5):
+        case 0:
+            return {
+                "name": "cpCode",
+                "options": {"value": {"id": rng.randrange(100000, 999999)}},
+            }
+        case 1:
+            return {
+                "name": "edgeRedirector",
+                "options": {
+                    "enabled": True,
+                    "cloudletPolicy": {"id": rng.randrange(1000, 99999)},
+                },
+            }
+        case 2:
+            return {
+                "name": "siteShield",
+                "options": {"ssmap": {"value": f"ss{rng.randrange(100)}.akamai.net"}},
+            }
+        case 3:
+            return {
+                "name": "edgeWorker",
+                "options": {"enabled": True, "edgeWorkerId": str(rng.randrange(9999))},
+            }
+    return {"name": "caching", "options": {"behavior": "MAX_AGE", "ttl": "1d"}}
+
+
+def generate_rules(rng, shape: AccountShape, depth=None, name="default") -> dict:
+    """A rule with nested children, depth levels deep."""
+    depth = shape.rule_tree_depth if depth is None else depth
+    rule = {
+        "name": name,
+        "behaviors": [],
+        "criteria": [],
+        "criteriaMustSatisfy": rng.choice(("all", "any")),
+        "children": [],
+    }
+    if name == "default" or rng.random() < shape.origin_rate:
+        rule["behaviors"].append(_origin_behavior(rng))
+    if rng.random() < 0.5:
+        rule["behaviors"].append(_other_behavior(rng))
+    if name != "default" and rng.random() < shape.criteria_rate:
+        rule["criteria"] = [_criterion(rng, shape) for _ in range(rng.randint(1, 2))]
+    if depth > 1:
+        for index in range(rng.randint(1, shape.rule_tree_width)):
+            rule["children"].append(
+                generate_rules(rng, shape, depth - 1, name=f"{name}/{index}")
+            )
+    return rule
+
+
+def generate_rule_tree(rng, shape: AccountShape, prop, version) -> dict:
+    return {
+        "accountId": "act_SYNTHETIC",
+        "contractId": prop["contractId"],
+        "groupId": prop["groupId"],
+        "propertyId": prop["propertyId"],
+        "propertyName": prop["propertyName"],
+        "propertyVersion": version,
+        "ruleFormat": RULE_FORMAT,
+        "rules": generate_rules(rng, shape),
+    }
+
+
+def generate_recordsets(rng, zone, count) -> list[dict]:
+    """count recordsets of zone, mostly A, AAAA and CNAME records."""
+    recordsets = [
+        {
+            "name": zone,
+            "type": "NS",
+            "ttl": 86400,
+            "rdata": [f"a{index}-64.akam.net." for index in range(1, 5)],
+        }
+    ]
+    for index in range(count - 1):
+        name = f"{_label(rng)}-{index}.{zone}"
+        kind = rng.choices(("A", "AAAA", "CNAME", "TXT", "CAA"), (5, 2, 4, 1, 1))[0]
+        match kind:
+            case "A":
+                rdata = [_ipv4(rng) for _ in range(rng.randint(1, 4))]
+            case "AAAA":
+                rdata = [_ipv6(rng) for _ in range(rng.randint(1, 2))]
+            case "CNAME":
+                rdata = [f"{_label(rng)}.edgekey.net."]
+            case "TXT":
+                rdata = [f'"v=spf1 include:{_label(rng)}.example.com ~all"']
+            case _:
+                rdata = ['0 issue "letsencrypt.org"']
+        recordsets.append(
+            {
+                "name": name,
+                "type": kind,
+                "ttl": rng.choice((60, 300, 3600)),
+                "rdata": rdata,
+            }
+        )
+    return recordsets
+
+
+def generate_gtm_domain(rng, shape: AccountShape, name) -> dict:
+    properties = []
+    for index in range(shape.gtm_properties_per_domain):
+        traffic_targets = [
+            {
+                "datacenterId": 3000 + target,
+                "enabled": True,
+                "weight": rng.randint(0, 100),
+                "servers": [_ipv4(rng) for _ in range(rng.randint(0, 3))],
+                "handoutCName": (
+                    f"{_label(rng)}.example.com" if rng.random() < 0.5 else None
+                ),
+            }
+            for target in range(shape.traffic_targets_per_property)
+        ]
+        properties.append(
+            {
+                "name": f"{_label(rng)}-{index}",
+                "type": rng.choice(GTM_PROPERTY_TYPES),
+                "trafficTargets": traffic_targets,
+                "staticRRSets": [
+                    {"type": "A", "ttl": 300, "rdata": [_ipv4(rng)]}
+                    for _ in range(rng.randint(0, 2))
+                ],
+            }
+        )
+    return {
+        "name": name,
+        "type": "full",
+        "loadImbalancePercentage": 10.0,
+        "loadFeedback": False,
+        "cnameCoalescingEnabled": False,
+        "properties": properties,
+    }
+
+
+def generate_appsec_export(rng, shape: AccountShape, config) -> dict:
+    policies = []
+    for index in range(shape.policies_per_appsec_config):
+        policy = {"id": f"pol_{config['id']}_{index}", "name": f"Policy {index}"}
+        if rng.random() < 0.9:
+            policy["webApplicationFirewall"] = {
+                "attackGroupActions": [
+                    {"group": group, "action": rng.choice(ATTACK_GROUP_ACTIONS)}
+                    for group in ATTACK_GROUPS
+                ]
+            }
+        policies.append(policy)
+    return {
+        "configId": config["id"],
+        "configName": config["name"],
+        "version": config["productionVersion"],
+        "securityPolicies": policies,
+    }
+
+
+def generate_match_rules(rng, count) -> list[dict]:
+    """Edge Redirector match rules, matching on URLs or hostnames."""
+    rules = []
+    for index in range(count):
+        redirect_url = f"https://{_label(rng)}.example.com/{_label(rng)}"
+        if rng.random() < 0.5:
+            rules.append(
+                {
+                    "name": f"rule {index}",
+                    "type": "erMatchRule",
+                    "matchURL": f"https://{_label(rng)}.example.com/{_label(rng)}",
+                    "redirectURL": redirect_url,
+                    "statusCode": 301,
+                }
+            )
+            continue
+        matches = [
+            {
+                "matchType": "hostname",
+                "matchValue": f"{_label(rng)}.example.com",
+                "matchOperator": "equals",
+            }
+        ]
+        if rng.random() < 0.1:
+            matches.append(
+                {
+                    "matchType": "clientip",
+                    "matchValue": _ipv4(rng),
+                    "matchOperator": "equals",
+                }
+            )
+        rules.append(
+            {
+                "name": f"rule {index}",
+                "type": "erMatchRule",
+                "matchURL": None,
+                "matches": matches,
+                "redirectURL": redirect_url,
+                "statusCode": 302,
+            }
+        )
+    return rules
+
+
+def _generate_properties(rng, shape: AccountShape, account):
+    for index in range(shape.properties):
+        property_id = f"prp_{100000 + index}"
+        prop = {
+            "propertyId": property_id,
+            "propertyName": f"{_label(rng)}-{index}.example.com",
+            "contractId": f"ctr_C-{index % 3}",
+            "groupId": f"grp_{index % 50}",
+            "assetId": f"aid_{200000 + index}",
+            "latestVersion": rng.randint(1, 20),
+        }
+        prop["productionVersion"] = rng.randint(1, prop["latestVersion"])
+        prop["stagingVersion"] = prop["latestVersion"]
+        account["properties"].append(prop)
+        for version in {prop["productionVersion"], prop["stagingVersion"]}:
+            account["rule_trees"][f"{property_id}/{version}"] = generate_rule_tree(
+                rng, shape, prop, version
+            )
+        for hostname in range(shape.hostnames_per_property):
+            account["hostnames"].append(
+                {
+                    "cnameFrom": f"host{hostname}.{prop['propertyName']}",
+                    "cnameTo": f"{prop['propertyName']}.edgekey.net",
+                    "cnameType": "EDGE_HOSTNAME",
+                    "propertyId": property_id,
+                    "propertyName": prop["propertyName"],
+                    "contractId": prop["contractId"],
+                    "groupId": prop["groupId"],
+                    "productionCnameTo": f"{prop['propertyName']}.edgekey.net",
+                }
+            )
+
+
+def generate_account(shape=None, seed=0) -> dict:
+    """An account for FakeAkamaiApi, the same for the same shape and seed."""
+    shape = AccountShape.from_config(shape)
+    # Reproducible test data, not security sensitive
+    rng = random.Random(seed)  # noqa: S311
+    account = {"properties": [], "hostnames": [], "rule_trees": {}}
+    _generate_properties(rng, shape, account)
+
+    zones = [f"zone{index}.example.com" for index in range(shape.zones)]
+    account["edns_zones"] = [{"zone": zone, "type": "PRIMARY"} for zone in zones]
+    account["recordsets"] = {
+        zone: generate_recordsets(rng, zone, shape.recordsets_per_zone)
+        for zone in zones
+    }
+
+    account["gtm_domains"] = {}
+    for index in range(shape.gtm_domains):
+        name = f"domain{index}.akadns.net"
+        account["gtm_domains"][name] = generate_gtm_domain(rng, shape, name)
+
+    account["appsec_configs"] = []
+    account["appsec_exports"] = {}
+    for index in range(shape.appsec_configs):
+        config = {
+            "id": 10000 + index,
+            "name": f"config {index}",
+            "productionVersion": 1,
+        }
+        account["appsec_configs"].append(config)
+        account["appsec_exports"][f"{config['id']}/1"] = generate_appsec_export(
+            rng, shape, config
+        )
+
+    account["cloudlet_v2_policies"] = []
+    account["cloudlet_v2_policy_versions"] = {}
+    for index in range(shape.cloudlet_policies):
+        policy_id = 50000 + index
+        account["cloudlet_v2_policies"].append(
+            {
+                "policyId": policy_id,
+                "cloudletId": 0,
+                "groupId": 1000 + index % 10,
+                "name": f"redirects_{index}",
+                "description": None,
+                "createdBy": "synthetic",
+                "lastModifiedBy": "synthetic",
+                "activations": [
+                    {
+                        "network": "prod",
+                        "policyInfo": {
+                            "status": "active",
+                            "version": 1,
+                            "activatedBy": "synthetic",
+                        },
+                    }
+                ],
+            }
+        )
+        account["cloudlet_v2_policy_versions"][f"{policy_id}/1"] = {
+            "policyId": policy_id,
+            "version": 1,
+            "matchRules": generate_match_rules(rng, shape.match_rules_per_policy),
+        }
+    return account
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--out", required=True, help="JSON file to write")
+    parser.add_argument("--seed", type=int, default=0)
+    for shape_field in fields(AccountShape):
+        parser.add_argument(
+            f"--{shape_field.name.replace('_', '-')}",
+            type=type(shape_field.default),
+            default=shape_field.default,
+        )
+    args = vars(parser.parse_args(argv))
+    out, seed = args.pop("out"), args.pop("seed")
+    account = generate_account(AccountShape(**args), seed=seed)
+    with open(out, "w") as file:
+        json.dump(account, file)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,10 @@
 import logging
 
-from nodestream.pipeline.extractors import Extractor
-
 from ..akamai_utils.appsec_client import AkamaiAppSecClient
+from ..akamai_utils.extractor import FATAL_ERRORS, AkamaiExtractor
 
 
-class AkamaiWafExtractor(Extractor):
+class AkamaiWafExtractor(AkamaiExtractor):
     def __init__(self, **akamai_client_kwargs) -> None:
         self.client = AkamaiAppSecClient(**akamai_client_kwargs)
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -26,10 +25,11 @@ class AkamaiWafExtractor(Extractor):
             "OUTBOUND": "Total Outbound",
         }
 
-        for config in self.client.list_appsec_configs():
+        configs = self.client.list_appsec_configs()
+        for config in self.skip_completed(configs, key=lambda config: config["id"]):
             try:
                 if "productionVersion" in config:
-                    export = self.client.export_appsec_config(
+                    security_policies = self.client.list_exported_security_policies(
                         config_id=config["id"],
                         config_version=config["productionVersion"],
                     )
@@ -43,7 +43,7 @@ class AkamaiWafExtractor(Extractor):
                         "deeplink": f'{deeplink_prefix}{config["id"]}/versions/{config["productionVersion"]}',
                     }
                     # Iterate through policies and add custom dict to output
-                    for policy in export["securityPolicies"]:
+                    for policy in security_policies:
                         output_policy = {
                             "policyId": policy["id"],
                             "policyName": policy["name"],
@@ -68,6 +68,10 @@ class AkamaiWafExtractor(Extractor):
                     self.logger.warning(
                         "No production version exists for config %s.", config["name"]
                     )
+                # Failed configs are retried when the run resumes
+                self.mark_completed(config["id"])
+            except FATAL_ERRORS:
+                raise
             except Exception as err:
                 self.logger.exception(
                     "Failed to export appsec configuration %s: %s",
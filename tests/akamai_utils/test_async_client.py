@@ -0,0 +1,103 @@
+import json
+
+import httpx
+import pytest
+
+from nodestream_akamai.akamai_utils.async_client import AsyncAkamaiApiClient
+from nodestream_akamai.akamai_utils.client import AkamaiAuthenticationError
+from nodestream_akamai.akamai_utils.retry import RetryPolicy
+
+
+def mock_session(client, *responses):
+    requests = []
+    queue = list(responses)
+
+    def handler(request):
+        requests.append(request)
+        return queue.pop(0)
+
+    client.session = httpx.AsyncClient(
+        auth=client.session.auth, transport=httpx.MockTransport(handler)
+    )
+    return requests
+
+
+@pytest.fixture
+def client():
+    client = AsyncAkamaiApiClient(
+        base_url="https://fake.example.com",
+        client_token="ctoken",
+        client_secret="secret",
+        access_token="atoken",
+        account_key="switch-key",
+    )
+    client.retry_policy = RetryPolicy(base_delay=0, throttle_base_delay=0, budget=None)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_get_signs_request_and_adds_account_key(client):
+    requests = mock_session(client, httpx.Response(200, json={"key": "value"}))
+
+    assert await client._get_api_from_relative_path("example", params={"a": "b"}) == {
+        "key": "value"
+    }
+    assert requests[0].url.params["accountSwitchKey"] == "switch-key"
+    assert requests[0].url.params["a"] == "b"
+    assert (
+        requests[0]
+        .headers["Authorization"]
+        .startswith("EG1-HMAC-SHA256 client_token=ctoken;access_token=atoken;")
+    )
+
+
+@pytest.mark.asyncio
+async def test_429_get_response(client):
+    requests = mock_session(
+        client,
+        httpx.Response(429),
+        httpx.Response(429),
+        httpx.Response(200, json={"key": "value"}),
+    )
+
+    assert await client._get_api_from_relative_path("example") == {"key": "value"}
+    assert len(requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_401_get_response_with_body(client):
+    error_body = '{"error": "Invalid credentials", "code": "AUTH_ERROR"}'
+    mock_session(client, httpx.Response(401, text=error_body))
+
+    with pytest.raises(AkamaiAuthenticationError) as exc_info:
+        await client._get_api_from_relative_path("example")
+
+    assert "Authentication failed for 'GET https://fake.example.com/example'" in str(
+        exc_info.value
+    )
+    assert error_body in str(exc_info.value)
+    assert exc_info.value.response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_post_sends_json_body(client):
+    requests = mock_session(client, httpx.Response(200, json={"ok": True}))
+
+    assert await client._post_api_from_relative_path("example", {"test": "data"}) == {
+        "ok": True
+    }
+    assert requests[0].method == "POST"
+    assert json.loads(requests[0].content) == {"test": "data"}
+    assert requests[0].headers["Content-Type"] == "application/json"
+
+
+@pytest.mark.asyncio
+async def test_401_post_response(client):
+    mock_session(client, httpx.Response(401))
+
+    with pytest.raises(AkamaiAuthenticationError) as exc_info:
+        await client._post_api_from_relative_path("example", {})
+
+    assert "Authentication failed for 'POST https://fake.example.com/example'" in str(
+        exc_info.value
+    )
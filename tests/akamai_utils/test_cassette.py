@@ -0,0 +1,216 @@
+import gzip
+import json
+
+import httpx
+import pytest
+import responses
+from requests import HTTPError
+
+from nodestream_akamai.akamai_utils.async_client import AsyncAkamaiApiClient
+from nodestream_akamai.akamai_utils.cassette import (
+    CassetteConfig,
+    CassetteMissError,
+    get_cassette,
+    recording_key,
+    reset_cassettes,
+)
+from nodestream_akamai.akamai_utils.client import AkamaiApiClient
+from nodestream_akamai.akamai_utils.retry import RetryPolicy
+from nodestream_akamai.edns.edns import AkamaiEdnsExtractor
+from nodestream_akamai.testing import AccountShape, FakeAkamaiServer, generate_account
+
+CREDENTIALS = {
+    "client_token": "ctoken",
+    "client_secret": "secret",
+    "access_token": "atoken",
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_cassettes():
+    reset_cassettes()
+    yield
+    reset_cassettes()
+
+
+def make_client(path, mode, base_url="https://fake.example.com", **kwargs):
+    client = AkamaiApiClient(
+        base_url=base_url,
+        cassette={"path": str(path), "mode": mode},
+        coalesce_requests=False,
+        **CREDENTIALS,
+        **kwargs,
+    )
+    client.retry_policy = RetryPolicy(base_delay=0, throttle_base_delay=0, budget=None)
+    return client
+
+
+def test_recording_key_ignores_host_and_query_order():
+    assert recording_key(
+        "get", "https://a.example.com/papi/v1/groups?b=2&a=1"
+    ) == recording_key("GET", "https://b.example.com/papi/v1/groups?a=1", {"b": 2})
+    assert recording_key("GET", "/x", headers={"Policy-Set": "a"}) != recording_key(
+        "GET", "/x", headers={"Policy-Set": "b"}
+    )
+
+
+def test_cassette_config_rejects_unknown_mode():
+    with pytest.raises(ValueError, match="Cassette mode"):
+        CassetteConfig(path="snapshot", mode="rewind")
+
+
+@responses.activate
+def test_record_then_replay_without_network(tmp_path):
+    responses.get(
+        "https://fake.example.com/papi/v1/groups", json={"groups": {"items": [1]}}
+    )
+    responses.post("https://fake.example.com/papi/v1/search", json={"found": True})
+    recorder = make_client(tmp_path, "record")
+    assert recorder._get_api_from_relative_path("/papi/v1/groups") == {
+        "groups": {"items": [1]}
+    }
+    assert recorder._post_api_from_relative_path("/papi/v1/search", {"q": 1}) == {
+        "found": True
+    }
+
+    index = [json.loads(line) for line in (tmp_path / "index.jsonl").open()]
+    assert [entry["url"] for entry in index] == ["/papi/v1/groups", "/papi/v1/search"]
+    body = next((tmp_path / "bodies").glob("*/*.json.gz"))
+    assert json.loads(gzip.decompress(body.read_bytes())) in (
+        {"groups": {"items": [1]}},
+        {"found": True},
+    )
+
+    reset_cassettes()
+    responses.reset()
+    replayer = make_client(tmp_path, "replay", base_url="https://other.example.com")
+    assert replayer._get_api_from_relative_path("/papi/v1/groups") == {
+        "groups": {"items": [1]}
+    }
+    assert replayer._post_api_from_relative_path("/papi/v1/search", {"q": 1}) == {
+        "found": True
+    }
+    assert len(responses.calls) == 0
+    assert replayer.metrics.snapshot()["GET /papi/v1/groups"]["requests"] == 1
+    with pytest.raises(CassetteMissError):
+        replayer._post_api_from_relative_path("/papi/v1/search", {"q": 2})
+
+
+@responses.activate
+def test_repeated_requests_replay_in_order(tmp_path):
+    path = "https://fake.example.com/papi/v1/bulk/1"
+    responses.get(path, json={"status": "IN_PROGRESS"})
+    responses.get(path, json={"status": "COMPLETE"})
+    recorder = make_client(tmp_path, "record")
+    for _ in range(2):
+        recorder._get_api_from_relative_path("/papi/v1/bulk/1")
+
+    reset_cassettes()
+    replayer = make_client(tmp_path, "replay")
+    statuses = [
+        replayer._get_api_from_relative_path("/papi/v1/bulk/1")["status"]
+        for _ in range(3)
+    ]
+    assert statuses == ["IN_PROGRESS", "COMPLETE", "COMPLETE"]
+
+
+@responses.activate
+def test_failed_responses_replay_as_errors(tmp_path):
+    responses.get("https://fake.example.com/missing", status=404, json={})
+    recorder = make_client(tmp_path, "record")
+    with pytest.raises(HTTPError, match="Unexpected status"):
+        recorder._get_api_from_relative_path("/missing")
+
+    reset_cassettes()
+    responses.reset()
+    replayer = make_client(tmp_path, "replay")
+    with pytest.raises(HTTPError, match="Unexpected status"):
+        replayer._get_api_from_relative_path("/missing")
+    assert replayer.metrics.snapshot()["GET /missing"]["requests"] == 1
+
+
+@responses.activate
+def test_streamed_responses_are_recorded_whole(tmp_path):
+    items = [{"name": f"rs{index}"} for index in range(50)]
+    responses.get(
+        "https://fake.example.com/zones/z/recordsets", json={"recordsets": items}
+    )
+    recorder = make_client(tmp_path, "record", stream_json=True)
+    assert (
+        list(
+            recorder._get_items_from_relative_path("/zones/z/recordsets", "recordsets")
+        )
+        == items
+    )
+
+    reset_cassettes()
+    replayer = make_client(tmp_path, "replay", stream_json=True)
+    assert (
+        list(
+            replayer._get_items_from_relative_path("/zones/z/recordsets", "recordsets")
+        )
+        == items
+    )
+
+
+def test_replay_needs_a_recording(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        make_client(tmp_path / "empty", "replay")
+
+
+def test_cassette_is_shared_in_one_mode(tmp_path):
+    config = CassetteConfig(path=str(tmp_path), mode="record")
+    assert get_cassette(config) is get_cassette(config)
+    with pytest.raises(ValueError, match="already open"):
+        get_cassette(CassetteConfig(path=str(tmp_path), mode="replay"))
+
+
+@pytest.mark.asyncio
+async def test_async_client_records_and_replays(tmp_path):
+    recorder = AsyncAkamaiApiClient(
+        base_url="https://fake.example.com",
+        cassette={"path": str(tmp_path), "mode": "record"},
+        **CREDENTIALS,
+    )
+    await recorder.session.aclose()
+    recorder.session = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda _request: httpx.Response(200, json={"configurations": []})
+        )
+    )
+    assert await recorder._get_api_from_relative_path("/appsec/v1/configs") == {
+        "configurations": []
+    }
+    await recorder.aclose()
+
+    reset_cassettes()
+    async with AsyncAkamaiApiClient(
+        base_url="https://fake.example.com",
+        cassette={"path": str(tmp_path), "mode": "replay"},
+        **CREDENTIALS,
+    ) as replayer:
+        assert await replayer._get_api_from_relative_path("/appsec/v1/configs") == {
+            "configurations": []
+        }
+
+
+@pytest.mark.asyncio
+async def test_extractor_reruns_from_snapshot(tmp_path):
+    account = generate_account(
+        AccountShape(properties=0, zones=3, recordsets_per_zone=20, gtm_domains=0)
+    )
+    cassette = {"path": str(tmp_path), "mode": "record"}
+    with FakeAkamaiServer(account) as server:
+        extractor = AkamaiEdnsExtractor(
+            base_url=server.url, cassette=cassette, **CREDENTIALS
+        )
+        recorded = [record async for record in extractor.extract_records()]
+
+    reset_cassettes()
+    # The server is gone, every response comes from the snapshot
+    extractor = AkamaiEdnsExtractor(
+        base_url=server.url, cassette={**cassette, "mode": "replay"}, **CREDENTIALS
+    )
+    replayed = [record async for record in extractor.extract_records()]
+    assert replayed == recorded
+    assert len(replayed) == 3
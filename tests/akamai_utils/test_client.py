@@ -1,10 +1,13 @@
 import pytest
 import responses
+from requests import HTTPError
+from requests.exceptions import ConnectionError as RequestsConnectionError
 
 from nodestream_akamai.akamai_utils.client import (
     AkamaiApiClient,
     AkamaiAuthenticationError,
 )
+from nodestream_akamai.akamai_utils.retry import RetryBudget, RetryPolicy
 
 
 @pytest.fixture
@@ -15,7 +18,7 @@ def client():
         client_secret="secret",
         access_token="atoken",
     )
-    client.backoff_delays = [0, 0, 0, 0, 0]
+    client.retry_policy = RetryPolicy(base_delay=0, throttle_base_delay=0, budget=None)
     return client
 
 
@@ -38,6 +41,22 @@ def test_429_get_response(client):
     assert client._get_api_from_relative_path("example") == {"key": "value"}
 
 
+@responses.activate
+def test_long_run_of_429_responses_does_not_exhaust_the_retry_budget(client):
+    client.retry_policy.budget = RetryBudget(max_retries=2)
+    for _ in range(20):
+        responses.add(method="GET", url="https://fake.example.com/example", status=429)
+        responses.add(
+            method="GET",
+            url="https://fake.example.com/example",
+            status=200,
+            json={"key": "value"},
+        )
+
+    for _ in range(20):
+        assert client._get_api_from_relative_path("example") == {"key": "value"}
+
+
 @responses.activate
 def test_401_get_response_with_body(client):
     """Test that 401 responses immediately fail with response body information."""
@@ -124,3 +143,53 @@ def test_401_post_response_with_body(client):
     assert error_body in str(exc_info.value)
     assert exc_info.value.response is not None
     assert exc_info.value.response.status_code == 401
+
+
+@responses.activate
+def test_503_get_response_is_retried(client):
+    responses.add(method="GET", url="https://fake.example.com/example", status=503)
+    responses.add(
+        method="GET",
+        url="https://fake.example.com/example",
+        status=200,
+        json={"key": "value"},
+    )
+
+    assert client._get_api_from_relative_path("example") == {"key": "value"}
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_400_get_response_is_not_retried(client):
+    responses.add(method="GET", url="https://fake.example.com/example", status=400)
+
+    with pytest.raises(HTTPError, match="Unexpected status"):
+        client._get_api_from_relative_path("example")
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_retries_stop_at_max_attempts(client):
+    client.retry_policy.max_attempts = 3
+    responses.add(method="GET", url="https://fake.example.com/example", status=502)
+
+    with pytest.raises(HTTPError, match="Unexpected status"):
+        client._get_api_from_relative_path("example")
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_connection_error_is_retried(client):
+    responses.add(
+        method="POST",
+        url="https://fake.example.com/example",
+        body=RequestsConnectionError("connection reset"),
+    )
+    responses.add(
+        method="POST",
+        url="https://fake.example.com/example",
+        status=200,
+        json={"key": "value"},
+    )
+
+    assert client._post_api_from_relative_path("example", {}) == {"key": "value"}
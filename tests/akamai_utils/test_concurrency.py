@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+import pytest
+
+from nodestream_akamai.akamai_utils.concurrency import bounded_map
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+@pytest.mark.asyncio
+async def test_bounded_map_limits_concurrency_and_yields_as_completed():
+    running = 0
+    peak = 0
+
+    async def work(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01 * (5 - item))
+        running -= 1
+        return item
+
+    results = await collect(bounded_map(work, range(5), max_concurrency=3))
+
+    assert peak == 3
+    assert sorted(results) == [0, 1, 2, 3, 4]
+    assert results != [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_bounded_map_preserves_order():
+    async def work(item):
+        await asyncio.sleep(0.01 * (5 - item))
+        return item * 2
+
+    results = await collect(
+        bounded_map(work, range(5), max_concurrency=5, preserve_order=True)
+    )
+
+    assert results == [0, 2, 4, 6, 8]
+
+
+@pytest.mark.asyncio
+async def test_bounded_map_pulls_items_lazily():
+    pulled = []
+
+    def items():
+        for item in range(10):
+            pulled.append(item)
+            yield item
+
+    async def work(item):
+        return item
+
+    iterator = bounded_map(work, items(), max_concurrency=2)
+    assert await iterator.__anext__() == 0
+    assert len(pulled) <= 3
+    await iterator.aclose()
+
+
+@pytest.mark.asyncio
+async def test_bounded_map_pulls_items_off_the_event_loop():
+    released = threading.Event()
+
+    def items():
+        yield 0
+        # Only set once work on the first item has run on the event loop
+        assert released.wait(timeout=5)
+        yield 1
+
+    async def work(item):
+        released.set()
+        return item
+
+    results = await collect(bounded_map(work, items(), max_concurrency=2))
+
+    assert sorted(results) == [0, 1]
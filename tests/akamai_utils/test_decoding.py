@@ -0,0 +1,154 @@
+import json
+from typing import List, Optional, TypedDict
+
+import pytest
+import responses
+
+from nodestream_akamai.akamai_utils.client import AkamaiApiClient
+from nodestream_akamai.akamai_utils.decoding import (
+    JsonDecoder,
+    get_json_decoder,
+    project,
+    schema_at,
+)
+from nodestream_akamai.akamai_utils.retry import RetryPolicy
+from nodestream_akamai.akamai_utils.schemas import (
+    AccountHostname,
+    AccountHostnamesPage,
+    Enrollment,
+    EnrollmentList,
+    StorageGroupList,
+)
+
+
+class Child(TypedDict, total=False):
+    name: str
+
+
+class Parent(TypedDict, total=False):
+    id: int
+    children: List[Child]
+    favourite: Optional[Child]
+
+
+DOCUMENT = {
+    "id": 1,
+    "unused": {"large": "value"},
+    "children": [{"name": "a", "age": 3}, {"name": "b"}],
+    "favourite": {"name": "a", "age": 3},
+}
+EXPECTED = {
+    "id": 1,
+    "children": [{"name": "a"}, {"name": "b"}],
+    "favourite": {"name": "a"},
+}
+# Akamai responses with null values for fields the schemas declare
+NULLABLE_DOCUMENTS = [
+    (
+        EnrollmentList,
+        {
+            "enrollments": [
+                {"id": 1, "ra": None, "csr": None, "productionSlots": None},
+                {"id": 2, "networkConfiguration": None, "pendingChanges": None},
+            ]
+        },
+    ),
+    (
+        AccountHostnamesPage,
+        {
+            "hostnames": {
+                "items": [{"cnameFrom": "www.example.com", "contractId": None}],
+                "totalItems": 1,
+                "nextLink": None,
+            }
+        },
+    ),
+    (
+        StorageGroupList,
+        {"items": [{"storageGroupId": 1, "estimatedUsageGB": None}], "links": None},
+    ),
+    (EnrollmentList, {"enrollments": None}),
+]
+
+
+def installed_decoder(name):
+    try:
+        return get_json_decoder(name)
+    except ImportError:
+        pytest.skip(f"{name} is not installed")
+
+
+def test_project_keeps_declared_fields():
+    assert project(DOCUMENT, Parent) == EXPECTED
+
+
+def test_project_without_schema_keeps_everything():
+    assert project(DOCUMENT, None) == DOCUMENT
+
+
+def test_schema_at_finds_item_schema():
+    assert schema_at(Parent, "children") is Child
+    assert schema_at(Parent, "id") is None
+    assert schema_at(None, "children") is None
+    assert schema_at(EnrollmentList, "enrollments") is Enrollment
+    assert schema_at(AccountHostnamesPage, "hostnames.items") is AccountHostname
+
+
+@pytest.mark.parametrize("name", ["auto", "json", "orjson", "msgspec"])
+def test_decoders_agree(name):
+    decoder = installed_decoder(name)
+    content = json.dumps(DOCUMENT).encode()
+    assert decoder.decode(content) == DOCUMENT
+    assert decoder.decode(content, Parent) == EXPECTED
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgspec"])
+@pytest.mark.parametrize(("schema", "document"), NULLABLE_DOCUMENTS)
+def test_decoders_accept_nulls(name, schema, document):
+    decoder = installed_decoder(name)
+    content = json.dumps(document).encode()
+    assert decoder.decode(content, schema) == project(document, schema)
+
+
+def test_unknown_decoder():
+    with pytest.raises(ValueError, match="Unknown JSON decoder"):
+        get_json_decoder("simdjson")
+
+
+@pytest.fixture
+def client():
+    client = AkamaiApiClient(
+        base_url="https://fake.example.com",
+        client_token="ctoken",
+        client_secret="secret",
+        access_token="atoken",
+        json_decoder="json",
+    )
+    client.retry_policy = RetryPolicy(base_delay=0, throttle_base_delay=0, budget=None)
+    return client
+
+
+@responses.activate
+@pytest.mark.parametrize("name", ["json", "msgspec"])
+@pytest.mark.parametrize("stream_json", [False, True])
+def test_client_decodes_items_with_schema(client, name, stream_json):
+    client.json_decoder = installed_decoder(name)
+    client.stream_json = stream_json
+    responses.add(
+        method="GET",
+        url="https://fake.example.com/cps/v2/enrollments",
+        json={
+            "enrollments": [
+                {"id": 1, "ra": "lets-encrypt", "changes": ["a", "b"]},
+                {"id": 2, "ra": None, "csr": {"cn": "example.com"}},
+            ]
+        },
+    )
+    assert isinstance(client.json_decoder, JsonDecoder)
+    items = client._get_items_from_relative_path(
+        "/cps/v2/enrollments", "enrollments", schema=EnrollmentList
+    )
+    assert list(items) == [
+        {"id": 1, "ra": "lets-encrypt"},
+        {"id": 2, "ra": None, "csr": {"cn": "example.com"}},
+    ]
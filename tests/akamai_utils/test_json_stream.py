@@ -0,0 +1,96 @@
+import json
+
+import pytest
+import responses
+
+from nodestream_akamai.akamai_utils.edns_client import AkamaiEdnsClient
+from nodestream_akamai.akamai_utils.json_stream import (
+    JsonStreamError,
+    iter_json_array_items,
+)
+from nodestream_akamai.akamai_utils.retry import RetryPolicy
+
+DOCUMENT = {
+    "metadata": {"zone": "example.com", "tags": ["a]", "{b"], "escaped": 'q"\\'},
+    "hostnames": {
+        "totalItems": 3,
+        "items": [
+            {"cnameFrom": "a.example.com", "nested": {"list": [1, 2, [3]]}},
+            {"cnameFrom": "b.example.com", "note": "ünïcödé ✓"},
+            {"cnameFrom": "c.example.com", "flags": [True, False, None, -1.5e3]},
+        ],
+    },
+    "after": [1, 2, 3],
+}
+
+
+def chunked(document, size):
+    data = json.dumps(document, ensure_ascii=False, indent=1).encode("utf-8")
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1 << 16])
+def test_yields_items_across_chunk_boundaries(chunk_size):
+    items = iter_json_array_items(chunked(DOCUMENT, chunk_size), "hostnames.items")
+    assert list(items) == DOCUMENT["hostnames"]["items"]
+
+
+@pytest.mark.parametrize(
+    ("items_path", "expected"),
+    [
+        ("after", [1, 2, 3]),
+        ("metadata.tags", ["a]", "{b"]),
+        ("missing", []),
+        ("hostnames.missing", []),
+    ],
+)
+def test_items_path(items_path, expected):
+    assert list(iter_json_array_items(chunked(DOCUMENT, 5), items_path)) == expected
+
+
+def test_top_level_array():
+    assert list(iter_json_array_items([b'[1, "two", ', b"{}]"])) == [1, "two", {}]
+
+
+def test_empty_and_null_arrays():
+    assert list(iter_json_array_items([b'{"a": []}'], "a")) == []
+    assert list(iter_json_array_items([b'{"a": null}'], "a")) == []
+
+
+def test_truncated_document():
+    with pytest.raises(JsonStreamError):
+        list(iter_json_array_items([b'{"a": [1, {"b": '], "a"))
+
+
+def test_items_are_decoded_lazily():
+    def chunks():
+        yield b'{"a": [1, 2'
+        yield b", 3]"
+        msg = "read past the end of the document"
+        raise AssertionError(msg)
+
+    items = iter_json_array_items(chunks(), "a")
+    assert next(items) == 1
+
+
+@responses.activate
+def test_client_streams_recordsets():
+    client = AkamaiEdnsClient(
+        base_url="https://fake.example.com",
+        client_token="ctoken",
+        client_secret="secret",
+        access_token="atoken",
+        stream_json=True,
+    )
+    client.retry_policy = RetryPolicy(base_delay=0, throttle_base_delay=0, budget=None)
+    recordsets = [{"name": f"r{i}.example.com", "type": "A"} for i in range(50)]
+    responses.add(
+        method="GET",
+        url="https://fake.example.com/config-dns/v2/zones/example.com/recordsets?showAll=true",
+        json={"metadata": {"totalElements": 50}, "recordsets": recordsets},
+    )
+
+    streamed = client.list_recordsets("example.com")
+
+    assert not isinstance(streamed, list)
+    assert list(streamed) == recordsets
@@ -0,0 +1,112 @@
+import json
+
+import pytest
+import responses
+
+from nodestream_akamai.akamai_utils.client import AkamaiApiClient
+from nodestream_akamai.akamai_utils.extractor import AkamaiExtractor
+from nodestream_akamai.akamai_utils.metrics import (
+    JsonReportSink,
+    PrometheusTextfileSink,
+    RequestMetrics,
+    endpoint_template,
+    metrics_sinks_from_config,
+)
+from nodestream_akamai.akamai_utils.retry import RetryPolicy
+
+
+@pytest.mark.parametrize(
+    ("path", "template"),
+    [
+        (
+            "/papi/v1/properties/prp_1/versions/3/rules?contractId=ctr_1",
+            "/papi/v1/properties/{id}/versions/{v}/rules",
+        ),
+        (
+            "/config-dns/v2/zones/example.com/recordsets",
+            "/config-dns/v2/zones/{id}/recordsets",
+        ),
+        ("/appsec/v1/configs", "/appsec/v1/configs"),
+    ],
+)
+def test_endpoint_template(path, template):
+    assert endpoint_template(path) == template
+
+
+def test_metrics_are_grouped_by_template():
+    metrics = RequestMetrics()
+    metrics.record_response("GET", "/papi/v1/properties/prp_1", 200, 0.2, 10)
+    metrics.record_response("GET", "/papi/v1/properties/prp_2", 429, 0.1)
+    metrics.record_retry("GET", "/papi/v1/properties/prp_2", 2.0)
+    metrics.record_response("GET", "/papi/v1/properties/prp_2", 503, 3.0)
+    (stats,) = metrics.snapshot().values()
+    assert stats["requests"] == 3
+    assert stats["bytes_received"] == 10
+    assert stats["throttled"] == 1
+    assert stats["server_errors"] == 1
+    assert stats["retries"] == 1
+    assert stats["backoff_seconds"] == 2.0
+    assert sum(stats["latency_buckets"]) == 3
+
+    merged = RequestMetrics.merged([metrics, metrics])
+    assert merged.snapshot()["GET /papi/v1/properties/{id}"]["requests"] == 6
+
+
+def test_file_sinks(tmp_path):
+    metrics = RequestMetrics()
+    metrics.record_response("GET", "/cps/v2/enrollments", 200, 0.3, 100)
+    JsonReportSink(tmp_path / "report.json").emit("Cps", metrics)
+    JsonReportSink(tmp_path / "report.json").emit("Waf", RequestMetrics())
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert report["Cps"]["GET /cps/v2/enrollments"]["requests"] == 1
+    assert report["Waf"] == {}
+
+    PrometheusTextfileSink(tmp_path).emit("Cps", metrics)
+    text = (tmp_path / "akamai_cps.prom").read_text()
+    labels = 'extractor="Cps",method="GET",endpoint="/cps/v2/enrollments"'
+    assert f"akamai_api_requests_total{{{labels}}} 1" in text
+    assert f'akamai_api_request_duration_seconds_bucket{{{labels},le="0.5"}} 1' in text
+
+
+class FakeExtractor(AkamaiExtractor):
+    def __init__(self, **akamai_client_kwargs):
+        self.client = AkamaiApiClient(**akamai_client_kwargs)
+        self.client.retry_policy = RetryPolicy(
+            base_delay=0, throttle_base_delay=0, budget=None
+        )
+
+    async def extract_records(self):
+        yield self.client._get_api_from_relative_path("/example")
+
+
+@responses.activate
+def test_extractor_reports_metrics_of_its_clients():
+    responses.add(method="GET", url="https://fake.example.com/example", status=500)
+    responses.add(method="GET", url="https://fake.example.com/example", json={})
+    reports = []
+    extractor = FakeExtractor(
+        base_url="https://fake.example.com",
+        client_token="ctoken",
+        client_secret="secret",
+        access_token="atoken",
+        metrics={"callback": lambda name, snapshot: reports.append((name, snapshot))},
+    )
+    extractor.client._get_api_from_relative_path("/example")
+    extractor.report_metrics()
+
+    ((name, snapshot),) = reports
+    assert name == "FakeExtractor"
+    assert snapshot["GET /example"]["requests"] == 2
+    assert snapshot["GET /example"]["server_errors"] == 1
+    assert snapshot["GET /example"]["retries"] == 1
+
+
+def test_sinks_from_config(tmp_path):
+    sinks = metrics_sinks_from_config(
+        {"prometheus_textfile_dir": tmp_path, "json_report": tmp_path / "r.json"}
+    )
+    assert [type(sink).__name__ for sink in sinks] == [
+        "LoggingSink",
+        "PrometheusTextfileSink",
+        "JsonReportSink",
+    ]
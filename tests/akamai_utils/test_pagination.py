@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+import responses
+from responses import matchers
+
+from nodestream_akamai.akamai_utils.cloudlet_client import AkamaiCloudletClient
+from nodestream_akamai.akamai_utils.pagination import (
+    CursorPaginator,
+    NextLinkPaginator,
+    OffsetPaginator,
+    PagePaginator,
+    apaginate,
+    iter_pages,
+    paginate,
+)
+from nodestream_akamai.akamai_utils.retry import RetryPolicy
+
+
+class FakeEndpoint:
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+
+    def __call__(self, path, params=None):
+        self.requests.append((path, dict(params or {})))
+        return self.pages[len(self.requests) - 1]
+
+
+def test_offset_paginator_stops_after_short_page():
+    fetch = FakeEndpoint([[1, 2], [3, 4], [5]])
+    paginator = OffsetPaginator(page_size=2, limit_param="limit")
+
+    assert list(paginate(fetch, "/items", paginator)) == [1, 2, 3, 4, 5]
+    assert fetch.requests == [
+        ("/items", {"offset": 0, "limit": 2}),
+        ("/items", {"offset": 2, "limit": 2}),
+        ("/items", {"offset": 4, "limit": 2}),
+    ]
+
+
+def test_page_paginator_uses_total_pages():
+    fetch = FakeEndpoint(
+        [
+            {"content": [1, 2], "page": {"totalPages": 2}},
+            {"content": [3, 4], "page": {"totalPages": 2}},
+        ]
+    )
+    paginator = PagePaginator(
+        page_size=2, items_key="content", total_pages_key="page.totalPages"
+    )
+
+    assert list(paginate(fetch, "/items", paginator, {"q": "x"})) == [1, 2, 3, 4]
+    assert fetch.requests == [
+        ("/items", {"q": "x", "page": 0, "size": 2}),
+        ("/items", {"q": "x", "page": 1, "size": 2}),
+    ]
+
+
+def test_next_link_paginator_follows_links():
+    fetch = FakeEndpoint(
+        [
+            {"list": {"items": [1], "nextLink": "/items?offset=1"}},
+            {"list": {"items": [2]}},
+        ]
+    )
+    paginator = NextLinkPaginator(items_key="list.items", next_link_key="list.nextLink")
+
+    assert list(iter_pages(fetch, "/items", paginator)) == [[1], [2]]
+    assert fetch.requests[1] == ("/items?offset=1", {})
+
+
+def test_cursor_paginator_passes_cursor():
+    fetch = FakeEndpoint(
+        [{"items": [1], "cursor": "abc"}, {"items": [2], "cursor": None}]
+    )
+    paginator = CursorPaginator(
+        cursor_param="after", cursor_key="cursor", items_key="items"
+    )
+
+    assert list(paginate(fetch, "/items", paginator)) == [1, 2]
+    assert fetch.requests[1] == ("/items", {"after": "abc"})
+
+
+@pytest.mark.asyncio
+async def test_apaginate_prefetches_next_page():
+    events = []
+
+    async def fetch(_path, params=None):
+        events.append(("fetch", params["offset"]))
+        await asyncio.sleep(0)
+        return [params["offset"], params["offset"] + 1][: 3 - params["offset"]]
+
+    paginator = OffsetPaginator(page_size=2)
+    async for item in apaginate(fetch, "/items", paginator):
+        await asyncio.sleep(0)
+        events.append(("item", item))
+
+    assert events == [
+        ("fetch", 0),
+        ("fetch", 2),
+        ("item", 0),
+        ("item", 1),
+        ("item", 2),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_apaginate_runs_blocking_fetch_in_thread():
+    fetch = FakeEndpoint([[1, 2], [3]])
+    items = [
+        item async for item in apaginate(fetch, "/items", OffsetPaginator(page_size=2))
+    ]
+    assert items == [1, 2, 3]
+
+
+@responses.activate
+def test_list_v3_policies_reads_every_page():
+    client = AkamaiCloudletClient(
+        base_url="https://fake.example.com",
+        client_token="ctoken",
+        client_secret="secret",
+        access_token="atoken",
+    )
+    client.retry_policy = RetryPolicy(base_delay=0, throttle_base_delay=0, budget=None)
+    for page in range(2):
+        responses.add(
+            method="GET",
+            url="https://fake.example.com/cloudlets/v3/policies",
+            json={"content": [{"id": page}], "page": {"totalPages": 2}},
+            match=[matchers.query_param_matcher({"page": str(page), "size": "1000"})],
+        )
+
+    assert client.list_v3_policies() == [{"id": 0}, {"id": 1}]
@@ -1,7 +1,11 @@
 import pytest
+import responses
+from requests import HTTPError
+from responses import matchers
 
 from nodestream_akamai.akamai_utils import Origin
 from nodestream_akamai.akamai_utils.property_client import AkamaiPropertyClient
+from nodestream_akamai.akamai_utils.response_cache import reset_response_cache
 from tests.akamai_utils.rulesdata import (
     rule_tree_488011,
     rule_tree_627844,
@@ -249,3 +253,227 @@ def test_live_search_akamai_rule_tree_for_cp_codes(client):
     assert client.search_akamai_rule_tree_for_cp_codes(rule_tree_643957["rules"]) == [
         752101
     ]
+
+
+def test_collate_nested_conditional_origins(client):
+    rules = {
+        "name": "default",
+        "behaviors": [],
+        "children": [
+            {
+                "name": "hosts",
+                "criteriaMustSatisfy": "all",
+                "criteria": [
+                    {
+                        "name": "hostname",
+                        "options": {
+                            "matchOperator": "IS_NOT_ONE_OF",
+                            "values": ["old.example.com"],
+                        },
+                    }
+                ],
+                "behaviors": [],
+                "children": [
+                    {
+                        "name": "conditional origin",
+                        "criteriaMustSatisfy": "all",
+                        "criteria": [
+                            {
+                                "name": "cloudletsOrigin",
+                                "options": {"originId": "alb_a"},
+                            }
+                        ],
+                        "behaviors": [
+                            {
+                                "name": "origin",
+                                "options": {"hostname": "a.example.com"},
+                            }
+                        ],
+                        "children": [],
+                    }
+                ],
+            }
+        ],
+    }
+
+    assert client.collate_origins_with_criteria(rules) == [
+        Origin(name="a.example.com", hostname="!old.example.com"),
+        Origin(name="a.example.com", conditional_origin="alb_a"),
+    ]
+
+
+def test_list_all_properties_groups_hostnames(client, mocker):
+    hostnames = [
+        {"propertyId": "prp_1", "contractId": "ctr_1", "groupId": "grp_1"},
+        {"propertyId": "prp_2", "contractId": "ctr_2", "groupId": "grp_2"},
+        {"propertyId": "prp_1", "contractId": "ctr_1", "groupId": "grp_1"},
+        {"propertyId": "prp_3", "contractId": "ctr_3", "groupId": "grp_3"},
+    ]
+    mocker.patch.object(client, "list_account_hostnames", return_value=hostnames)
+
+    def get_property(property_id, contract_id, group_id):  # noqa: ARG001
+        if property_id == "prp_2":
+            msg = "not found"
+            raise HTTPError(msg)
+        return {"propertyId": property_id}
+
+    get_property = mocker.patch.object(client, "get_property", side_effect=get_property)
+
+    properties = client.list_all_properties()
+    get_property.assert_not_called()
+
+    assert list(properties) == [
+        {"propertyId": "prp_1", "hostnames": [hostnames[0], hostnames[2]]},
+        {"propertyId": "prp_3", "hostnames": [hostnames[3]]},
+    ]
+    get_property.assert_any_call(
+        property_id="prp_2", contract_id="ctr_2", group_id="grp_2"
+    )
+
+
+def test_list_all_properties_raises_when_listing_fails(client, mocker):
+    mocker.patch.object(
+        client, "list_account_hostnames", side_effect=HTTPError("listing failed")
+    )
+    with pytest.raises(HTTPError):
+        client.list_all_properties()
+
+
+@responses.activate
+@pytest.mark.parametrize("response_cache", [None, True])
+def test_bulk_search_polls_until_complete(mocker, response_cache):
+    reset_response_cache()
+    # Every poll reaches the API, even with responses cached
+    client = AkamaiPropertyClient(
+        base_url="https://fake.example.com",
+        client_token="ctoken",
+        client_secret="client",
+        access_token="atoken",
+        response_cache=response_cache,
+    )
+    mocker.patch("nodestream_akamai.akamai_utils.property_client.time.sleep")
+    responses.add(
+        method="POST",
+        url="https://fake.example.com/papi/v1/bulk/rules-search-requests",
+        status=202,
+        json={"bulkSearchLink": "/papi/v1/bulk/rules-search-requests/7"},
+        match=[
+            matchers.json_params_matcher(
+                {"bulkSearchQuery": {"syntax": "JSONPATH", "match": "$.name"}}
+            )
+        ],
+    )
+    responses.add(
+        method="GET",
+        url="https://fake.example.com/papi/v1/bulk/rules-search-requests/7",
+        json={"bulkSearchId": 7, "searchSubmitStatus": "IN_PROGRESS"},
+    )
+    responses.add(
+        method="GET",
+        url="https://fake.example.com/papi/v1/bulk/rules-search-requests/7",
+        json={
+            "bulkSearchId": 7,
+            "searchSubmitStatus": "COMPLETE",
+            "results": [{"propertyId": "1"}],
+        },
+    )
+
+    assert client.bulk_search("$.name") == [{"propertyId": "1"}]
+    assert len(responses.calls) == 3
+    reset_response_cache()
+
+
+def test_list_all_properties_with_bulk_search(client, mocker):
+    hostnames = [
+        {"propertyId": "prp_1", "contractId": "ctr_1", "groupId": "grp_1"},
+        {"propertyId": "prp_2", "contractId": "ctr_2", "groupId": "grp_2"},
+    ]
+    found = {"propertyName": "one", "contractId": "ctr_1", "groupId": "grp_1"}
+    mocker.patch.object(client, "list_account_hostnames", return_value=hostnames)
+    mocker.patch.object(
+        client,
+        "bulk_search",
+        return_value=[
+            {
+                **found,
+                "propertyId": "1",
+                "assetId": "aid_1",
+                "propertyVersion": 3,
+                "productionStatus": "ACTIVE",
+                "stagingStatus": "INACTIVE",
+            },
+            {
+                **found,
+                "propertyId": "1",
+                "assetId": "aid_1",
+                "propertyVersion": 4,
+                "productionStatus": "INACTIVE",
+                "stagingStatus": "ACTIVE",
+            },
+            {**found, "propertyId": "2", "propertyVersion": 1},
+        ],
+    )
+    get_property = mocker.patch.object(
+        client, "get_property", return_value={"propertyId": "2"}
+    )
+
+    properties = list(client.list_all_properties(bulk_search=True))
+
+    assert properties == [
+        {
+            **found,
+            "propertyId": "1",
+            "assetId": "aid_1",
+            "productionVersion": 3,
+            "stagingVersion": 4,
+            "hostnames": [hostnames[0]],
+        },
+        {"propertyId": "2", "hostnames": [hostnames[1]]},
+    ]
+    get_property.assert_called_once_with(
+        property_id="prp_2", contract_id="ctr_2", group_id="grp_2"
+    )
+
+
+def add_hostnames_page(offset, items, total_items=None, next_link=None):
+    page = {"items": items}
+    if total_items is not None:
+        page["totalItems"] = total_items
+    if next_link is not None:
+        page["nextLink"] = next_link
+    responses.add(
+        method="GET",
+        url="https://fake.example.com/papi/v1/hostnames",
+        json={"hostnames": page},
+        match=[
+            matchers.query_param_matcher(
+                {"network": "PRODUCTION", "offset": str(offset), "limit": "999"}
+            )
+        ],
+    )
+
+
+@responses.activate
+def test_list_account_hostnames_prefetches_pages(client):
+    client.base_url = "https://fake.example.com"
+    add_hostnames_page(0, [{"cnameFrom": "a"}], total_items=2500)
+    add_hostnames_page(999, [{"cnameFrom": "b"}])
+    add_hostnames_page(1998, [{"cnameFrom": "c"}])
+
+    pages = list(client.iter_account_hostname_pages())
+
+    assert pages == [[{"cnameFrom": "a"}], [{"cnameFrom": "b"}], [{"cnameFrom": "c"}]]
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_list_account_hostnames_follows_next_link_without_total(client):
+    client.base_url = "https://fake.example.com"
+    add_hostnames_page(
+        0,
+        [{"cnameFrom": "a"}],
+        next_link="/papi/v1/hostnames?network=PRODUCTION&offset=999&limit=999",
+    )
+    add_hostnames_page(999, [{"cnameFrom": "b"}])
+
+    assert client.list_account_hostnames() == [{"cnameFrom": "a"}, {"cnameFrom": "b"}]
@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+from nodestream_akamai.akamai_utils.property_state import (
+    PRODUCTION,
+    STAGING,
+    PropertyStateStore,
+)
+
+PROP = {
+    "propertyId": "prp_1",
+    "propertyName": "www.example.com",
+    "contractId": "ctr_1",
+    "groupId": "grp_1",
+    "assetId": "aid_1",
+    "productionVersion": 4,
+    "stagingVersion": 5,
+    "hostnames": [{"cnameFrom": "b.example.com"}, {"cnameFrom": "a.example.com"}],
+}
+RECORD = {"id": "prp_1", "version": 4, "origins": [{"name": "origin.example.com"}]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PropertyStateStore(tmp_path)
+    yield store
+    store.close()
+
+
+def test_unchanged_after_save(store):
+    assert store.unchanged(PROP, PRODUCTION) is None
+
+    store.save(PROP, PRODUCTION, RECORD)
+
+    state = store.unchanged(PROP, PRODUCTION)
+    assert state.record == RECORD
+    assert store.unchanged(PROP, STAGING) is None
+
+
+def test_hostname_order_does_not_matter(store):
+    store.save(PROP, PRODUCTION, RECORD)
+    reordered = {**PROP, "hostnames": list(reversed(PROP["hostnames"]))}
+    assert store.unchanged(reordered, PRODUCTION) is not None
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"productionVersion": 6},
+        {"hostnames": [{"cnameFrom": "a.example.com"}]},
+        {"groupId": "grp_2"},
+        {"assetId": "aid_2"},
+    ],
+)
+def test_changed_versions_or_listing(store, changes):
+    store.save(PROP, PRODUCTION, RECORD)
+    assert store.unchanged({**PROP, **changes}, PRODUCTION) is None
+
+
+def test_staging_only_tracks_staging_version(store):
+    store.save(PROP, STAGING, RECORD)
+    assert store.unchanged({**PROP, "productionVersion": 6}, STAGING) is not None
+    assert store.unchanged({**PROP, "stagingVersion": 6}, STAGING) is None
+
+
+def test_persists_across_instances(tmp_path):
+    first = PropertyStateStore(tmp_path / "state.sqlite3")
+    first.save(PROP, PRODUCTION, RECORD)
+    first.close()
+
+    second = PropertyStateStore(tmp_path / "state.sqlite3")
+    assert second.unchanged(PROP, PRODUCTION).record == RECORD
+    second.close()
+
+
+def test_state_from_an_older_state_version_is_discarded(tmp_path):
+    path = tmp_path / "state.sqlite3"
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE property_state (property_id TEXT, network TEXT,"
+            " production_version INTEGER, staging_version INTEGER,"
+            " hostnames_hash TEXT, record_hash TEXT, record TEXT, updated REAL)"
+        )
+        connection.execute(
+            "INSERT INTO property_state VALUES"
+            " ('prp_1', 'PRODUCTION', 4, 5, '', '', '{}', 0)"
+        )
+    connection.close()
+
+    store = PropertyStateStore(path)
+    assert store.unchanged(PROP, PRODUCTION) is None
+    store.save(PROP, PRODUCTION, RECORD)
+    assert store.unchanged(PROP, PRODUCTION).record == RECORD
+    store.close()
@@ -0,0 +1,105 @@
+import pytest
+import responses
+
+from nodestream_akamai.akamai_utils.client import AkamaiApiClient
+from nodestream_akamai.akamai_utils.rate_limiter import (
+    AdaptiveRateLimiter,
+    api_family,
+    get_rate_limiter,
+    reset_rate_limiters,
+    retry_after_from_headers,
+)
+from nodestream_akamai.akamai_utils.retry import RetryPolicy
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiters():
+    reset_rate_limiters()
+    yield
+    reset_rate_limiters()
+
+
+def test_api_family():
+    assert api_family("/papi/v1/properties/1/versions/2/rules") == "papi"
+    assert api_family("https://fake.example.com/config-dns/v2/zones") == "config-dns"
+
+
+def test_retry_after_from_headers():
+    assert retry_after_from_headers({"Retry-After": "7"}) == 7.0
+    assert retry_after_from_headers({"Akamai-RateLimit-Remaining": "3"}) is None
+    assert (
+        retry_after_from_headers(
+            {
+                "Akamai-RateLimit-Remaining": "0",
+                "Akamai-RateLimit-Next": "2000-01-01T00:00:00Z",
+            }
+        )
+        == 0.0
+    )
+    assert retry_after_from_headers({}) is None
+
+
+def test_throttle_lowers_rate_and_success_raises_it():
+    limiter = AdaptiveRateLimiter(rate=8.0, min_rate=1.0, increase_step=0.5)
+    limiter.on_throttle()
+    assert limiter.rate == 4.0
+    limiter.on_throttle()
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.rate == 1.0
+    limiter.on_success()
+    assert limiter.rate == 1.5
+
+
+def test_reserve_waits_once_bucket_is_empty():
+    limiter = AdaptiveRateLimiter(rate=10.0, burst=2)
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() > 0.0
+
+
+def test_throttle_blocks_for_retry_after():
+    limiter = AdaptiveRateLimiter()
+    limiter.on_throttle(retry_after=30)
+    assert limiter.reserve() > 29
+
+
+def test_limiters_are_shared_per_credential_and_family():
+    papi = get_rate_limiter("host", "ctoken", None, "papi")
+    assert get_rate_limiter("host", "ctoken", None, "papi") is papi
+    assert get_rate_limiter("host", "ctoken", None, "appsec") is not papi
+    assert get_rate_limiter("host", "other", None, "papi") is not papi
+
+
+@responses.activate
+def test_429_throttles_every_client_sharing_credentials():
+    clients = [
+        AkamaiApiClient(
+            base_url="https://fake.example.com",
+            client_token="ctoken",
+            client_secret="secret",
+            access_token="atoken",
+        )
+        for _ in range(2)
+    ]
+    for client in clients:
+        client.retry_policy = RetryPolicy(
+            base_delay=0, throttle_base_delay=0, budget=None
+        )
+    responses.add(
+        method="GET",
+        url="https://fake.example.com/papi/v1/groups",
+        status=429,
+        headers={"Retry-After": "0"},
+    )
+    responses.add(
+        method="GET",
+        url="https://fake.example.com/papi/v1/groups",
+        status=200,
+        json={"key": "value"},
+    )
+
+    assert clients[0]._get_api_from_relative_path("/papi/v1/groups") == {"key": "value"}
+    shared = clients[1]._rate_limiter("/papi/v1/groups")
+    assert shared is clients[0]._rate_limiter("/papi/v1/groups")
+    assert shared.rate < AdaptiveRateLimiter().rate
@@ -0,0 +1,139 @@
+import pytest
+import responses
+
+from nodestream_akamai.akamai_utils.client import AkamaiApiClient
+from nodestream_akamai.akamai_utils.response_cache import (
+    MISSING,
+    ResponseCache,
+    ResponseCacheConfig,
+    reset_response_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_response_cache():
+    reset_response_cache()
+    yield
+    reset_response_cache()
+
+
+def test_entries_expire(mocker):
+    now = mocker.patch("time.monotonic", return_value=100.0)
+    cache = ResponseCache()
+    cache.put("key", {"a": 1}, ttl=10)
+    assert cache.get("key") == {"a": 1}
+    now.return_value = 111.0
+    assert cache.get("key") is MISSING
+    assert cache.stats() == {
+        "entries": 0,
+        "bytes": 0,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+    }
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", 1, ttl=60)
+    cache.put("b", 2, ttl=60)
+    cache.get("a")
+    cache.put("c", 3, ttl=60)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_are_evicted_beyond_max_bytes():
+    cache = ResponseCache(max_bytes=100)
+    cache.put("a", 1, ttl=60, size=40)
+    cache.put("b", 2, ttl=60, size=40)
+    cache.put("a", 1, ttl=60, size=50)
+    assert cache.stats()["bytes"] == 90
+    cache.put("c", 3, ttl=60, size=30)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.stats()["bytes"] == 80
+    # Larger than the whole cache, so never held
+    cache.put("d", 4, ttl=60, size=101)
+    assert cache.get("d") is MISSING
+    assert cache.get("c") == 3
+
+
+def test_cached_values_are_copies():
+    cache = ResponseCache()
+    value = {"items": [1]}
+    cache.put("key", value, ttl=60)
+    value["items"].append(2)
+    cache.get("key")["items"].append(3)
+    assert cache.get("key") == {"items": [1]}
+
+
+def test_ttl_for_matches_path_patterns():
+    config = ResponseCacheConfig.from_config(
+        {"default_ttl": 30, "ttls": {"/papi/v1/hostnames*": 600, "/identity/*": 0}}
+    )
+    assert config.ttl_for("/papi/v1/hostnames?network=PRODUCTION") == 600
+    assert config.ttl_for("/identity/v3/users") == 0
+    assert config.ttl_for("/appsec/v1/configs") == 30
+    assert ResponseCacheConfig.from_config(None) is None
+    assert ResponseCacheConfig.from_config(config=True) == ResponseCacheConfig()
+
+
+def make_client(**kwargs):
+    return AkamaiApiClient(
+        base_url="https://fake.example.com",
+        client_token="ctoken",
+        client_secret="secret",
+        access_token="atoken",
+        **kwargs,
+    )
+
+
+@responses.activate
+def test_clients_share_cached_responses():
+    responses.add(
+        method="GET", url="https://fake.example.com/appsec/v1/configs", json={"a": 1}
+    )
+    config = {"ttls": {"/appsec/*": 60}}
+    first = make_client(response_cache=config)
+    second = make_client(response_cache=config)
+    assert first._get_api_from_relative_path("/appsec/v1/configs") == {"a": 1}
+    assert second._get_api_from_relative_path("/appsec/v1/configs") == {"a": 1}
+    assert len(responses.calls) == 1
+    assert first.response_cache.stats()["hits"] == 1
+
+
+@responses.activate
+def test_responses_are_not_cached_by_default():
+    responses.add(
+        method="GET", url="https://fake.example.com/appsec/v1/configs", json={"a": 1}
+    )
+    client = make_client()
+    client._get_api_from_relative_path("/appsec/v1/configs")
+    client._get_api_from_relative_path("/appsec/v1/configs")
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_cache_counts_response_body_sizes():
+    responses.add(
+        method="GET", url="https://fake.example.com/appsec/v1/configs", json={"a": 1}
+    )
+    client = make_client(response_cache=True)
+    client._get_api_from_relative_path("/appsec/v1/configs")
+    assert client.response_cache.stats()["bytes"] == len(
+        responses.calls[0].response.content
+    )
+
+
+@responses.activate
+def test_uncached_requests_skip_the_cache():
+    responses.add(
+        method="GET", url="https://fake.example.com/papi/v1/bulk/1", json={"a": 1}
+    )
+    client = make_client(response_cache=True)
+    client._get_api_from_relative_path("/papi/v1/bulk/1", cache=False)
+    client._get_api_from_relative_path("/papi/v1/bulk/1", cache=False)
+    assert len(responses.calls) == 2
+    assert client.response_cache.stats()["entries"] == 0
@@ -0,0 +1,72 @@
+from nodestream_akamai.akamai_utils.retry import RetryBudget, RetryPolicy
+
+
+def test_backoff_grows_exponentially_up_to_max_delay():
+    policy = RetryPolicy(base_delay=1, multiplier=2, max_delay=5, jitter=0)
+    assert [policy.backoff(attempt) for attempt in range(1, 6)] == [1, 2, 4, 5, 5]
+
+
+def test_backoff_for_throttling_uses_its_own_base():
+    policy = RetryPolicy(base_delay=1, throttle_base_delay=5, jitter=0)
+    assert policy.backoff(1, 429) == 5
+    assert policy.backoff(1, 503) == 1
+
+
+def test_backoff_jitter_stays_within_bounds():
+    policy = RetryPolicy(base_delay=4, jitter=0.5)
+    assert all(2 <= policy.backoff(1) <= 4 for _ in range(100))
+
+
+def test_non_retryable_status_gives_up_immediately():
+    retry = RetryPolicy(budget=None).begin()
+    assert retry.next_delay(400) is None
+    assert retry.next_delay(404) is None
+
+
+def test_connection_failures_are_retryable():
+    retry = RetryPolicy(jitter=0, budget=None).begin()
+    assert retry.next_delay(None) == 1
+
+
+def test_gives_up_after_max_attempts():
+    retry = RetryPolicy(max_attempts=3, base_delay=0, budget=None).begin()
+    assert retry.next_delay(500) == 0
+    assert retry.next_delay(500) == 0
+    assert retry.next_delay(500) is None
+
+
+def test_gives_up_when_max_elapsed_would_be_exceeded():
+    retry = RetryPolicy(max_elapsed=10, budget=None).begin()
+    assert retry.next_delay(429, retry_after=5) == 5
+    assert retry.next_delay(429, retry_after=30) is None
+
+
+def test_retry_budget_is_shared():
+    budget = RetryBudget(max_retries=1)
+    policy = RetryPolicy(base_delay=0, budget=budget)
+    assert policy.begin().next_delay(503) == 0
+    assert policy.begin().next_delay(503) is None
+
+
+def test_throttled_retries_do_not_spend_the_budget():
+    budget = RetryBudget(max_retries=1)
+    policy = RetryPolicy(throttle_base_delay=0, budget=budget)
+    for _ in range(1000):
+        assert policy.begin().next_delay(429) == 0
+    assert budget.spent == 0
+    assert policy.begin().next_delay(503) is not None
+    assert policy.begin().next_delay(503) is None
+
+
+def test_retry_budget_is_off_by_default():
+    assert RetryPolicy().budget is None
+    assert RetryPolicy.from_config({"budget": 5}).budget.max_retries == 5
+
+
+def test_from_config():
+    policy = RetryPolicy.from_config({"max_attempts": 2, "retry_statuses": [503]})
+    assert policy.max_attempts == 2
+    assert policy.is_retryable(503)
+    assert not policy.is_retryable(500)
+    assert RetryPolicy.from_config(policy) is policy
+    assert RetryPolicy.from_config(None) == RetryPolicy()
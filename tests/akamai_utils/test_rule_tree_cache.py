@@ -0,0 +1,66 @@
+import pytest
+import responses
+
+from nodestream_akamai.akamai_utils.property_client import AkamaiPropertyClient
+from nodestream_akamai.akamai_utils.rule_tree_cache import RuleTreeCache
+from tests.akamai_utils.rulesdata import rule_tree_488011
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = RuleTreeCache(tmp_path)
+    yield cache
+    cache.close()
+
+
+def test_round_trip(cache):
+    assert cache.get("488011", 2) is None
+    cache.put("488011", 2, rule_tree_488011)
+    assert cache.get("488011", 2) == rule_tree_488011
+    assert cache.get("488011", "2") == rule_tree_488011
+    assert cache.get("488011", 2, rule_format="v2023-01-05") is None
+
+
+def test_persists_across_instances(tmp_path):
+    first = RuleTreeCache(tmp_path / "cache.sqlite3")
+    first.put("488011", 2, rule_tree_488011)
+    first.close()
+
+    second = RuleTreeCache(tmp_path / "cache.sqlite3")
+    assert second.get("488011", 2) == rule_tree_488011
+    second.close()
+
+
+def test_evicts_least_recently_used(cache):
+    cache.put("1", 1, {"rules": {"name": "one"}})
+    cache.put("2", 1, {"rules": {"name": "two"}})
+    cache.get("1", 1)
+    (size,) = cache.connection.execute("SELECT MAX(size) FROM rule_trees").fetchone()
+    cache.max_bytes = 2 * size
+
+    cache.put("3", 1, {"rules": {"name": "six"}})
+
+    assert cache.get("2", 1) is None
+    assert cache.get("1", 1) == {"rules": {"name": "one"}}
+    assert cache.get("3", 1) == {"rules": {"name": "six"}}
+
+
+@responses.activate
+def test_property_client_fetches_each_version_once(tmp_path):
+    client = AkamaiPropertyClient(
+        base_url="https://fake.example.com",
+        client_token="ctoken",
+        client_secret="secret",
+        access_token="atoken",
+        rule_tree_cache_path=tmp_path,
+    )
+    responses.add(
+        method="GET",
+        url="https://fake.example.com/papi/v1/properties/488011/versions/2/rules",
+        status=200,
+        json=rule_tree_488011,
+    )
+
+    assert client.get_rule_tree("488011", 2) == rule_tree_488011
+    assert client.get_rule_tree("488011", 2) == rule_tree_488011
+    assert len(responses.calls) == 1
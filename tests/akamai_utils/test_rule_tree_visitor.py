@@ -0,0 +1,145 @@
+import copy
+
+import pytest
+
+from nodestream_akamai.akamai_utils import EdgeHost, Origin
+from nodestream_akamai.akamai_utils.property_client import AkamaiPropertyClient
+from nodestream_akamai.akamai_utils.rule_tree_visitor import (
+    CloudletCollector,
+    CpCodeCollector,
+    EdgeWorkerCollector,
+    ImageManagerCollector,
+    LegacyEdgeRedirectorCollector,
+    OriginCollector,
+    RuleTreeVisitor,
+    SiteShieldCollector,
+)
+from tests.akamai_utils.rulesdata import (
+    rule_tree_488011,
+    rule_tree_627844,
+    rule_tree_643957,
+)
+
+RULE_TREES = [rule_tree_488011, rule_tree_627844, rule_tree_643957]
+
+
+def path_rule(values, children=(), behaviors=()):
+    return {
+        "name": "/".join(values),
+        "criteria": [
+            {
+                "name": "path",
+                "options": {"matchOperator": "MATCHES_ONE_OF", "values": values},
+            }
+        ],
+        "criteriaMustSatisfy": "all",
+        "behaviors": list(behaviors),
+        "children": list(children),
+    }
+
+
+def origin(hostname):
+    return {"name": "origin", "options": {"hostname": hostname}}
+
+
+@pytest.fixture
+def client():
+    return AkamaiPropertyClient(
+        base_url="url",
+        client_token="ctoken",
+        client_secret="client",
+        access_token="atoken",
+    )
+
+
+@pytest.mark.parametrize("rule_tree", RULE_TREES)
+def test_visitor_matches_individual_searches(client, rule_tree):
+    rule_tree = copy.deepcopy(rule_tree)
+    rules = rule_tree["rules"]
+    collectors = [
+        (OriginCollector(), client.collate_origins_with_criteria(rules)),
+        (CloudletCollector(), client.search_akamai_rule_tree_for_cloudlets(rules)),
+        (
+            LegacyEdgeRedirectorCollector(),
+            client.search_akamai_rule_tree_for_cloudlet(
+                rules, "edgeRedirector", shared=False
+            ),
+        ),
+        (EdgeWorkerCollector(), client.search_akamai_rule_tree_for_edge_workers(rules)),
+        (SiteShieldCollector(), client.search_akamai_rule_tree_for_siteshield(rules)),
+        (CpCodeCollector(), client.search_akamai_rule_tree_for_cp_codes(rules)),
+    ]
+    RuleTreeVisitor(*(collector for collector, _ in collectors)).visit(rules)
+
+    for collector, expected in collectors:
+        assert collector.result() == expected
+
+
+def test_image_manager_collector_derives_policy_sets():
+    rules = {
+        "behaviors": [{"name": "imageManager", "options": {"policyToken": "img"}}],
+        "children": [
+            {
+                "behaviors": [
+                    {"name": "imageManagerVideo", "options": {}},
+                    {"name": "imageManager", "options": {"policySet": "custom"}},
+                ]
+            }
+        ],
+    }
+    collector = ImageManagerCollector(asset_id="123")
+    RuleTreeVisitor(collector).visit(rules)
+
+    assert sorted(collector.result()) == ["123-v", "custom", "img-123"]
+    assert "policySet" not in rules["behaviors"][0]["options"]
+
+
+def test_origin_collector_uses_full_ancestor_chain():
+    rules = {
+        "behaviors": [origin("default.example.com")],
+        "children": [
+            path_rule(
+                ["/a/*"],
+                children=[
+                    path_rule(["/a/b/*"]),
+                    path_rule(
+                        ["/a/c/*"],
+                        children=[
+                            path_rule(["/a/c/d/*"], behaviors=[origin("deep.example")])
+                        ],
+                    ),
+                ],
+            )
+        ],
+    }
+    collector = OriginCollector()
+    RuleTreeVisitor(collector).visit(rules)
+
+    assert collector.result() == [
+        Origin(name="default.example.com"),
+        Origin(name="deep.example", path="/a/* AND /a/c/* AND /a/c/d/*"),
+    ]
+
+
+def test_describe_property_by_dict(client, mocker):
+    mocker.patch.object(
+        client, "get_rule_tree", return_value=copy.deepcopy(rule_tree_643957)
+    )
+    prop = {
+        "propertyId": "prp_643957",
+        "propertyName": "example",
+        "contractId": "ctr_1",
+        "groupId": "grp_1",
+        "assetId": "aid_1",
+        "hostnames": [{"cnameFrom": "www.example.com"}],
+    }
+
+    description = client.describe_property_by_dict(prop=prop, version=3)
+
+    rules = rule_tree_643957["rules"]
+    assert description.origins == client.collate_origins_with_criteria(rules)
+    assert description.cloudlet_policies == [32773, 116717]
+    assert description.siteshield_maps == ["s2604.akamaiedge.net"]
+    assert description.cp_codes == [752101]
+    assert description.hostnames == [EdgeHost(name="www.example.com")]
+    assert description.rule_format == "latest"
@@ -0,0 +1,87 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from nodestream_akamai.akamai_utils.client import AkamaiApiClient
+from nodestream_akamai.akamai_utils.session_pool import (
+    get_session,
+    reset_sessions,
+    session_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_sessions():
+    reset_sessions()
+    yield
+    reset_sessions()
+
+
+def make_client(client_token="ctoken", **kwargs):  # noqa: S107
+    return AkamaiApiClient(
+        base_url="https://fake.example.com",
+        client_token=client_token,
+        client_secret="secret",
+        access_token="atoken",
+        **kwargs,
+    )
+
+
+def test_clients_with_same_credentials_share_a_session():
+    first, second = make_client(), make_client()
+    assert first.session is second.session
+    assert make_client(client_token="other").session is not first.session
+    assert [stats.clients for stats in session_stats()] == [2, 1]
+
+
+def test_pool_grows_to_largest_size_requested():
+    session = get_session("https://fake.example.com", "ctoken", "secret", "atoken")
+    make_client(pool_size=32)
+    adapter = session.get_adapter("https://fake.example.com")
+    assert adapter._pool_maxsize == 32
+    (stats,) = session_stats()
+    assert stats.pool_size == 32
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"key": "value"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_stats_count_reused_connections(server):
+    clients = [
+        AkamaiApiClient(
+            base_url=server,
+            client_token="ctoken",
+            client_secret="secret",
+            access_token="atoken",
+        )
+        for _ in range(2)
+    ]
+    for client in clients:
+        assert client._get_api_from_relative_path("/example") == {"key": "value"}
+    (stats,) = session_stats()
+    assert stats.requests == 2
+    assert stats.connections == 1
+    assert stats.reused == 1
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+import responses
+
+from nodestream_akamai.akamai_utils.client import AkamaiApiClient
+from nodestream_akamai.akamai_utils.single_flight import SingleFlight
+
+
+def run_concurrently(group, key, func, callers=3):
+    results = [None] * callers
+    errors = [None] * callers
+
+    def call(index):
+        try:
+            results[index] = group.do(key, func)
+        except Exception as err:
+            errors[index] = err
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_calls_share_one_result():
+    group = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        release.wait(5)
+        return {"items": [1, 2]}
+
+    threads, results, errors = run_concurrently(group, "key", func)
+    while group.shared < 2:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert errors == [None, None, None]
+    assert results == [{"items": [1, 2]}] * 3
+    # Each caller can mutate its result without affecting the others
+    assert len({id(result) for result in results}) == 3
+
+
+def test_concurrent_callers_share_the_error():
+    group = SingleFlight()
+    release = threading.Event()
+
+    def func():
+        release.wait(5)
+        msg = "boom"
+        raise ValueError(msg)
+
+    threads, _, errors = run_concurrently(group, "key", func, callers=2)
+    while group.shared < 1:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert [type(error) for error in errors] == [ValueError, ValueError]
+
+
+def test_sequential_calls_are_not_shared():
+    group = SingleFlight()
+    assert group.do("key", lambda: 1) == 1
+    assert group.do("key", lambda: 2) == 2
+    assert group.shared == 0
+
+
+@responses.activate
+@pytest.mark.parametrize("coalesce_requests", [True, False])
+def test_client_makes_sequential_requests(coalesce_requests):
+    client = AkamaiApiClient(
+        base_url="https://fake.example.com",
+        client_token="ctoken",
+        client_secret="secret",
+        access_token="atoken",
+        coalesce_requests=coalesce_requests,
+    )
+    responses.add(method="GET", url="https://fake.example.com/example", json={"a": 1})
+    responses.add(method="GET", url="https://fake.example.com/example", json={"a": 2})
+    assert client._get_api_from_relative_path("/example") == {"a": 1}
+    assert client._get_api_from_relative_path("/example") == {"a": 2}
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+import responses
+
+from nodestream_akamai.akamai_utils import tracing
+from nodestream_akamai.akamai_utils.client import AkamaiApiClient
+from nodestream_akamai.akamai_utils.extractor import AkamaiExtractor
+
+
+class ListExporter(tracing.SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def exporter():
+    exporter = ListExporter()
+    tracing.configure_tracing(exporter)
+    yield exporter
+    tracing.disable_tracing()
+
+
+def test_spans_nest(exporter):
+    with tracing.span("outer", kind="test"), tracing.span("inner") as inner:
+        inner.set_attribute("items", 3)
+    inner, outer = exporter.spans
+    assert inner.parent_id == outer.span_id
+    assert inner.trace_id == outer.trace_id
+    assert inner.attributes == {"items": 3}
+    assert outer.attributes == {"kind": "test"}
+
+
+def test_failed_span(exporter):
+    msg = "boom"
+    with pytest.raises(ValueError, match=msg), tracing.span("failing"):
+        raise ValueError(msg)
+    (failed,) = exporter.spans
+    assert failed.status == "ERROR"
+
+
+def test_spans_are_not_recorded_when_disabled():
+    with tracing.span("ignored") as span:
+        span.set_attribute("key", "value")
+    assert not tracing.tracing_enabled()
+
+
+def test_file_exporter(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracing.configure_tracing({"exporter": "file", "path": str(path)})
+    try:
+        with tracing.span("written"):
+            pass
+    finally:
+        tracing.disable_tracing()
+    (line,) = path.read_text().splitlines()
+    assert json.loads(line)["name"] == "written"
+
+
+class FakeExtractor(AkamaiExtractor):
+    def __init__(self):
+        self.client = AkamaiApiClient(
+            base_url="https://fake.example.com",
+            client_token="ctoken",
+            client_secret="secret",
+            access_token="atoken",
+        )
+
+    async def extract_records(self):
+        for zone in ("a", "b"):
+            yield self.client._get_api_from_relative_path(
+                f"/config-dns/v2/zones/{zone}"
+            )
+
+
+@responses.activate
+@pytest.mark.asyncio
+async def test_extract_records_is_traced(exporter):
+    for zone in ("a", "b"):
+        responses.add(
+            method="GET",
+            url=f"https://fake.example.com/config-dns/v2/zones/{zone}",
+            json={"zone": zone},
+        )
+    records = [record async for record in FakeExtractor().extract_records()]
+    assert records == [{"zone": "a"}, {"zone": "b"}]
+
+    *requests, extraction = exporter.spans
+    assert extraction.name == "FakeExtractor.extract_records"
+    assert extraction.attributes["records"] == 2
+    assert {"produce_seconds", "consume_seconds"} <= set(extraction.attributes)
+    assert [span.name for span in requests] == ["akamai.request"] * 2
+    assert all(span.parent_id == extraction.span_id for span in requests)
+    assert requests[0].attributes == {
+        "method": "GET",
+        "endpoint": "/config-dns/v2/zones/a",
+        "status": 200,
+    }
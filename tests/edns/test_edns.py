@@ -1,6 +1,11 @@
+from unittest.mock import MagicMock
+
+import httpx
 import pytest
 import responses
+from requests import HTTPError
 
+from nodestream_akamai.akamai_utils.json_stream import JsonStreamError
 from nodestream_akamai.edns import edns
 
 
@@ -145,7 +150,7 @@ async def test_extract_records_zone_fetch_fail(edns_extractor):
     )
     responses.add(rsp1)
 
-    with pytest.raises(SystemError):
+    with pytest.raises(HTTPError, match="Unexpected status"):
         _ignored = [r async for r in edns_extractor.extract_records()]
 
 
@@ -171,5 +176,62 @@ async def test_extract_records_recordsets_fetch_fail(edns_extractor):
         status=400,
     )
     responses.add(rsp2)
-    with pytest.raises(SystemError):
+    with pytest.raises(HTTPError, match="Unexpected status"):
         _ignored = [r async for r in edns_extractor.extract_records()]
+
+
+def test_streamed_recordset_errors_are_logged(edns_extractor, mocker):
+    def record_sets():
+        yield {"name": "www.example.com", "type": "A", "rdata": ["192.0.2.1"]}
+        msg = "Truncated response"
+        raise JsonStreamError(msg)
+
+    mocker.patch.object(
+        edns_extractor.client, "list_recordsets", return_value=record_sets()
+    )
+    log = mocker.patch.object(edns_extractor.logger, "exception")
+
+    with pytest.raises(JsonStreamError, match="Truncated"):
+        edns_extractor._extract_zone({"zone": "example.com"})
+    log.assert_called_once_with(
+        "Failed to list record sets for zone: %s", "example.com"
+    )
+
+
+@responses.activate
+@pytest.mark.asyncio
+async def test_extract_records_concurrently_with_the_async_client():
+    extractor = edns.AkamaiEdnsExtractor(
+        base_url="https://fake.example.com",
+        client_token="ctoken",
+        client_secret="secret",
+        access_token="atoken",
+        stream_json=True,
+        max_concurrency=4,
+    )
+    responses.add(
+        method="GET",
+        url="https://fake.example.com/config-dns/v2/zones?showAll=true",
+        json={"zones": [{"zone": f"zone-{i}"} for i in range(8)]},
+    )
+    requested = []
+
+    def handler(request):
+        zone = request.url.path.split("/")[4]
+        requested.append(zone)
+        recordset = {"name": f"www.{zone}", "type": "A", "rdata": ["192.0.2.1"]}
+        return httpx.Response(200, json={"recordsets": [recordset]})
+
+    extractor.async_client.session = httpx.AsyncClient(
+        auth=extractor.async_client.session.auth,
+        transport=httpx.MockTransport(handler),
+    )
+
+    zones = [zone async for zone in extractor.extract_records()]
+    await extractor.finish(MagicMock())
+
+    assert sorted(zone["zone"] for zone in zones) == [f"zone-{i}" for i in range(8)]
+    assert sorted(requested) == [f"zone-{i}" for i in range(8)]
+    assert all(zone["recordsets"][0]["Cidripv4"] == ["192.0.2.1"] for zone in zones)
+    assert extractor.completed_units == {f"zone-{i}" for i in range(8)}
+    assert extractor.async_client.session.is_closed
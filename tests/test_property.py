@@ -1,9 +1,62 @@
+import sqlite3
 from unittest.mock import MagicMock, Mock
 
 import pytest
+from nodestream.pipeline.extractors.extractor import CHECKPOINT_OBJECT_KEY
+from nodestream.pipeline.object_storage import DirectoryObjectStore
 from requests import HTTPError
 
-from nodestream_akamai import AkamaiPropertyExtractor
+from nodestream_akamai import AkamaiPropertyExtractor, AkamaiStagingPropertyExtractor
+from nodestream_akamai.akamai_utils import (
+    AkamaiAuthenticationError,
+    PropertyDescription,
+    tracing,
+)
+
+# Tests parametrized over these cover the behaviour the staging extractor shares
+EXTRACTOR_CLASSES = (AkamaiPropertyExtractor, AkamaiStagingPropertyExtractor)
+
+
+def make_properties(ids, version=1):
+    return [
+        {
+            "productionVersion": version,
+            "stagingVersion": version,
+            "propertyName": f"prop-{i}",
+            "propertyId": str(i),
+        }
+        for i in ids
+    ]
+
+
+def make_extractor(
+    properties,
+    failing_ids=(),
+    error=HTTPError,
+    extractor_class=AkamaiPropertyExtractor,
+    **kwargs,
+):
+    """An extractor describing properties, failing for failing_ids with error."""
+
+    def describe(prop, version):  # noqa: ARG001
+        if prop["propertyId"] in failing_ids:
+            msg = f"Failed to describe {prop['propertyId']}"
+            raise error(msg)
+        return PropertyDescription(
+            id=prop["propertyId"], name=prop["propertyName"], hostnames=[]
+        )
+
+    extractor = extractor_class(
+        base_url="test_url",
+        client_token="test_client_token",
+        client_secret="test_client_secret",
+        access_token="test_access_token",
+        **kwargs,
+    )
+    extractor.client = MagicMock()
+    extractor.client.list_all_properties = Mock(return_value=properties)
+    extractor.client.describe_property_by_dict = Mock(side_effect=describe)
+    return extractor
 
 
 @pytest.fixture
@@ -40,3 +93,199 @@ async def test_extract_records_fail_other(extractor):
     extractor.client.describe_property_by_dict = Mock(side_effect=KeyError)
 
     assert [x async for x in extractor.extract_records()] == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"preserve_order": True},
+        {"max_concurrency": 4, "preserve_order": True},
+    ],
+)
+@pytest.mark.parametrize("extractor_class", EXTRACTOR_CLASSES)
+async def test_extract_records_isolates_failures(extractor_class, kwargs):
+    extractor = make_extractor(
+        make_properties(range(6)),
+        failing_ids={"3"},
+        error=KeyError,
+        extractor_class=extractor_class,
+        **kwargs,
+    )
+
+    results = [x async for x in extractor.extract_records()]
+
+    assert [record["id"] for record in results] == ["0", "1", "2", "4", "5"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("incremental_mode", "expected_ids"), [("emit", ["1", "2"]), ("skip", ["2"])]
+)
+@pytest.mark.parametrize("extractor_class", EXTRACTOR_CLASSES)
+async def test_extract_records_incrementally(
+    tmp_path, extractor_class, incremental_mode, expected_ids
+):
+    kwargs = {
+        "state_path": tmp_path,
+        "incremental_mode": incremental_mode,
+        "extractor_class": extractor_class,
+    }
+    properties = make_properties((1, 2))
+    first = make_extractor(properties, **kwargs)
+    assert len([x async for x in first.extract_records()]) == 2
+
+    properties[1] = make_properties((2,), version=2)[0]
+    second = make_extractor(properties, **kwargs)
+    results = [x async for x in second.extract_records()]
+
+    assert [record["id"] for record in results] == expected_ids
+    second.client.describe_property_by_dict.assert_called_once_with(
+        prop=properties[1], version=2
+    )
+
+
+@pytest.mark.asyncio
+async def test_state_is_saved_once_records_are_handed_off(tmp_path):
+    kwargs = {"state_path": tmp_path, "incremental_mode": "skip"}
+    properties = make_properties((1, 2))
+    first = make_extractor(properties, **kwargs)
+    records = first.extract_records()
+    assert (await records.__anext__())["id"] == "1"
+    assert (await records.__anext__())["id"] == "2"
+    # The run stopped while the pipeline still held the second record
+    await records.aclose()
+    await first.finish(MagicMock())
+    with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+        first.state.get("1", "PRODUCTION")
+
+    second = make_extractor(properties, **kwargs)
+    results = [record["id"] async for record in second.extract_records()]
+    assert results == ["2"]
+    second.client.describe_property_by_dict.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_finish_closes_the_state_and_rule_tree_cache(tmp_path):
+    extractor = AkamaiPropertyExtractor(
+        base_url="test_url",
+        client_token="test_client_token",
+        client_secret="test_client_secret",
+        access_token="test_access_token",
+        state_path=tmp_path,
+        rule_tree_cache_path=tmp_path,
+    )
+
+    await extractor.finish(MagicMock())
+
+    for store in (extractor.state, extractor.client.rule_tree_cache):
+        with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+            store.connection.execute("SELECT 1")
+
+
+def test_rejects_unknown_incremental_mode():
+    with pytest.raises(ValueError, match="incremental_mode must be one of"):
+        AkamaiPropertyExtractor(base_url="test_url", incremental_mode="sometimes")
+
+
+@pytest.mark.asyncio
+async def test_extract_records_with_staging_describes_each_version_once():
+    properties = [
+        {
+            "productionVersion": 2,
+            "stagingVersion": 2,
+            "propertyName": "same",
+            "propertyId": "1",
+        },
+        {
+            "productionVersion": 2,
+            "stagingVersion": 3,
+            "propertyName": "ahead",
+            "propertyId": "2",
+        },
+        {"stagingVersion": 1, "propertyName": "new", "propertyId": "3"},
+    ]
+    extractor = make_extractor(properties, include_staging=True)
+
+    results = [x async for x in extractor.extract_records()]
+
+    assert [(record["id"], record["network"]) for record in results] == [
+        ("1", "PRODUCTION"),
+        ("1", "STAGING"),
+        ("2", "PRODUCTION"),
+        ("2", "STAGING"),
+        ("3", "STAGING"),
+    ]
+    assert extractor.client.describe_property_by_dict.call_count == 4
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("extractor_class", EXTRACTOR_CLASSES)
+async def test_extract_records_resumes_from_checkpoint(extractor_class):
+    properties = make_properties((1, 2, 3))
+    first = make_extractor(
+        properties, failing_ids={"2"}, extractor_class=extractor_class
+    )
+    records = first.extract_records()
+    # Stops after the second property, which failed to describe
+    assert (await records.__anext__())["id"] == "1"
+    assert (await records.__anext__())["id"] == "3"
+    await records.aclose()
+    checkpoint = await first.make_checkpoint()
+
+    resumed = make_extractor(properties, extractor_class=extractor_class)
+    await resumed.resume_from_checkpoint(checkpoint)
+    results = [record["id"] async for record in resumed.extract_records()]
+    # 1 is done, 2 failed and is retried, 3 was not completed before the stop
+    assert results == ["2", "3"]
+
+
+@pytest.mark.asyncio
+async def test_authentication_errors_stop_the_run_and_it_resumes(tmp_path):
+    context = MagicMock()
+    context.object_store = DirectoryObjectStore(tmp_path)
+    context.pipeline_encountered_fatal_error = True
+    properties = make_properties((1, 2, 3))
+
+    first = make_extractor(
+        properties, failing_ids={"3"}, error=AkamaiAuthenticationError
+    )
+    first.CHECKPOINT_INTERVAL = 1
+    await first.start(context)
+    records = first.emit_outstanding_records(context)
+    assert (await records.__anext__())["id"] == "1"
+    assert (await records.__anext__())["id"] == "2"
+    with pytest.raises(AkamaiAuthenticationError, match="3"):
+        await records.__anext__()
+    # The pipeline failed, so its checkpoint is kept
+    await first.finish(context)
+
+    context.pipeline_encountered_fatal_error = False
+    resumed = make_extractor(properties)
+    await resumed.start(context)
+    results = [record["id"] async for record in resumed.extract_records()]
+    # 2 was handed on but the run stopped before it was checkpointed
+    assert results == ["2", "3"]
+    await resumed.finish(context)
+    assert context.object_store.get_pickled(CHECKPOINT_OBJECT_KEY) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("extractor_class", EXTRACTOR_CLASSES)
+async def test_extract_records_traces_each_description(extractor_class):
+    spans = []
+    exporter = tracing.SpanExporter()
+    exporter.export = spans.append
+    tracing.configure_tracing(exporter)
+    try:
+        extractor = make_extractor(
+            make_properties((1,), version=4), extractor_class=extractor_class
+        )
+        _ignore = [x async for x in extractor.extract_records()]
+    finally:
+        tracing.disable_tracing()
+
+    (describe,) = [span for span in spans if span.name == "property.describe"]
+    assert describe.attributes == {"property_id": "1", "version": 4}
+    (extraction,) = [span for span in spans if span.name.endswith("extract_records")]
+    assert extraction.name == f"{extractor_class.__name__}.extract_records"
@@ -72,3 +72,28 @@ async def test_extract_records_success(extractor):
     extractor.client.describe_property_by_dict.assert_called_once_with(
         prop=mock_property, version=42
     )
+
+
+@pytest.mark.asyncio
+async def test_extract_records_describes_only_the_staging_version(extractor):
+    properties = [
+        {
+            "productionVersion": 1,
+            "stagingVersion": 7,
+            "propertyName": "both",
+            "propertyId": "1",
+        },
+        {"productionVersion": 2, "propertyName": "production", "propertyId": "2"},
+    ]
+    extractor.client.list_all_properties = Mock(return_value=properties)
+    extractor.client.describe_property_by_dict = Mock(
+        return_value=PropertyDescription(id="1", name="both", hostnames=[])
+    )
+
+    results = [x async for x in extractor.extract_records()]
+
+    assert [record["id"] for record in results] == ["1"]
+    assert "network" not in results[0]
+    extractor.client.describe_property_by_dict.assert_called_once_with(
+        prop=properties[0], version=7
+    )
@@ -0,0 +1,59 @@
+import json
+
+from nodestream_akamai.akamai_utils.rate_limiter import reset_rate_limiters
+from nodestream_akamai.testing.benchmark import SCALES, compare, main, run_benchmarks
+
+
+def test_run_benchmarks_small_scale():
+    reset_rate_limiters()
+    only = ["property", "edns", "collate_origins_with_criteria"]
+    results = run_benchmarks(SCALES["small"], only=only)
+    reset_rate_limiters()
+    assert list(results) == [
+        "extractor.property",
+        "extractor.edns",
+        "rule_tree.collate_origins_with_criteria",
+    ]
+    edns = results["extractor.edns"]
+    assert edns["records"] == SCALES["small"].zones
+    # One listing plus one recordsets request per zone
+    assert edns["api_calls"] == SCALES["small"].zones + 1
+    assert edns["peak_memory_bytes"] > 0
+    assert results["extractor.property"]["records"] == SCALES["small"].properties
+    origins = results["rule_tree.collate_origins_with_criteria"]
+    assert origins["calls"] > 0
+    assert origins["microseconds_per_call"] > 0
+
+
+def test_compare_reports_regressions():
+    baseline = {
+        "extractor.edns": {"records": 2, "seconds": 1.0, "records_per_second": 2.0},
+        "rule_tree.search": {"calls": 5, "microseconds_per_call": 10.0},
+    }
+    results = {
+        "extractor.edns": {"records": 2, "seconds": 1.1, "records_per_second": 1.0},
+        "rule_tree.search": {"calls": 5, "microseconds_per_call": 20.0},
+        "rule_tree.new": {"calls": 5, "microseconds_per_call": 20.0},
+    }
+    assert compare(results, baseline, tolerance=0.25) == [
+        "extractor.edns records_per_second: 2.0 -> 1.0",
+        "rule_tree.search microseconds_per_call: 10.0 -> 20.0",
+    ]
+
+
+def test_compare_skips_results_with_different_records():
+    baseline = {"extractor.edns": {"records": 2, "seconds": 1.0}}
+    results = {"extractor.edns": {"records": 3, "seconds": 9.0}}
+    assert compare(results, baseline) == []
+
+
+def test_main_records_then_checks_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    args = ["--scale", "small", "--only", "gtm", "--baseline", str(baseline)]
+    reset_rate_limiters()
+    assert main(args) == 0
+    recorded = json.loads(baseline.read_text())
+    assert recorded["scale"] == "small"
+    assert list(recorded["results"]) == ["extractor.gtm"]
+    assert main([*args, "--tolerance", "1000"]) == 0
+    reset_rate_limiters()
@@ -0,0 +1,129 @@
+import random
+
+import pytest
+from requests import HTTPError
+
+from nodestream_akamai.akamai_utils.client import AkamaiApiClient
+from nodestream_akamai.akamai_utils.cloudlet_client import AkamaiCloudletClient
+from nodestream_akamai.akamai_utils.property_client import AkamaiPropertyClient
+from nodestream_akamai.akamai_utils.rate_limiter import reset_rate_limiters
+from nodestream_akamai.akamai_utils.retry import RetryPolicy
+from nodestream_akamai.testing import FakeAkamaiServer, FaultConfig
+from nodestream_akamai.testing.fake_server import parse_latency
+
+RULE_TREE = {
+    "ruleFormat": "v2024-01-09",
+    "rules": {
+        "name": "default",
+        "behaviors": [
+            {
+                "name": "origin",
+                "options": {"originType": "CUSTOMER", "hostname": "origin.example.com"},
+            }
+        ],
+        "children": [],
+    },
+}
+ACCOUNT = {
+    "properties": [
+        {
+            "propertyId": "prp_1",
+            "propertyName": "www.example.com",
+            "contractId": "ctr_1",
+            "groupId": "grp_1",
+            "assetId": "aid_1",
+            "productionVersion": 2,
+            "stagingVersion": 3,
+            "latestVersion": 3,
+        }
+    ],
+    "hostnames": [
+        {
+            "cnameFrom": f"www{index}.example.com",
+            "propertyId": "prp_1",
+            "contractId": "ctr_1",
+            "groupId": "grp_1",
+        }
+        for index in range(2100)
+    ],
+    "rule_trees": {"prp_1/2": RULE_TREE, "prp_1/3": RULE_TREE},
+    "cloudlet_v2_policies": [{"policyId": index} for index in range(2500)],
+    "cloudlet_v3_policies": [{"id": index} for index in range(2500)],
+}
+CREDENTIALS = {
+    "client_token": "ctoken",
+    "client_secret": "secret",
+    "access_token": "atoken",
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiters():
+    reset_rate_limiters()
+    yield
+    reset_rate_limiters()
+
+
+def fast_retries(client):
+    client.retry_policy = RetryPolicy(base_delay=0, throttle_base_delay=0, budget=None)
+    return client
+
+
+def test_property_client_against_fake_server():
+    with FakeAkamaiServer(ACCOUNT) as server:
+        client = AkamaiPropertyClient(base_url=server.url, **CREDENTIALS)
+        hostnames = client.list_account_hostnames()
+        assert hostnames == ACCOUNT["hostnames"]
+        (prop,) = client.list_all_properties()
+        description = client.describe_property_by_dict(prop, prop["productionVersion"])
+        assert [origin.name for origin in description.origins] == ["origin.example.com"]
+        (bulk_prop,) = client.list_all_properties(bulk_search=True)
+        assert bulk_prop["stagingVersion"] == 3
+        # Three pages for each of the three listings
+        assert server.api.requests["GET /papi/v1/hostnames"] == 9
+
+
+def test_next_links_are_followed_when_pages_are_capped():
+    with FakeAkamaiServer(ACCOUNT, FaultConfig(max_page_size=500)) as server:
+        client = AkamaiPropertyClient(
+            base_url=server.url, hostname_prefetch=1, **CREDENTIALS
+        )
+        assert client.list_account_hostnames() == ACCOUNT["hostnames"]
+        assert server.api.requests["GET /papi/v1/hostnames"] == 5
+
+
+def test_cloudlet_pagination_against_fake_server():
+    with FakeAkamaiServer(ACCOUNT) as server:
+        client = AkamaiCloudletClient(base_url=server.url, **CREDENTIALS)
+        assert client.list_v2_policies() == ACCOUNT["cloudlet_v2_policies"]
+        assert client.list_v3_policies() == ACCOUNT["cloudlet_v3_policies"]
+
+
+def test_injected_faults_are_retried():
+    faults = FaultConfig(throttle_rate=0.2, error_rate=0.3, retry_after=0, seed=3)
+    with FakeAkamaiServer(ACCOUNT, faults) as server:
+        client = fast_retries(AkamaiCloudletClient(base_url=server.url, **CREDENTIALS))
+        assert client.list_v2_policies() == ACCOUNT["cloudlet_v2_policies"]
+        assert client.list_v3_policies() == ACCOUNT["cloudlet_v3_policies"]
+        assert server.api.injected[429] > 0
+        assert client.error_count == sum(server.api.injected.values())
+
+
+def test_unsigned_requests_are_rejected():
+    with FakeAkamaiServer(ACCOUNT) as server:
+        client = AkamaiApiClient(base_url=server.url, **CREDENTIALS)
+        client.session.auth = None
+        with pytest.raises(HTTPError):
+            client._get_api_from_relative_path("/papi/v1/groups")
+
+
+@pytest.mark.parametrize(
+    "spec", ["fixed:0.1", "uniform:0,0.2", "exponential:0.1", "lognormal:-2,0.5"]
+)
+def test_parse_latency(spec):
+    assert parse_latency(spec)(random.Random(0)) >= 0  # noqa: S311
+
+
+def test_parse_invalid_latency():
+    with pytest.raises(ValueError, match="Invalid latency"):
+        parse_latency("gamma:1")
@@ -0,0 +1,117 @@
+import json
+import random
+
+import pytest
+
+from nodestream_akamai.akamai_utils.cloudlets_v2_client import AkamaiCloudletsV2Client
+from nodestream_akamai.akamai_utils.property_client import AkamaiPropertyClient
+from nodestream_akamai.edns.edns import AkamaiEdnsExtractor
+from nodestream_akamai.gtm.gtm import AkamaiGtmExtractor
+from nodestream_akamai.testing import AccountShape, FakeAkamaiServer, generate_account
+from nodestream_akamai.testing.fake_server import ACCOUNT_KEYS
+from nodestream_akamai.testing.synthetic import generate_rules, main
+
+CREDENTIALS = {
+    "base_url": "https://fake.example.com",
+    "client_token": "ctoken",
+    "client_secret": "secret",
+    "access_token": "atoken",
+}
+SMALL = AccountShape(
+    properties=5,
+    zones=2,
+    recordsets_per_zone=50,
+    gtm_domains=2,
+    gtm_properties_per_domain=3,
+    appsec_configs=2,
+    policies_per_appsec_config=4,
+    cloudlet_policies=2,
+    match_rules_per_policy=20,
+)
+
+
+def _count_rules(rule):
+    return 1 + sum(_count_rules(child) for child in rule["children"])
+
+
+def test_generate_account_is_reproducible():
+    assert generate_account(SMALL, seed=1) == generate_account(SMALL, seed=1)
+    assert generate_account(SMALL, seed=1) != generate_account(SMALL, seed=2)
+
+
+def test_generate_account_matches_the_fake_server_format():
+    account = generate_account(SMALL)
+    assert set(account) <= set(ACCOUNT_KEYS)
+    assert len(account["properties"]) == 5
+    assert len(account["hostnames"]) == 5 * SMALL.hostnames_per_property
+    for prop in account["properties"]:
+        for version in (prop["productionVersion"], prop["stagingVersion"]):
+            assert f"{prop['propertyId']}/{version}" in account["rule_trees"]
+    assert all(len(rs) == 50 for rs in account["recordsets"].values())
+    assert len(account["cloudlet_v2_policy_versions"]) == 2
+
+
+def test_rule_tree_depth_and_width():
+    shape = AccountShape(rule_tree_depth=5, rule_tree_width=3)
+    rules = generate_rules(random.Random(0), shape)  # noqa: S311
+    assert 5 <= _count_rules(rules) <= sum(3**level for level in range(5))
+
+
+def test_collate_origins_on_generated_rule_trees():
+    shape = AccountShape(properties=200, rule_tree_depth=5, rule_tree_width=4)
+    account = generate_account(shape, seed=3)
+    client = AkamaiPropertyClient(**CREDENTIALS)
+    for rule_tree in account["rule_trees"].values():
+        origins = client.collate_origins_with_criteria(rule_tree)
+        # The default rule always has an origin
+        assert origins
+        assert all(origin.name for origin in origins)
+
+
+def test_extract_recordset_on_generated_zone():
+    account = generate_account(
+        AccountShape(properties=0, zones=1, recordsets_per_zone=20000)
+    )
+    extractor = AkamaiEdnsExtractor(**CREDENTIALS)
+    ((zone, recordsets),) = account["recordsets"].items()
+    extracted = [extractor._extract_recordset(rs, zone) for rs in recordsets]
+    assert len(extracted) == 20000
+    a_records = [rs for rs in extracted if rs["type"] == "A"]
+    assert a_records
+    assert all(rs["Cidripv4"] == rs["rdata"] for rs in a_records)
+
+
+def test_search_ruleset_for_inbound_hosts_on_generated_policies():
+    account = generate_account(
+        AccountShape(properties=0, cloudlet_policies=2, match_rules_per_policy=10000)
+    )
+    client = AkamaiCloudletsV2Client(**CREDENTIALS)
+    for version in account["cloudlet_v2_policy_versions"].values():
+        hosts = client.search_akamai_ruleset_for_inbound_hosts(version["matchRules"])
+        assert len(hosts) > 9000
+
+
+@pytest.mark.asyncio
+async def test_extractors_against_generated_account():
+    account = generate_account(SMALL, seed=4)
+    with FakeAkamaiServer(account) as server:
+        credentials = {**CREDENTIALS, "base_url": server.url}
+        zones = [
+            record
+            async for record in AkamaiEdnsExtractor(**credentials).extract_records()
+        ]
+        domains = [
+            record
+            async for record in AkamaiGtmExtractor(**credentials).extract_records()
+        ]
+    assert len(zones) == SMALL.zones
+    assert len(domains) == SMALL.gtm_domains
+    assert all(len(domain["properties"]) == 3 for domain in domains)
+
+
+def test_main_writes_account(tmp_path):
+    out = tmp_path / "account.json"
+    main(["--out", str(out), "--properties", "2", "--zones", "1", "--seed", "5"])
+    account = json.loads(out.read_text())
+    assert len(account["properties"]) == 2
+    assert len(account["edns_zones"]) == 1